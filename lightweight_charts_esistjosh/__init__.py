@@ -2,3 +2,4 @@ from .abstract import AbstractChart, Window
 from .chart import Chart
 from .widgets import JupyterChart
 from .polygon import PolygonChart
+from .providers import ProviderChart
@@ -1,26 +1,48 @@
 import asyncio
+import bisect
 import json
 import os
+import threading
+import time
+from collections import Counter
 from base64 import b64decode
 from datetime import datetime
 from typing import Callable, Union, Literal, List, Optional, Any
+import numpy as np
 import pandas as pd
 from webview.errors import JavascriptException
 
 from .table import Table
 from .toolbox import ToolBox
-from .drawings import Box, HorizontalLine, RayLine, TrendLine, TwoPointDrawing, VerticalLine, VerticalSpan, PointMarker
+from .drawings import Box, Drawing, DrawingLayer, HorizontalLine, RayLine, SpanLayer, TrendLine, TwoPointDrawing, VerticalLine, VerticalSpan, PointMarker
 from .topbar import TopBar
 from .util import (
     BulkRunScript, Pane, Events, IDGen, as_enum, jbool, js_json, TIME, NUM, FLOAT,
     LINE_STYLE, MARKER_POSITION, MARKER_SHAPE, CANDLE_SHAPE, CROSSHAIR_MODE,
-    PRICE_SCALE_MODE, marker_position, marker_shape, js_data,
+    PRICE_SCALE_MODE, marker_position, marker_shape, js_data, js_columns, fingerprint, shared_prefix,
+    dictionary_encode, style_columns, js_row, RowSchema, BarStore, Ticks, roll_ticks,
 )
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 INDEX = os.path.join(current_dir, 'js', 'index.html')
 
 
+class PreparedData:
+    """
+    Chart data formatted and serialized by `AbstractChart.prepare`,
+    along with the interval and offset of its bars, which are applied once it is set.
+    """
+    def __init__(self, df: pd.DataFrame, columns: list, data: str, interval: Optional[tuple] = None):
+        self.df = df
+        self.columns = columns
+        self.data = data
+        self.interval = interval
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.df.memory_usage(deep=True).sum()) + len(self.data)
+
+
 class Window:
     _id_gen = IDGen()
     handlers = {}
@@ -36,6 +58,7 @@ class Window:
         self.scripts = []
         self.final_scripts = []
         self.bulk_run = BulkRunScript(script_func)
+        self._live = {}
 
         if run_script:
             self.run_script = run_script
@@ -43,6 +66,14 @@ class Window:
         if js_api_code:
             self.run_script(f'window.callbackFunction = {js_api_code}')
 
+        self._frame_interval = None
+        self._frame = {}
+        # Held while sending, so that scripts from different threads reach the webview in the order they were sent.
+        self._frame_lock = threading.RLock()
+        self._frame_timer = None
+        self._frame_loop = None
+        self._frame_sent = 0.0
+
     def on_js_load(self):
         if self.loaded:
             return
@@ -58,6 +89,12 @@ class Window:
             initial_script += f'\n{script}'
         self.script_func(initial_script)
 
+    def _send(self, script: str):
+        if self.bulk_run.enabled:
+            self.bulk_run.add_script(script)
+        else:
+            self.script_func(script)
+
     def run_script(self, script: str, run_last: bool = False):
         """
         For advanced users; evaluates JavaScript within the Webview.
@@ -65,15 +102,94 @@ class Window:
         if self.script_func is None:
             raise AttributeError("script_func has not been set")
         if self.loaded:
-            if self.bulk_run.enabled:
-                self.bulk_run.add_script(script)
-            else:
-                self.script_func(script)
+            with self._frame_lock:
+                # Anything coalesced before this script has to reach the webview first.
+                if self._frame:
+                    self.flush()
+                self._send(script)
         elif run_last:
             self.final_scripts.append(script)
         else:
             self.scripts.append(script)
 
+    def coalesce(self, interval: Optional[float] = 1 / 60):
+        """
+        Sends bar updates at most once per interval (in seconds);
+        updates made in between only replace the one waiting to be sent.\n
+        Frames are timed on the asyncio loop the updates are made from, or handed to the loop that made the last
+        ones when updated from another thread. Without any loop running, a frame is sent with the first update after
+        the interval has passed, so the last one waits for `flush` or the next script.\n
+        :param interval: None sends every update as it is made.
+        """
+        self.flush()
+        self._frame_interval = interval
+
+    def run_coalesced(self, key: str, script: Union[str, Callable[[], str]], interval: Optional[float] = None):
+        """
+        Runs a script with the next frame, replacing any script queued under the same key.
+        A function can be given instead, which makes the script when the frame is sent.\n
+        :param interval: the frame interval to use while updates are not coalesced,
+        which are sent at once when there is no asyncio loop to time it on.
+        """
+        coalescing = self._frame_interval is not None
+        interval = self._frame_interval or interval
+        # Windows without a script function only collect scripts, so they can't be sent later.
+        if not self.loaded or interval is None or self.script_func is None:
+            script = script() if callable(script) else script
+            return self.run_script(script) if script else None
+        with self._frame_lock:
+            self._frame[key] = script
+            if self._frame_timer is not None:
+                return
+            loop, here = self._owning_loop()
+            if loop is None:
+                # The script function is never called from a thread of our own, so the frame is sent from this one.
+                if not coalescing or time.monotonic() - self._frame_sent >= interval:
+                    self.flush()
+            elif here:
+                self._frame_timer = loop.call_later(interval, self.flush)
+            else:
+                # Stands in for the timer until it is started on the loop, so flushing before then cancels it too.
+                self._frame_timer = loop.call_soon_threadsafe(self._start_frame_timer, loop, interval)
+
+    def _start_frame_timer(self, loop, interval: float):
+        with self._frame_lock:
+            self._frame_timer = loop.call_later(interval, self.flush)
+
+    def _owning_loop(self):
+        """
+        Returns the asyncio loop frames are timed on, and whether it runs on this thread.
+        """
+        try:
+            self._frame_loop = asyncio.get_running_loop()
+            return self._frame_loop, True
+        except RuntimeError:
+            loop = self._frame_loop
+            return (loop, False) if loop is not None and loop.is_running() else (None, False)
+
+    def flush(self):
+        """
+        Sends the coalesced scripts waiting for the next frame.
+        """
+        with self._frame_lock:
+            if self._frame_timer is not None:
+                self._frame_timer.cancel()
+                self._frame_timer = None
+            frame, self._frame = self._frame, {}
+            self._frame_sent = time.monotonic()
+            # Functions make an empty script when there is nothing left to send.
+            scripts = '\n'.join(filter(None, (script() if callable(script) else script for script in frame.values())))
+            if scripts:
+                self._send(scripts)
+
+    def leak_report(self) -> dict:
+        """
+        Counts the objects created in the webview which have not been deleted, by type,
+        along with the registered callbacks. Numbers which keep growing as objects are
+        created and deleted point to a leak.
+        """
+        return {'objects': dict(Counter(self._live.values())), 'handlers': len(self.handlers)}
+
     def run_script_and_get(self, script: str):
         self.run_script(f'_~_~RETURN~_~_{script}')
         return self._return_q.get()
@@ -148,20 +264,56 @@ class SeriesCommon(Pane):
             self._interval = chart._interval
         else:
             self._interval = 1
-        self._last_bar = None
+        self._bars = BarStore()
+        self._schemas = {}
         self.name = name
         self.num_decimals = 2
         self.offset = 0
-        self.data = pd.DataFrame()
         self.markers = {}
+        self._marker_times = []
+        self._fingerprints = None
+        self._fingerprint_columns = None
+        self._spans = None
+        chart._adopt(self)
+
+    @property
+    def data(self) -> pd.DataFrame:
+        """
+        The data of the series, with times in seconds. It is kept between updates and
+        should be treated as read-only: edits are not sent to the chart, so use `set` or `update` instead.
+        """
+        return self._bars.frame
+
+    @data.setter
+    def data(self, df: pd.DataFrame):
+        self._bars.set(df)
+        # Positional updates follow the columns of the data which was set.
+        self._schemas = {None: RowSchema(tuple(df.columns))} if len(df.columns) else {}
 
-    def _set_interval(self, df: pd.DataFrame):
+    @property
+    def _last_bar(self) -> Optional[dict]:
+        return self._bars.last
+
+    def _release(self) -> list:
+        self._bars = BarStore()
+        self._schemas.clear()
+        self.markers.clear()
+        self._marker_times.clear()
+        self._reset_diff()
+        self._spans = None
+        return super()._release()
+
+    @staticmethod
+    def _detect_interval(df: pd.DataFrame) -> Optional[tuple]:
+        """
+        Returns the most common interval between the bars in seconds and their offset, or None for a single bar.
+        """
         if not pd.api.types.is_datetime64_any_dtype(df['time']):
             df['time'] = pd.to_datetime(df['time'])
         common_interval = df['time'].diff().value_counts()
         if common_interval.empty:
-            return
-        self._interval = common_interval.index[0].total_seconds()
+            return None
+        interval = common_interval.index[0].total_seconds()
 
         units = [
             pd.Timedelta(microseconds=df['time'].dt.microsecond.value_counts().index[0]),
@@ -170,15 +322,16 @@ class SeriesCommon(Pane):
             pd.Timedelta(hours=df['time'].dt.hour.value_counts().index[0]),
             pd.Timedelta(days=df['time'].dt.day.value_counts().index[0]),
         ]
-        self.offset = 0
+        offset = 0
         for value in units:
             value = value.total_seconds()
             if value == 0:
                 continue
-            elif value >= self._interval:
+            elif value >= interval:
                 break
-            self.offset = value
+            offset = value
             break
+        return interval, offset
 
     @staticmethod
     def _format_labels(data, labels, index, exclude_lowercase):
@@ -196,13 +349,24 @@ class SeriesCommon(Pane):
         return labels
 
     def _df_datetime_format(self, df: pd.DataFrame, exclude_lowercase=None):
+        df, interval = self._df_format(df, exclude_lowercase)
+        if interval is not None:
+            self._interval, self.offset = interval
+        return df
+
+    def _df_format(self, df: pd.DataFrame, exclude_lowercase=None) -> tuple:
+        """
+        Formats the labels and times of the data without touching the chart,
+        returning it along with the interval and offset of its bars.
+        """
         df = df.copy()
         df.columns = self._format_labels(df, df.columns, df.index, exclude_lowercase)
-        self._set_interval(df)
+        interval = self._detect_interval(df)
         if not pd.api.types.is_datetime64_any_dtype(df['time']):
             df['time'] = pd.to_datetime(df['time'])
-        df['time'] = df['time'].astype('int64') // 10 ** 9
-        return df
+        # Through nanoseconds, as the resolution of parsed times varies between pandas versions.
+        df['time'] = df['time'].to_numpy(dtype='datetime64[ns]').astype('int64') // 10 ** 9
+        return df, interval
 
     def _series_datetime_format(self, series: pd.Series, exclude_lowercase=None):
         series = series.copy()
@@ -211,6 +375,11 @@ class SeriesCommon(Pane):
         return series
 
     def _single_datetime_format(self, arg) -> float:
+        # Numbers and timestamps are converted directly, as this is called on every update.
+        if isinstance(arg, (int, float, np.integer, np.floating)) and not isinstance(arg, bool):
+            return self._interval * ((arg / 1000) // self._interval) + self.offset
+        if isinstance(arg, pd.Timestamp):
+            return self._interval * (arg.timestamp() // self._interval) + self.offset
         if isinstance(arg, (str, int, float)) or not pd.api.types.is_datetime64_any_dtype(arg):
             try:
                 arg = pd.to_datetime(arg, unit='ms')
@@ -219,10 +388,79 @@ class SeriesCommon(Pane):
         arg = self._interval * (arg.timestamp() // self._interval)+self.offset
         return arg
 
+    def _times_format(self, times) -> list:
+        """
+        Formats many times at once, in the same way as `_single_datetime_format`.
+        Missing times are returned as None.
+        """
+        times = pd.Series(list(times) if pd.api.types.is_list_like(times) else [times])
+        if pd.api.types.is_numeric_dtype(times) and not pd.api.types.is_bool_dtype(times):
+            seconds = times.astype(float) / 1000
+        else:
+            # Naive times are taken as UTC, as Timestamp.timestamp() does.
+            times = pd.to_datetime(times, utc=True)
+            seconds = (times - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(seconds=1)
+        formatted = self._interval * (seconds // self._interval) + self.offset
+        return formatted.astype(object).where(formatted.notna(), None).tolist()
+
+    def _format_row(self, row, name: str = '') -> dict:
+        """
+        Formats an update into a data item, through a schema compiled once for its labels.
+        A tuple or NumPy row is read in the order of the columns of the data which was set.
+        """
+        if isinstance(row, pd.Series):
+            labels, values, index = tuple(row.index), row.tolist(), row.name
+        elif isinstance(row, dict):
+            labels, values, index = tuple(row), list(row.values()), None
+        else:
+            labels, values, index = None, row.tolist() if isinstance(row, np.ndarray) else list(row), None
+        schema = self._schemas.get(labels)
+        if schema is None:
+            if labels is None:
+                raise ValueError('Data must be set before updating from a tuple or array.')
+            schema = self._schemas[labels] = RowSchema.compile(labels, name)
+        item = schema.row(values, index)
+        item['time'] = self._single_datetime_format(item['time'])
+        return item
+
+    def _diff(self, df: pd.DataFrame) -> int:
+        """
+        Fingerprints the given data and returns the number of leading rows
+        which are already displayed, so only the remaining tail needs to be sent.
+        """
+        fingerprints = fingerprint(df)
+        prefix = 0
+        if self._fingerprints is not None and self._fingerprint_columns == tuple(df.columns):
+            prefix = shared_prefix(self._fingerprints, fingerprints)
+        self._fingerprints, self._fingerprint_columns = fingerprints, tuple(df.columns)
+        return prefix
+
+    def _update_bar(self, bar: dict) -> bool:
+        """
+        Stores an update to the last bar, or a new bar after it, so that the next `set` sends it again.
+        :return: whether a new bar was appended.
+        """
+        appended = self._bars.update(bar)
+        if self._fingerprints is not None:
+            # Only the bars before the one updated or appended are still displayed as fingerprinted.
+            self._fingerprints = self._fingerprints[:len(self._bars) - 1]
+        return appended
+
+    def _reset_diff(self):
+        self._fingerprints = None
+        self._fingerprint_columns = None
+
+    def _set_data(self, df: pd.DataFrame, prefix: int, series: str = 'series'):
+        if not prefix:
+            self.run_script(f'{self.id}.{series}.setData({js_data(df)})')
+        else:
+            self.run_script(f'Lib.Handler.mergeData({self.id}.{series}, {prefix}, {js_data(df.iloc[prefix:])})')
+
     def set(self, df: Optional[pd.DataFrame] = None, format_cols: bool = True):
         if df is None or df.empty:
             self.run_script(f'{self.id}.series.setData([])')
             self.data = pd.DataFrame()
+            self._reset_diff()
             return
         if format_cols:
             df = self._df_datetime_format(df, exclude_lowercase=self.name)
@@ -231,30 +469,40 @@ class SeriesCommon(Pane):
                 raise NameError(f'No column named "{self.name}".')
             df = df.rename(columns={self.name: 'value'})
         self.data = df.copy()
-        self._last_bar = df.iloc[-1]
-        self.run_script(f'{self.id}.series.setData({js_data(df)}); ')
-
-    def update(self, series: pd.Series):
-        series = self._series_datetime_format(series, exclude_lowercase=self.name)
-        if self.name in series.index:
-            series.rename({self.name: 'value'}, inplace=True)
-        if self._last_bar is not None and series['time'] != self._last_bar['time']:
-            self.data.loc[self.data.index[-1]] = self._last_bar
-            self.data = pd.concat([self.data, series.to_frame().T], ignore_index=True)
-        self._last_bar = series
-        self.run_script(f'{self.id}.series.update({js_data(series)})')
-
-    def _update_markers(self):
-        # Inclure le prix dans les données des marqueurs si disponible
-        markers_data = [
-            {**marker, 'price': marker.get('price')} for marker in self.markers.values()
-        ]
-        self.run_script(f'{self.id}.series.setMarkers({json.dumps(markers_data)})')
+        prefix = self._diff(df)
+        self._set_data(df, prefix)
+        self._reanchor_markers(prefix)
+
+    def update(self, series: Union[pd.Series, dict, tuple, np.ndarray]):
+        bar = self._format_row(series, self.name)
+        self._update_bar(bar)
+        self.run_script(f'{self.id}.series.update({js_row(bar)})')
+
+    def _marker_script(self, method: str, *args):
+        self.run_script(f'Lib.MarkerStore.of({self.id}.series).{method}({", ".join(args)})')
+
+    def _store_marker(self, marker_id: str, marker: dict):
+        self.markers[marker_id] = marker
+        bisect.insort(self._marker_times, (marker['time'], marker_id))
+
+    def _drop_marker(self, marker_id: str):
+        marker = self.markers.pop(marker_id)
+        del self._marker_times[bisect.bisect_left(self._marker_times, (marker['time'], marker_id))]
 
-    def marker_list(self, markers: list):
+    def _reanchor_markers(self, prefix: int = 0):
+        """
+        Re-anchors the markers after new data was set, leaving those before
+        the first `prefix` bars (which are unchanged) where they are.
+        """
+        if self.markers:
+            self._marker_script('reanchor', str(prefix))
+
+    def marker_list(self, markers: Union[list, pd.DataFrame]):
         """
         Creates multiple markers.\n
-        :param markers: The list of markers to set. These should be in the format:\n
+        :param markers: The list of markers to set, or a DataFrame with one column per parameter.
+        A DataFrame is sent by column, which is much faster for large numbers of markers.
+        A list should be in the format:\n
         [
             {"time": "2021-01-21", "position": "below", "shape": "circle", "color": "#2196F3", "text": ""},
             {"time": "2021-01-22", "position": "below", "shape": "circle", "color": "#2196F3", "text": ""},
@@ -273,7 +521,8 @@ class SeriesCommon(Pane):
 
         :return: a list of marker ids.
         """
-        markers = markers.copy()
+        if isinstance(markers, pd.DataFrame):
+            return self._marker_columns(markers)
         marker_ids = []
         for marker in markers:
             marker_id = self.win._id_gen.generate()
@@ -288,9 +537,34 @@ class SeriesCommon(Pane):
                     case 'text' | 'size':
                         m[k] = v
 
-            self.markers[marker_id] = m.copy()
+            self._store_marker(marker_id, m)
             marker_ids.append(marker_id)
-        self._update_markers()
+        self._marker_script('add', json.dumps([{'id': i, **self.markers[i]} for i in marker_ids]))
+        return marker_ids
+
+    @staticmethod
+    def _marker_column(df: pd.DataFrame, column: str, default: str):
+        if column not in df:
+            return [default] * len(df)
+        return df[column].where(df[column].notna(), default)
+
+    def _marker_columns(self, df: pd.DataFrame):
+        columns = {
+            'time': self._times_format(df['time']),
+            'position': [marker_position(position) for position in self._marker_column(df, 'position', 'below')],
+            'color': list(self._marker_column(df, 'color', '#2196F3')),
+            'shape': [marker_shape(shape) for shape in self._marker_column(df, 'shape', 'arrow_up')],
+        }
+        for column in ('text', 'size'):
+            if column in df:
+                values = df[column]
+                columns[column] = values.astype(object).where(values.notna(), None).tolist()
+        marker_ids = [self.win._id_gen.generate() for _ in range(len(df))]
+        for i, marker_id in enumerate(marker_ids):
+            self._store_marker(marker_id, {
+                key: values[i] for key, values in columns.items() if values[i] is not None
+            })
+        self._marker_script('addColumns', json.dumps({'id': marker_ids, **columns}))
         return marker_ids
 
     def marker(self, time: Optional[datetime] = None, position: MARKER_POSITION = 'below',
@@ -324,16 +598,46 @@ class SeriesCommon(Pane):
         if size is not None:
             m['size'] = size
 
-        self.markers[marker_id] = m
-        self._update_markers()
+        self._store_marker(marker_id, m)
+        self._marker_script('add', json.dumps([{'id': marker_id, **m}]))
         return marker_id
 
+    def update_marker(self, marker_id: str, time: Optional[TIME] = None, position: Optional[MARKER_POSITION] = None,
+                      shape: Optional[MARKER_SHAPE] = None, color: Optional[str] = None,
+                      text: Optional[str] = None, size: Optional[NUM] = None):
+        """
+        Changes the given parameters of a marker, leaving the others as they are.\n
+        """
+        fields = {'position': marker_position(position) if position else None,
+                  'shape': marker_shape(shape) if shape else None,
+                  'color': color, 'text': text, 'size': size}
+        if time is not None:
+            fields['time'] = self._single_datetime_format(time)
+        fields = {key: value for key, value in fields.items() if value is not None}
+        marker = self.markers[marker_id]
+        self._drop_marker(marker_id)
+        self._store_marker(marker_id, {**marker, **fields})
+        self._marker_script('update', json.dumps(marker_id), json.dumps(fields))
+
     def remove_marker(self, marker_id: str):
         """
         Removes the marker with the given id.\n
         """
-        self.markers.pop(marker_id)
-        self._update_markers()
+        self._drop_marker(marker_id)
+        self._marker_script('remove', json.dumps([marker_id]))
+
+    def remove_markers(self, start_time: TIME, end_time: TIME):
+        """
+        Removes the markers placed between the two times, inclusive.\n
+        """
+        start, end = self._single_datetime_format(start_time), self._single_datetime_format(end_time)
+        lo = bisect.bisect_left(self._marker_times, start, key=lambda item: item[0])
+        hi = bisect.bisect_right(self._marker_times, end, key=lambda item: item[0])
+        marker_ids = [marker_id for _, marker_id in self._marker_times[lo:hi]]
+        for marker_id in marker_ids:
+            del self.markers[marker_id]
+        del self._marker_times[lo:hi]
+        self._marker_script('remove', json.dumps(marker_ids))
 
     def horizontal_line(self, price: NUM, color: str = 'rgb(122, 146, 202)', width: int = 2,
                         style: LINE_STYLE = 'solid', text: str = '', axis_label_visible: bool = True,
@@ -344,6 +648,35 @@ class SeriesCommon(Pane):
         """
         return HorizontalLine(self, price, color, width, style, text, axis_label_visible, func)
 
+    def update_drawings(self, drawings: List['Drawing'], points: List[Union[NUM, tuple]]):
+        """
+        Moves many drawings in one message.\n
+        :param drawings: The drawings to move.
+        :param points: The new points of each drawing, as (time, price, time, price...),
+        or just a price for a horizontal line.
+        """
+        points = [p if isinstance(p, (tuple, list)) else (None, p) for p in points]
+        times = self._times_format([time for p in points for time in p[0::2]])
+        js_times, js_prices, start = [], [], 0
+        for p in points:
+            js_times.append(times[start:start + len(p) // 2])
+            js_prices.append([float(price) for price in p[1::2]])
+            start += len(p) // 2
+        for drawing, p in zip(drawings, points):
+            if isinstance(drawing, HorizontalLine):
+                drawing.price = p[1]
+        self.run_script(
+            f'Lib.TimeIndex.of({self.id}.series).updateDrawings('
+            f'[{", ".join(d.id for d in drawings)}], {json.dumps(js_times)}, {json.dumps(js_prices)})'
+        )
+
+    def drawing_layer(self) -> 'DrawingLayer':
+        """
+        Creates a layer which draws many lines, rays, boxes and points at once.
+        Use it instead of individual drawings when there are hundreds or thousands of them.
+        """
+        return DrawingLayer(self)
+
     def trend_line(
         self,
         start_time: TIME,
@@ -399,7 +732,8 @@ class SeriesCommon(Pane):
         Clears the markers displayed on the data.\n
         """
         self.markers.clear()
-        self._update_markers()
+        self._marker_times.clear()
+        self._marker_script('clear')
 
     def price_line(self, label_visible: bool = True, line_visible: bool = True, title: str = ''):
         self.run_script(f'''
@@ -435,7 +769,7 @@ class SeriesCommon(Pane):
 
     def vertical_span(
         self,
-        start_time: Union[TIME, tuple, list],
+        start_time: Union[TIME, tuple, list, pd.DataFrame],
         end_time: Optional[TIME] = None,
         color: str = 'rgba(252, 219, 3, 0.2)',
         round: bool = False
@@ -444,11 +778,22 @@ class SeriesCommon(Pane):
         Creates a vertical line or span across the chart.\n
         Start time and end time can be used together, or end_time can be
         omitted and a single time or a list of times can be passed to start_time.
+        A DataFrame with `start`, `end` and `color` columns creates many spans at once.
+        With `round`, the spans are snapped onto the bars nearest to their times.
+        """
+        return VerticalSpan(self, start_time, end_time, color, round)
+
+    def span_layer(self) -> 'SpanLayer':
+        """
+        Creates a layer which shades many time spans at once.
         """
-        if round:
-            start_time = self._single_datetime_format(start_time)
-            end_time = self._single_datetime_format(end_time) if end_time else None
-        return VerticalSpan(self, start_time, end_time, color)
+        return SpanLayer(self)
+
+    def _span_layer(self) -> 'SpanLayer':
+        # Vertical spans share a single layer per series.
+        if self._spans is None:
+            self._spans = self.span_layer()
+        return self._spans
     
     def point_marker(
         self,
@@ -538,8 +883,8 @@ class Line(SeriesCommon):
 
             {self._chart.id}.chart.removeSeries({self.id}.series)
             delete {self.id}legendItem
-            delete {self.id}
         ''')
+        self._free()
 
 
 class Histogram(SeriesCommon):
@@ -582,8 +927,8 @@ class Histogram(SeriesCommon):
 
             {self._chart.id}.chart.removeSeries({self.id}.series)
             delete {self.id}legendItem
-            delete {self.id}
         ''')
+        self._free()
 
     def scale(self, scale_margin_top: float = 0.0, scale_margin_bottom: float = 0.0):
         self.run_script(f'''
@@ -646,8 +991,8 @@ class Area(SeriesCommon):
 
             {self._chart.id}.chart.removeSeries({self.id}.series)
             delete {self.id}legendItem
-            delete {self.id}
         ''')
+        self._free()
 
 
 class Bar(SeriesCommon):
@@ -681,26 +1026,24 @@ class Bar(SeriesCommon):
         if df is None or df.empty:
             self.run_script(f'{self.id}.series.setData([])')
             self.candle_data = pd.DataFrame()
+            self._reset_diff()
             return
         df = self._df_datetime_format(df)
         self.data = df.copy()
-        self._last_bar = df.iloc[-1]
-        self.run_script(f'{self.id}.series.setData({js_data(df)})')
+        prefix = self._diff(df)
+        self._set_data(df, prefix)
+        self._reanchor_markers(prefix)
 
-    def update(self, series: pd.Series, _from_tick=False):
+    def update(self, series: Union[pd.Series, dict, tuple, np.ndarray], _from_tick=False):
         """
         Updates the data from a bar;
         if series['time'] is the same time as the last bar, the last bar will be overwritten.\n
         :param series: labels: date/time, open, high, low, close, volume (if using volume).
         """
-        series = self._series_datetime_format(series) if not _from_tick else series
-        if series['time'] != self._last_bar['time']:
-            self.data.loc[self.data.index[-1]] = self._last_bar
-            self.data = pd.concat([self.data, series.to_frame().T], ignore_index=True)
+        bar = self._format_row(series) if not _from_tick else series
+        if self._update_bar(bar):
             self._chart.events.new_bar._emit(self)
-
-        self._last_bar = series
-        self.run_script(f'{self.id}.series.update({js_data(series)})')
+        self.run_script(f'{self.id}.series.update({js_row(bar)})')
     def delete(self):
         """
         Irreversibly deletes the bar series.
@@ -715,8 +1058,8 @@ class Bar(SeriesCommon):
 
             {self._chart.id}.chart.removeSeries({self.id}.series)
             delete {self.id}legendItem
-            delete {self.id}
         ''')
+        self._free()
         
 class CustomCandle(SeriesCommon):
     def __init__(
@@ -749,6 +1092,7 @@ class CustomCandle(SeriesCommon):
         self.down_color = down_color
         self.group = group  # Store group for legend grouping
         self.legend_symbol = legend_symbol if isinstance(legend_symbol, list) else [legend_symbol, legend_symbol]
+        self._palettes = {}
 
         # Define the radius function as a JavaScript function string if none provided
 
@@ -786,21 +1130,32 @@ class CustomCandle(SeriesCommon):
         if df is None or df.empty:
             self.run_script(f'{self.id}.series.setData([])')
             self.data = pd.DataFrame()
+            self._palettes = {}
+            self._reset_diff()
             return
         df = self._df_datetime_format(df)
         self.data = df.copy()
-        self._last_bar = df.iloc[-1]
-        self.run_script(f'{self.id}.series.setData({js_data(df)})')
-
-    def update(self, series: pd.Series):
-        series = self._series_datetime_format(series)
-        if series['time'] != self._last_bar['time']:
-            self.data.loc[self.data.index[-1]] = self._last_bar
-            self.data = pd.concat([self.data, series.to_frame().T], ignore_index=True)
+        prefix = self._diff(df)
+
+        # Per-bar styles are sent as indices into palettes held in the series options.
+        palettes = {}
+        for col, key in style_columns(df).items():
+            palette, codes = dictionary_encode(df[col])
+            palettes[key] = palette
+            codes = pd.Series(codes, index=df.index, dtype='Int64').mask(codes == len(palette) - 1)
+            df = df.drop(columns=col).assign(**{key: codes})
+        if palettes != self._palettes:
+            prefix = 0
+            self.run_script(f'{self.id}.series.applyOptions({{palettes: {json.dumps(palettes)}}})')
+        self._palettes = palettes
+        self._set_data(df, prefix)
+        self._reanchor_markers(prefix)
+
+    def update(self, series: Union[pd.Series, dict, tuple, np.ndarray]):
+        bar = self._format_row(series)
+        if self._update_bar(bar):
             self._chart.events.new_bar._emit(self)
-
-        self._last_bar = series
-        self.run_script(f'{self.id}.series.update({js_data(series)})')
+        self.run_script(f'{self.id}.series.update({js_row(bar)})')
 
 
 class Candlestick(SeriesCommon):
@@ -809,42 +1164,105 @@ class Candlestick(SeriesCommon):
         self._volume_up_color = 'rgba(83,141,131,0.8)'
         self._volume_down_color = 'rgba(200,127,130,0.8)'
 
-        self.candle_data = pd.DataFrame()
+        self._dataset_columns = None
 
         # self.run_script(f'{self.id}.makeCandlestickSeries()')
 
-    def set(self, df: Optional[pd.DataFrame] = None, keep_drawings=False):
+    @property
+    def candle_data(self) -> pd.DataFrame:
+        return self.data
+
+    @candle_data.setter
+    def candle_data(self, df: pd.DataFrame):
+        self.data = df
+
+    def _dataset_layout(self, df: pd.DataFrame):
+        """
+        Returns the columns of the frame shipped by `set`, and the per-bar styles among them.
+        """
+        columns = ['time', 'open', 'high', 'low', 'close']
+        # Per-bar colors repeat a handful of values, so they are shipped dictionary-encoded.
+        styles = {col: key for col, key in style_columns(df).items() if key != 'shape'}
+        columns += list(styles)
+        if 'volume' in df:
+            columns.append('volume')
+            columns += [line.name for line in self._lines if line.name in df.columns and line.name not in columns]
+        return columns, styles
+
+    @staticmethod
+    def _dataset_data(df: pd.DataFrame, columns: list, styles: dict, prefix: int = 0) -> str:
+        # Fixed-frequency times are sent as a start, an interval and the rows where the series jumps.
+        return js_columns(df[columns].iloc[prefix:], encode=styles, regular=('time',))
+
+    def prepare(self, df: pd.DataFrame) -> 'PreparedData':
+        """
+        Formats and serializes data ahead of time, so that passing it to `set` later only has to send it.
+        """
+        # The chart keeps bucketing its live ticks at the interval of the data on screen until this is set.
+        df, interval = self._df_format(df)
+        columns, styles = self._dataset_layout(df)
+        return PreparedData(df, columns, self._dataset_data(df, columns, styles), interval)
+
+    def set(self, df: Optional[Union[pd.DataFrame, 'PreparedData']] = None, keep_drawings=False):
         """
         Sets the initial data for the chart.\n
-        :param df: columns: date/time, open, high, low, close, volume (if volume enabled).
+        :param df: columns: date/time, open, high, low, close, volume (if volume enabled), or data from `prepare`.
         :param keep_drawings: keeps any drawings made through the toolbox. Otherwise, they will be deleted.
-        """
+        If the given data only differs from the displayed data in its last rows, only those rows are sent
+        and drawings are kept.
+        """
+        prepared = df if isinstance(df, PreparedData) else None
+        if prepared is not None:
+            df = prepared.df
+            if prepared.interval is not None:
+                self._interval, self.offset = prepared.interval
         if df is None or df.empty:
             self.run_script(f'{self.id}.series.setData([])')
             self.run_script(f'{self.id}.volumeSeries.setData([])')
             self.candle_data = pd.DataFrame()
+            self._dataset_columns = None
+            self._reset_diff()
             return
-        df = self._df_datetime_format(df)
+        if prepared is None:
+            df = self._df_datetime_format(df)
+        previous_length = len(self._fingerprints) if self._fingerprints is not None else 0
+        prefix = self._diff(df)
+        keep_drawings = keep_drawings or (prefix and prefix >= previous_length - 1)
         self.candle_data = df.copy()
-        self._last_bar = df.iloc[-1]
-        self.run_script(f'{self.id}.series.setData({js_data(df)})')
 
-        if 'volume' not in df:
-            return
-        volume = df.drop(columns=['open', 'high', 'low', 'close']).rename(columns={'volume': 'value'})
-        volume['color'] = self._volume_down_color
-        volume.loc[df['close'] > df['open'], 'color'] = self._volume_up_color
-        self.run_script(f'{self.id}.volumeSeries.setData({js_data(volume)})')
+        # The frame is shipped once as a dataset, and every series is built from its columns in the webview.
+        columns, styles = self._dataset_layout(df)
+        bindings = [(f'{self.id}.series', {key: key for key in ('time', 'open', 'high', 'low', 'close')})]
+        bindings[0][1].update({key: col for col, key in styles.items()})
+        if 'volume' in df:
+            # Volume colors are derived from the candles in the webview rather than shipped per bar.
+            bindings.append((f'{self.id}.volumeSeries', {'time': 'time', 'value': 'volume'},
+                             {'upColor': self._volume_up_color, 'downColor': self._volume_down_color}))
+
+            for line in self._lines:
+                if line.name not in df.columns:
+                    continue
+                line.data = df[['time', line.name]].rename(columns={line.name: 'value'})
+                line._reset_diff()
+                bindings.append((f'{line.id}.series', {'time': 'time', 'value': line.name}))
+
+        if columns != self._dataset_columns:
+            prefix = 0
+        self._dataset_columns = columns
+        bindings = ', '.join(f'[{series}, {", ".join(json.dumps(arg) for arg in args)}]' for series, *args in bindings)
+        if prepared is not None and prefix == 0 and prepared.columns == columns:
+            data = prepared.data
+        else:
+            data = self._dataset_data(df, columns, styles, prefix)
+        self.run_script(f'{self.id}.dataset.set({prefix}, {data}, [{bindings}])')
+        self._reanchor_markers(prefix)
 
-        for line in self._lines:
-            if line.name not in df.columns:
-                continue
-            line.set(df[['time', line.name]], format_cols=False)
-        # set autoScale to true in case the user has dragged the price scale
-        self.run_script(f'''
-            if (!{self.id}.chart.priceScale("right").options.autoScale)
-                {self.id}.chart.priceScale("right").applyOptions({{autoScale: true}})
-        ''')
+        if 'volume' in df:
+            # set autoScale to true in case the user has dragged the price scale
+            self.run_script(f'''
+                if (!{self.id}.chart.priceScale("right").options.autoScale)
+                    {self.id}.chart.priceScale("right").applyOptions({{autoScale: true}})
+            ''')
         # TODO keep drawings doesn't work consistenly w
         if keep_drawings:
             self.run_script(f'{self._chart.id}.toolBox?._drawingTool.repositionOnTime()')
@@ -900,36 +1318,31 @@ class Candlestick(SeriesCommon):
         updateCandleAggregation();
         """)
 
-    def update(self, series: pd.Series, _from_tick=False):
+    def update(self, series: Union[pd.Series, dict, tuple, np.ndarray], _from_tick=False):
         """
         Updates the data from a bar;
         if series['time'] is the same time as the last bar, the last bar will be overwritten.\n
         :param series: labels: date/time, open, high, low, close, volume (if using volume).
+        A dict, or a tuple in the order of the columns passed to `set`, can also be given.
         """
-        series = self._series_datetime_format(series) if not _from_tick else series
-        if series['time'] != self._last_bar['time']:
-            self.candle_data.loc[self.candle_data.index[-1]] = self._last_bar
-            self.candle_data = pd.concat([self.candle_data, series.to_frame().T], ignore_index=True)
+        bar = self._format_row(series) if not _from_tick else series
+        if self._update_bar(bar):
+            # The previous bar's last update must not be superseded by the new one.
+            self.win.flush()
             self._chart.events.new_bar._emit(self)
-
-        self._last_bar = series
-        self.run_script(f'{self.id}.series.update({js_data(series)})')
-        if 'volume' not in series:
-            return
-        volume = series.drop(['open', 'high', 'low', 'close']).rename({'volume': 'value'})
-        volume['color'] = self._volume_up_color if series['close'] > series['open'] else self._volume_down_color
-        self.run_script(f'{self.id}.volumeSeries.update({js_data(volume)})')
+        self.win.run_coalesced(f'{self.id}.updateBar', f'{self.id}.updateBar({js_row(bar)})')
 
     def update_from_tick(self, series: pd.Series, cumulative_volume: bool = False):
         """
         Updates the data from a tick.\n
+        Each tick sends a single message, or none at all while updates are coalesced (see `Window.coalesce`).\n
         :param series: labels: date/time, price, volume (if using volume).
         :param cumulative_volume: Adds the given volume onto the latest bar.
         """
-        series = self._series_datetime_format(series)
+        series = self._format_row(series)
         if series['time'] < self._last_bar['time']:
             raise ValueError(f'Trying to update tick of time "{pd.to_datetime(series["time"])}", which occurs before the last bar time of "{pd.to_datetime(self._last_bar["time"])}".')
-        bar = pd.Series(dtype='float64')
+        bar = {}
         if series['time'] == self._last_bar['time']:
             bar = self._last_bar
             bar['high'] = max(self._last_bar['high'], series['price'])
@@ -941,13 +1354,53 @@ class Candlestick(SeriesCommon):
                 else:
                     bar['volume'] = series['volume']
         else:
+            bar['time'] = series['time']
             for key in ('open', 'high', 'low', 'close'):
                 bar[key] = series['price']
-            bar['time'] = series['time']
             if 'volume' in series:
                 bar['volume'] = series['volume']
         self.update(bar, _from_tick=True)
 
+    def update_from_ticks(self, ticks: Union[pd.DataFrame, Ticks], cumulative_volume: bool = False):
+        """
+        Updates the data from many ticks at once, sorted by time.\n
+        The ticks are rolled up into bars together, so only one update is made for each bar they touch.
+        Given `Ticks`, charts of the same timeframe share the bars they roll up into.\n
+        :param ticks: columns: date/time, price, volume (if using volume).
+        :param cumulative_volume: Adds the given volumes onto the latest bar.
+        """
+        if not len(ticks):
+            return
+        bars = None
+        if isinstance(ticks, pd.DataFrame):
+            times = ticks['time'] if 'time' in ticks else ticks['date']
+            if pd.api.types.is_datetime64_dtype(times):
+                ticks = Ticks.from_frame(ticks)
+            else:
+                volumes = ticks['volume'].to_numpy(dtype=float) if 'volume' in ticks else None
+                times = np.asarray(self._times_format(times), dtype=float)
+                bars = roll_ticks(times, ticks['price'].to_numpy(dtype=float), volumes, cumulative_volume)
+        if bars is None:
+            bars = ticks.bars(self._interval, self.offset, cumulative_volume)
+        times, opens, highs, lows, closes, volumes = bars
+        if times[0] < self._last_bar['time']:
+            raise ValueError(f'Trying to update ticks from time "{pd.to_datetime(times[0], unit="s")}", which occurs before the last bar time of "{pd.to_datetime(self._last_bar["time"], unit="s")}".')
+
+        for i in range(len(times)):
+            if times[i] == self._last_bar['time']:
+                bar = self._last_bar
+                bar['high'] = max(bar['high'], highs[i])
+                bar['low'] = min(bar['low'], lows[i])
+                bar['close'] = closes[i]
+                if volumes is not None:
+                    bar['volume'] = bar['volume'] + volumes[i] if cumulative_volume else volumes[i]
+            else:
+                bar = {'time': times[i], 'open': opens[i], 'high': highs[i], 'low': lows[i], 'close': closes[i]}
+                if volumes is not None:
+                    bar['volume'] = volumes[i]
+            self.update({key: value.item() if isinstance(value, np.generic) else value for key, value in bar.items()},
+                        _from_tick=True)
+
     def price_scale(
         self,
         auto_scale: bool = True,
@@ -1009,7 +1462,10 @@ class Candlestick(SeriesCommon):
             top: {scale_margin_top},
             bottom: {scale_margin_bottom},
             }}
-        }})''')
+        }})
+        {self.id}.volumeUpColor = '{self._volume_up_color}'
+        {self.id}.volumeDownColor = '{self._volume_down_color}'
+        ''')
 
 #class PositionPlot(SeriesCommon):
 #    def __init__(
@@ -1197,6 +1653,21 @@ class AbstractChart(Candlestick, Pane):
         if toolbox:
             self.toolbox: ToolBox = ToolBox(self)
 
+    def _release(self) -> list:
+        self.polygon._detach()
+        return super()._release()
+
+    def delete(self):
+        """
+        Irreversibly deletes the chart, along with its series, drawings and callbacks.
+        """
+        self.run_script(f'''
+            {self.id}.chart.remove()
+            {self.id}.wrapper.remove()
+            Lib.Handler.handlers.delete("{self.id}")
+        ''')
+        self._free()
+
     def fit(self):
         """
         Fits the maximum amount of the chart data within the viewport.
@@ -1589,7 +2060,7 @@ class AbstractChart(Candlestick, Pane):
                         }}
                         else return false
                     }})''')
-        self.win.handlers[f'{modifier_key, keys}'] = func
+        self._handler(f'{modifier_key, keys}', func)
 
     def create_table(
         self,
@@ -1610,7 +2081,10 @@ class AbstractChart(Candlestick, Pane):
     ) -> Table:
         args = locals()
         del args['self']
-        return self.win.create_table(*args.values())
+        table = self.win.create_table(*args.values())
+        # The table belongs to the chart, so it is released along with it.
+        self._adopt(table)
+        return table
 
     def screenshot(self) -> bytes:
         """
@@ -5,7 +5,7 @@ import typing
 import webview
 from webview.errors import JavascriptException
 
-from lightweight_charts_esistjosh import abstract
+from . import abstract
 from .util import parse_event_message, FLOAT
 
 import os
@@ -204,7 +204,7 @@ class Chart(abstract.AbstractChart):
     async def show_async(self):
         self.show(block=False)
         try:
-            from lightweight_charts import polygon
+            from . import polygon
             [asyncio.create_task(self.polygon.async_set(*args)) for args in polygon._set_on_load]
             while 1:
                 while Chart.WV.emit_queue.empty() and self.is_alive:
@@ -234,3 +234,4 @@ class Chart(abstract.AbstractChart):
         """
         Chart.WV.exit()
         self.is_alive = False
+        self._release()
@@ -1,42 +1,44 @@
 import asyncio
 import json
+import numpy as np
 import pandas as pd
 
 from typing import Union, Optional
 
-from lightweight_charts_esistjosh.util import js_json
+from .util import js_json
 
 from .util import NUM, Pane, as_enum, LINE_STYLE, TIME, snake_to_camel
 
+def make_js_points(chart, times, prices):
+    """
+    Returns a JS array of drawing points. The times are formatted together here,
+    and their logical indexes are found in one pass over the series' time index.
+    """
+    return (f'Lib.TimeIndex.of({chart.id}.series)'
+            f'.points({json.dumps(chart._times_format(times))}, {json.dumps([float(p) for p in prices])})')
+
+
 def make_js_point(chart, time, price):
-    formatted_time = chart._single_datetime_format(time)
-    return f'''{{
-        "time": {formatted_time},
-        "logical": {chart.id}.chart.timeScale()
-                    .coordinateToLogical(
-                        {chart.id}.chart.timeScale()
-                        .timeToCoordinate({formatted_time})
-                    ),
-        "price": {price}
-    }}'''
+    return f'{make_js_points(chart, [time], [price])}[0]'
 
 class Drawing(Pane):
     def __init__(self, chart, func=None):
         super().__init__(chart.win)
         self.chart = chart
+        chart._adopt(self)
 
     def update(self, *points):
-        formatted_points = []
-        for i in range(0, len(points), 2):
-            formatted_points.append(make_js_point(self.chart, points[i], points[i + 1]))
-        self.run_script(f'{self.id}.updatePoints({", ".join(formatted_points)})')
-        print(f'{self.id}.updatePoints({", ".join(formatted_points)})')
+        """
+        Moves the drawing to the given points, as (time, price, time, price...).
+        """
+        self.run_script(f'{self.id}.updatePoints(...{make_js_points(self.chart, points[0::2], points[1::2])})')
 
     def delete(self):
         """
         Irreversibly deletes the drawing.
         """
         self.run_script(f'{self.id}.detach()')
+        self._free()
 
     def options(self, color='#1E80F0', style='solid', width=4):
         self.run_script(f'''{self.id}.applyOptions({{
@@ -66,8 +68,7 @@ class TwoPointDrawing(Drawing):
 
         self.run_script(f'''
         {self.id} = new Lib.{drawing_type}(
-            {make_js_point(self.chart, start_time, start_value)},
-            {make_js_point(self.chart, end_time, end_value)},
+            ...{make_js_points(self.chart, [start_time, end_time], [start_value, end_value])},
             {{
                 {options_string}
             }}
@@ -105,7 +106,7 @@ class HorizontalLine(Drawing):
             self.price = float(p)
             await func(chart, self)
 
-        self.win.handlers[self.id] = wrapper_async if asyncio.iscoroutinefunction(func) else wrapper
+        self._handler(self.id, wrapper_async if asyncio.iscoroutinefunction(func) else wrapper)
         self.run_script(f'{chart.id}.toolBox?.addNewDrawing({self.id})')
 
     def update(self, price: float):
@@ -142,9 +143,8 @@ class VerticalLine(Drawing):
         ''')
 
     def update(self, time: TIME):
-        self.run_script(f'{self.id}.updatePoints({{time: {time}}})')
-        # self.run_script(f'{self.id}.updatePrice({price})')
-        self.price = price
+        self.run_script(f'{self.id}.updatePoints({make_js_point(self.chart, time, 0)})')
+        self.time = time
 
     def options(self, color='#1E80F0', style='solid', width=4, text=''):
         super().options(color, style, width)
@@ -166,7 +166,7 @@ class RayLine(Drawing):
         super().__init__(chart, func)
         self.run_script(f'''
         {self.id} = new Lib.RayLine(
-            {{time: {self.chart._single_datetime_format(start_time)}, price: {value}}},
+            {make_js_point(self.chart, start_time, value)},
             {{
                 lineColor: '{color}',
                 lineStyle: {as_enum(style, LINE_STYLE)},
@@ -242,42 +242,29 @@ class TrendLine(TwoPointDrawing):
             func
         )
 
-# TODO reimplement/fix
-class VerticalSpan(Pane):
+class VerticalSpan:
+    """
+    Spans drawn on the shared span layer of a series.
+    """
     def __init__(self, series: 'SeriesCommon', start_time: Union[TIME, tuple, list], end_time: Optional[TIME] = None,
-                 color: str = 'rgba(252, 219, 3, 0.2)'):
-        self._chart = series._chart
-        super().__init__(self._chart.win)
-        start_time, end_time = pd.to_datetime(start_time), pd.to_datetime(end_time)
-        self.run_script(f'''
-        {self.id} = {self._chart.id}.chart.addHistogramSeries({{
-                color: '{color}',
-                priceFormat: {{type: 'volume'}},
-                priceScaleId: 'vertical_line',
-                lastValueVisible: false,
-                priceLineVisible: false,
-        }})
-        {self.id}.priceScale('').applyOptions({{
-            scaleMargins: {{top: 0, bottom: 0}}
-        }})
-        ''')
-        if end_time is None:
-            if isinstance(start_time, pd.DatetimeIndex):
-                data = [{'time': time.timestamp(), 'value': 1} for time in start_time]
-            else:
-                data = [{'time': start_time.timestamp(), 'value': 1}]
-            self.run_script(f'{self.id}.setData({data})')
-        else:
-            self.run_script(f'''
-            {self.id}.setData(calculateTrendLine(
-            {start_time.timestamp()}, 1, {end_time.timestamp()}, 1, {series.id}))
-            ''')
+                 color: str = 'rgba(252, 219, 3, 0.2)', round: bool = False):
+        self._layer = series._span_layer()
+        self.ids = self._layer.spans(start_time, end_time, color, round)
+        self.run_script = self._layer.run_script
+
+    @property
+    def id(self) -> str:
+        """
+        The id of the span layer drawing the spans, which is shared with the other vertical spans of the series.
+        Vertical spans used to be series of their own; scripts run against this id now reach the whole layer.
+        """
+        return self._layer.id
 
     def delete(self):
         """
         Irreversibly deletes the vertical span.
         """
-        self.run_script(f'{self._chart.id}.chart.removeSeries({self.id})')
+        self._layer.remove(self.ids)
 
 class PointMarker(Drawing):
     def __init__(
@@ -343,4 +330,131 @@ class PointMarker(Drawing):
             
         if options:
             options_str = ', '.join(f"{k}: {v}" for k, v in options.items())
-            self.run_script(f'{self.id}.applyOptions({{{options_str}}})')
\ No newline at end of file
+            self.run_script(f'{self.id}.applyOptions({{{options_str}}})')
+
+
+class Layer(Pane):
+    """
+    A single primitive drawing many shapes, which are added, updated and removed in bulk.
+    """
+    def __init__(self, chart, js_class: str):
+        super().__init__(chart.win)
+        self.chart = chart
+        chart._adopt(self)
+        self.run_script(f'''
+        {self.id} = new Lib.{js_class}()
+        {chart.id}.series.attachPrimitive({self.id})
+        ''')
+
+    def _columns(self, **columns):
+        formatted = {}
+        for key, values in columns.items():
+            if values is None:
+                continue
+            many = pd.api.types.is_list_like(values)
+            if key in ('time', 'end_time', 'start', 'end'):
+                values = self.chart._times_format(values) if many else self.chart._single_datetime_format(values)
+            elif key == 'style':
+                values = [as_enum(style, LINE_STYLE) for style in values] if many else as_enum(values, LINE_STYLE)
+            elif many:
+                values = np.asarray(values).tolist()
+            formatted[snake_to_camel(key)] = values
+        return formatted
+
+    def remove(self, ids):
+        """
+        Removes the given drawings in one message.
+        """
+        self.run_script(f'{self.id}.remove({json.dumps(list(ids))})')
+
+    def clear(self):
+        self.run_script(f'{self.id}.clear()')
+
+    def delete(self):
+        """
+        Irreversibly deletes the layer and all of its drawings.
+        """
+        self.run_script(f'{self.chart.id}.series.detachPrimitive({self.id})')
+        self._free()
+
+
+class DrawingLayer(Layer):
+    """
+    Draws many horizontal lines, rays, trend lines, boxes and points with a single primitive.
+    Each method sends all of its drawings in one message and returns their ids.
+    Style arguments take either one value for every drawing or a value per drawing.
+    """
+    def __init__(self, chart):
+        super().__init__(chart, 'DrawingLayer')
+
+    def _add(self, kind, **columns):
+        columns = self._columns(**columns)
+        ids = [self.win._id_gen.generate() for _ in range(len(columns['price']))]
+        self.run_script(f'{self.id}.add("{kind}", {json.dumps({"id": ids, **columns})})')
+        return ids
+
+    def horizontal_lines(self, prices, color='rgb(122, 146, 202)', width=2, style: LINE_STYLE = 'solid'):
+        """
+        Draws a horizontal line at each price.
+        """
+        return self._add('horizontal', price=prices, color=color, width=width, style=style)
+
+    def rays(self, times, prices, color='#1E80F0', width=2, style: LINE_STYLE = 'solid'):
+        """
+        Draws a horizontal ray from each time and price, extending to the right.
+        """
+        return self._add('ray', time=times, price=prices, color=color, width=width, style=style)
+
+    def trend_lines(self, start_times, start_prices, end_times, end_prices,
+                    color='#1E80F0', width=2, style: LINE_STYLE = 'solid'):
+        return self._add('trend', time=start_times, price=start_prices, end_time=end_times,
+                         end_price=end_prices, color=color, width=width, style=style)
+
+    def boxes(self, start_times, start_prices, end_times, end_prices, color='#1E80F0',
+              fill_color='rgba(255, 255, 255, 0.2)', width=2, style: LINE_STYLE = 'solid'):
+        return self._add('box', time=start_times, price=start_prices, end_time=end_times,
+                         end_price=end_prices, color=color, fill_color=fill_color, width=width, style=style)
+
+    def points(self, times, prices, radius=5, fill_color='#000000', color='#1E80F0', width=1):
+        return self._add('point', time=times, price=prices, radius=radius,
+                         fill_color=fill_color, color=color, width=width)
+
+    def update(self, ids, time=None, price=None, end_time=None, end_price=None, color=None,
+               fill_color=None, width=None, style: Optional[LINE_STYLE] = None, radius=None):
+        """
+        Updates the given drawings in one message.
+        Each argument is either one value for every drawing or a value per drawing.
+        """
+        columns = self._columns(time=time, price=price, end_time=end_time, end_price=end_price, color=color,
+                                fill_color=fill_color, width=width, style=style, radius=radius)
+        self.run_script(f'{self.id}.update({json.dumps(list(ids))}, {json.dumps(columns)})')
+
+
+class SpanLayer(Layer):
+    """
+    Shades any number of time spans across the chart with a single primitive.
+    Only the spans overlapping the visible range are drawn.
+    """
+    def __init__(self, chart):
+        super().__init__(chart, 'SpanLayer')
+
+    def spans(self, start, end=None, color: Union[str, list] = 'rgba(252, 219, 3, 0.2)', round: bool = False):
+        """
+        Adds spans in one message and returns their ids.\n
+        :param start: The start time of each span, or a DataFrame with `start`, and optionally `end` and `color` columns.
+        :param end: The end time of each span. Spans without an end cover a single bar.
+        :param color: One color for every span, or a color per span.
+        :param round: Snaps the spans onto the bars nearest to their times, rather than between them.
+        """
+        if isinstance(start, pd.DataFrame):
+            df = start
+            start, end = df['start'], df['end'] if 'end' in df else None
+            color = df['color'] if 'color' in df else color
+        if not pd.api.types.is_list_like(start):
+            start, end = [start], None if end is None else [end]
+        columns = self._columns(start=start, end=start if end is None else end, color=color)
+        if round:
+            columns['round'] = True
+        ids = [self.win._id_gen.generate() for _ in range(len(columns['start']))]
+        self.run_script(f'{self.id}.add({json.dumps({"id": ids, **columns})})')
+        return ids
@@ -1836,6 +1836,126 @@ var Lib = (function (exports, lightweightCharts) {
         width: 4,
     };
 
+    // Drawings spanning more cells than this are checked on every query instead.
+    const MAX_CELLS = 1024;
+    /**
+     * A uniform grid over logical indexes and prices, so that hit tests only
+     * visit the drawings near the mouse rather than every drawing on the chart.
+     * Drawings unbounded in time are kept by price row, drawings unbounded
+     * in price by logical column, and the rest by grid cell.
+     */
+    class DrawingIndex {
+        _cellLogical;
+        _cells = new Map();
+        _rows = new Map();
+        _columns = new Map();
+        _always = new Set();
+        _keys = new Map();
+        _cellPrice = null;
+        constructor(_cellLogical = 8) {
+            this._cellLogical = _cellLogical;
+        }
+        get size() {
+            return this._keys.size;
+        }
+        _span(min, max, size) {
+            return [Math.floor(min / size), Math.floor(max / size)];
+        }
+        _place(bounds) {
+            if (!bounds)
+                return [null, []];
+            const { minLogical, maxLogical, minPrice, maxPrice } = bounds;
+            const logicalBound = isFinite(minLogical) && isFinite(maxLogical);
+            const priceBound = isFinite(minPrice) && isFinite(maxPrice);
+            if (priceBound && this._cellPrice === null) {
+                // Prices of one symbol share a magnitude, so the grid is sized from the first of them.
+                this._cellPrice = Math.abs(maxPrice) * 0.002 || 1;
+            }
+            const rows = priceBound ? this._span(minPrice, maxPrice, this._cellPrice) : null;
+            const columns = logicalBound ? this._span(minLogical, maxLogical, this._cellLogical) : null;
+            const range = ([from, to]) => Array.from({ length: to - from + 1 }, (_, i) => from + i);
+            if (rows && columns) {
+                if ((rows[1] - rows[0] + 1) * (columns[1] - columns[0] + 1) > MAX_CELLS)
+                    return [null, []];
+                const keys = [];
+                for (let i = columns[0]; i <= columns[1]; i++) {
+                    for (let j = rows[0]; j <= rows[1]; j++)
+                        keys.push(`${i},${j}`);
+                }
+                return [this._cells, keys];
+            }
+            if (rows && rows[1] - rows[0] < MAX_CELLS)
+                return [this._rows, range(rows)];
+            if (columns && columns[1] - columns[0] < MAX_CELLS)
+                return [this._columns, range(columns)];
+            return [null, []];
+        }
+        /**
+         * Adds the drawing, or moves it to where its points now are.
+         */
+        update(drawing) {
+            const [map, keys] = this._place(drawing.bounds());
+            const current = this._keys.get(drawing);
+            if (current && current[0] === map && current[1].join() === keys.join())
+                return;
+            this.remove(drawing);
+            this._keys.set(drawing, [map, keys]);
+            if (!map) {
+                this._always.add(drawing);
+                return;
+            }
+            for (const key of keys) {
+                let drawings = map.get(key);
+                if (!drawings)
+                    map.set(key, drawings = new Set());
+                drawings.add(drawing);
+            }
+        }
+        remove(drawing) {
+            const current = this._keys.get(drawing);
+            if (!current)
+                return;
+            const [map, keys] = current;
+            if (!map)
+                this._always.delete(drawing);
+            for (const key of keys) {
+                const drawings = map.get(key);
+                drawings.delete(drawing);
+                if (!drawings.size)
+                    map.delete(key);
+            }
+            this._keys.delete(drawing);
+        }
+        clear() {
+            [this._cells, this._rows, this._columns].forEach((map) => map.clear());
+            this._always.clear();
+            this._keys.clear();
+            this._cellPrice = null;
+        }
+        /**
+         * Returns the drawings whose bounds may overlap the given area.
+         */
+        query(bounds) {
+            const columns = this._span(bounds.minLogical, bounds.maxLogical, this._cellLogical);
+            const rows = this._cellPrice === null ? [0, 0] : this._span(bounds.minPrice, bounds.maxPrice, this._cellPrice);
+            // When zoomed far out the area covers more cells than there are drawings.
+            if ((columns[1] - columns[0] + 1) * (rows[1] - rows[0] + 1) > MAX_CELLS)
+                return new Set(this._keys.keys());
+            const found = new Set(this._always);
+            const add = (drawings) => drawings?.forEach((drawing) => found.add(drawing));
+            for (let i = columns[0]; i <= columns[1]; i++)
+                add(this._columns.get(i));
+            if (this._cellPrice === null)
+                return found;
+            for (let j = rows[0]; j <= rows[1]; j++) {
+                add(this._rows.get(j));
+                for (let i = columns[0]; i <= columns[1]; i++)
+                    add(this._cells.get(`${i},${j}`));
+            }
+            return found;
+        }
+    }
+
     var InteractionState;
     (function (InteractionState) {
         InteractionState[InteractionState["NONE"] = 0] = "NONE";
@@ -1857,6 +1977,7 @@ var Lib = (function (exports, lightweightCharts) {
         static hoveredObject = null;
         static lastHoveredObject = null;
         _listeners = [];
+        _index = null;
         constructor(options) {
             super();
             this._options = {
@@ -1864,6 +1985,27 @@ var Lib = (function (exports, lightweightCharts) {
                 ...options,
             };
         }
+        requestUpdate() {
+            // Keeps the drawing where the hit tests look for it whenever it changes.
+            this._index?.update(this);
+            super.requestUpdate();
+        }
+        /**
+         * Returns the extent of the drawing, or null if it can't be placed.
+         */
+        bounds() {
+            const points = this.points.filter((point) => !!point);
+            if (!points.length || points.some((point) => point.logical == null))
+                return null;
+            const logicals = points.map((point) => point.logical);
+            const prices = points.map((point) => point.price);
+            return {
+                minLogical: Math.min(...logicals),
+                maxLogical: Math.max(...logicals),
+                minPrice: Math.min(...prices),
+                maxPrice: Math.max(...prices),
+            };
+        }
         updateAllViews() {
             this._paneViews.forEach(pw => pw.update());
         }
@@ -2175,6 +2317,9 @@ var Lib = (function (exports, lightweightCharts) {
         get points() {
             return [this._point];
         }
+        bounds() {
+            return { minLogical: -Infinity, maxLogical: Infinity, minPrice: this._point.price, maxPrice: this._point.price };
+        }
         updatePoints(...points) {
             for (const p of points)
                 if (p)
@@ -2503,6 +2648,9 @@ var Lib = (function (exports, lightweightCharts) {
         _isDrawing = false;
         _drawingType = null;
         _measureClickCount = 0;
+        _index = new DrawingIndex();
+        // The drawings given the last mouse move, so those the mouse has left are reset.
+        _touched = new Set();
         constructor(chart, series, finishDrawingCallback = null) {
             this._chart = chart;
             this._series = series;
@@ -2529,7 +2677,12 @@ var Lib = (function (exports, lightweightCharts) {
         }
         addNewDrawing(drawing) {
             this._series.attachPrimitive(drawing);
+            this._push(drawing);
+        }
+        _push(drawing) {
             this._drawings.push(drawing);
+            drawing._index = this._index;
+            this._index.update(drawing);
         }
         delete(d) {
             if (d == null)
@@ -2538,12 +2691,19 @@ var Lib = (function (exports, lightweightCharts) {
             if (idx == -1)
                 return;
             this._drawings.splice(idx, 1);
+            d._index = null;
+            this._index.remove(d);
+            this._touched.delete(d);
             d.detach();
         }
         clearDrawings() {
-            for (const d of this._drawings)
+            for (const d of this._drawings) {
+                d._index = null;
                 d.detach();
+            }
             this._drawings = [];
+            this._index.clear();
+            this._touched.clear();
         }
         repositionOnTime() {
             for (const drawing of this.drawings) {
@@ -2606,7 +2766,7 @@ var Lib = (function (exports, lightweightCharts) {
                         this._onClick(param);
                 }
                 else {
-                    this._drawings.push(this._activeDrawing);
+                    this._push(this._activeDrawing);
                     this.stopDrawing();
                     if (!this._finishDrawingCallback)
                         return;
@@ -2617,8 +2777,18 @@ var Lib = (function (exports, lightweightCharts) {
         _onMouseMove(param) {
             if (!param)
                 return;
-            for (const t of this._drawings)
+            const nearby = this._nearby(param);
+            // The hovered drawing follows the mouse while it is dragged.
+            const hovered = Drawing.hoveredObject;
+            if (hovered && hovered._index === this._index)
+                nearby.add(hovered);
+            for (const t of this._touched)
                 t._handleHoverInteraction(param);
+            for (const t of nearby) {
+                if (!this._touched.has(t))
+                    t._handleHoverInteraction(param);
+            }
+            this._touched = nearby;
             if (!this._isDrawing || !this._activeDrawing)
                 return;
             const point = Drawing._eventToPoint(param, this._series);
@@ -2627,6 +2797,26 @@ var Lib = (function (exports, lightweightCharts) {
             this._activeDrawing.updatePoints(null, point);
             // this._activeDrawing.setSecondPoint(point);
         }
+        /**
+         * Returns the drawings within reach of the mouse, looked up in the index
+         * rather than hit testing every drawing on the chart.
+         */
+        _nearby(param, tolerance = 12) {
+            if (!param.point || param.logical == null)
+                return new Set();
+            const { x, y } = param.point;
+            const timeScale = this._chart.timeScale();
+            const prices = [y - tolerance, y + tolerance].map((coordinate) => this._series.coordinateToPrice(coordinate));
+            const logicals = [x - tolerance, x + tolerance].map((coordinate) => timeScale.coordinateToLogical(coordinate));
+            if (prices.includes(null) || logicals.includes(null))
+                return new Set(this._drawings);
+            return this._index.query({
+                minLogical: Math.min(...logicals),
+                maxLogical: Math.max(...logicals),
+                minPrice: Math.min(...prices),
+                maxPrice: Math.max(...prices),
+            });
+        }
     }
 
     class TrendLinePaneRenderer extends TwoPointDrawingPaneRenderer {
@@ -2912,6 +3102,11 @@ var Lib = (function (exports, lightweightCharts) {
             super({ ...point }, options);
             this._point.time = point.time;
         }
+        bounds() {
+            if (this._point.logical == null)
+                return null;
+            return { ...super.bounds(), minLogical: this._point.logical };
+        }
         updatePoints(...points) {
             for (const p of points)
                 if (p)
@@ -3029,6 +3224,12 @@ var Lib = (function (exports, lightweightCharts) {
         timeAxisViews() {
             return this._timeAxisViews;
         }
+        bounds() {
+            const logical = this._point.logical;
+            if (logical == null)
+                return null;
+            return { minLogical: logical, maxLogical: logical, minPrice: -Infinity, maxPrice: Infinity };
+        }
         updatePoints(...points) {
             for (const p of points) {
                 if (!p)
@@ -6076,16 +6277,18 @@ var Lib = (function (exports, lightweightCharts) {
             const x = bucket[0].x;
             // Determine if the aggregated bar represents an upward movement.
             const isUp = closePrice > openPrice;
-            // Explicitly map colors based on `isUp` status.
-            const color = isUp
-                ? (this._options?.upColor || 'rgba(0,255,0,0.333)')
-                : (this._options?.downColor || 'rgba(255,0,0,0.333)');
-            const borderColor = isUp
-                ? (this._options?.borderUpColor || setOpacity(color, 1))
-                : (this._options?.borderDownColor || setOpacity(color, 1));
-            const wickColor = isUp
-                ? (this._options?.wickUpColor || borderColor)
-                : (this._options?.wickDownColor || borderColor);
+            // Per-bar colors of the last bar take precedence, otherwise map colors based on `isUp` status,
+            // falling back to the series' own color, borderColor and wickColor.
+            const lastBar = bucket[bucket.length - 1];
+            const color = lastBar.color || (isUp
+                ? (this._options?.upColor || this._options?.color || 'rgba(0,255,0,0.333)')
+                : (this._options?.downColor || this._options?.color || 'rgba(255,0,0,0.333)'));
+            const borderColor = lastBar.borderColor || (isUp
+                ? (this._options?.borderUpColor || this._options?.borderColor || setOpacity(color, 1))
+                : (this._options?.borderDownColor || this._options?.borderColor || setOpacity(color, 1)));
+            const wickColor = lastBar.wickColor || (isUp
+                ? (this._options?.wickUpColor || this._options?.wickColor || borderColor)
+                : (this._options?.wickDownColor || this._options?.wickColor || borderColor));
             // Aggregate lineStyle similarly to other properties.
             const lineStyle = bucket.reduce((style, bar) => bar.lineStyle ?? bar.originalData?.lineStyle ?? style, this._options?.lineStyle ?? DEFAULT_LINE_STYLE);
             // Aggregate lineWidth similarly to other properties.
@@ -6175,6 +6378,9 @@ var Lib = (function (exports, lightweightCharts) {
                 !this._options) {
                 return;
             }
+            // Style fields may be dictionary-encoded, in which case they hold an index into the series palettes.
+            const palettes = this._options.palettes ?? {};
+            const style = (key, value) => typeof value === 'number' ? palettes[key]?.[value] ?? undefined : value;
             // Transform raw data into BarItem objects with initial styling.
             const bars = this._data.bars.map((bar, index) => ({
                 open: bar.originalData?.open ?? 0,
@@ -6182,7 +6388,7 @@ var Lib = (function (exports, lightweightCharts) {
                 low: bar.originalData?.low ?? 0,
                 close: bar.originalData?.close ?? 0,
                 x: bar.x,
-                shape: (bar.originalData?.shape ??
+                shape: (style('shape', bar.originalData?.shape) ??
                     this._options?.shape ??
                     'Rectangle'),
                 lineStyle: bar.originalData?.lineStyle ??
@@ -6193,9 +6399,9 @@ var Lib = (function (exports, lightweightCharts) {
                     1,
                 isUp: (bar.originalData?.close ?? 0) >=
                     (bar.originalData?.open ?? 0),
-                color: this._options?.color ?? 'rgba(0,0,0,0)',
-                borderColor: this._options?.borderColor ?? 'rgba(0,0,0,0)',
-                wickColor: this._options?.wickColor ?? 'rgba(0,0,0,0)',
+                color: style('color', bar.originalData?.color) ?? '',
+                borderColor: style('borderColor', bar.originalData?.borderColor) ?? '',
+                wickColor: style('wickColor', bar.originalData?.wickColor) ?? '',
                 startIndex: index,
                 endIndex: index,
             }));
@@ -6695,7 +6901,8 @@ var Lib = (function (exports, lightweightCharts) {
         chandelierSize: 1,
         barSpacing: 0.8,
         lineStyle: 0,
-        lineWidth: 2
+        lineWidth: 2,
+        palettes: {},
     };
     //upperUpColor: undefined,
     //upperDownColor: undefined,
@@ -6724,6 +6931,150 @@ var Lib = (function (exports, lightweightCharts) {
     }
     // ./types.ts
 
+    function isRegular(column) {
+        return !Array.isArray(column) && 'interval' in column;
+    }
+    function columnLength(column) {
+        if (Array.isArray(column))
+            return column.length;
+        return isRegular(column) ? column.length : column.codes.length;
+    }
+    function valueAt(column, index) {
+        if (Array.isArray(column))
+            return column[index];
+        if (!isRegular(column))
+            return column.palette[column.codes[index]];
+        // Find the last gap at or before the row.
+        let [row, time] = [0, column.start];
+        let low = 0, high = column.gaps.length - 1;
+        while (low <= high) {
+            const mid = (low + high) >> 1;
+            if (column.gaps[mid][0] <= index) {
+                [row, time] = column.gaps[mid];
+                low = mid + 1;
+            }
+            else
+                high = mid - 1;
+        }
+        return time + (index - row) * column.interval;
+    }
+    function decodeColumn(column) {
+        if (Array.isArray(column) || 'interval' in column)
+            return column;
+        // Codes are shipped as base64 encoded uint8 values.
+        const codes = Array.from(atob(column.codes), (char) => char.charCodeAt(0));
+        return { palette: column.palette, codes };
+    }
+    function expandColumn(column) {
+        if (Array.isArray(column))
+            return column;
+        if (isRegular(column))
+            return Array.from({ length: column.length }, (_, index) => valueAt(column, index));
+        return column.codes.map((code) => column.palette[code]);
+    }
+    function spliceColumn(column, from, values) {
+        if (isRegular(column) && (Array.isArray(values) || isRegular(values))) {
+            const gaps = column.gaps.filter(([row]) => row < from);
+            const spliced = { start: column.start, interval: column.interval, length: from + columnLength(values), gaps };
+            if (isRegular(values) && values.interval === column.interval) {
+                if (valueAt(spliced, from) !== values.start)
+                    gaps.push([from, values.start]);
+                gaps.push(...values.gaps.map(([row, time]) => [row + from, time]));
+            }
+            else {
+                // Rows which don't follow on from the previous one become gaps.
+                expandColumn(values).forEach((time, index) => {
+                    if (valueAt(spliced, from + index) !== time)
+                        gaps.push([from + index, time]);
+                });
+            }
+            return spliced;
+        }
+        if (Array.isArray(column) || Array.isArray(values) || isRegular(column) || isRegular(values)) {
+            return [...expandColumn(column).slice(0, from), ...expandColumn(values)];
+        }
+        // Re-index the new codes into the existing palette.
+        const palette = [...column.palette];
+        const remap = values.palette.map((value) => {
+            const index = palette.indexOf(value);
+            return index !== -1 ? index : palette.push(value) - 1;
+        });
+        return { palette, codes: [...column.codes.slice(0, from), ...values.codes.map((code) => remap[code])] };
+    }
+    function sameBinding(a, b) {
+        return a.series === b.series
+            && JSON.stringify(a.mapping) === JSON.stringify(b.mapping)
+            && JSON.stringify(a.colors) === JSON.stringify(b.colors);
+    }
+    /**
+     * A columnar frame shared by every series built from it.
+     * The columns are shipped once, and each bound series picks the columns it needs.
+     */
+    class Dataset {
+        columns = {};
+        bindings = [];
+        get length() {
+            const time = this.columns.time;
+            return time ? columnLength(time) : 0;
+        }
+        /**
+         * Builds the data items of a series from the dataset.
+         * Null values are omitted, so a row without a value becomes whitespace data.
+         * Encoded columns are expanded here, one row at a time.
+         */
+        rows(mapping, from = 0, colors) {
+            const entries = Object.entries(mapping)
+                .filter(([_, column]) => column in this.columns)
+                .map(([key, column]) => [key, this.columns[column]]);
+            const opens = colors && this.columns.open ? expandColumn(this.columns.open) : null;
+            const closes = colors && this.columns.close ? expandColumn(this.columns.close) : null;
+            const rows = [];
+            const length = this.length;
+            for (let i = from; i < length; i++) {
+                const row = {};
+                for (const [key, column] of entries) {
+                    const value = valueAt(column, i);
+                    if (value !== null && value !== undefined)
+                        row[key] = value;
+                }
+                if (colors && opens && closes) {
+                    row.color = closes[i] > opens[i] ? colors.upColor : colors.downColor;
+                }
+                rows.push(row);
+            }
+            return rows;
+        }
+        /**
+         * Replaces the dataset from the given row onwards and refreshes the bound series.
+         * Series which were already bound the same way only receive the changed rows.
+         * @param from - The index of the first changed row.
+         * @param columns - The rows from `from` onwards, by column.
+         * @param bindings - The series built from the dataset, the columns they use and their derived colors.
+         */
+        set(from, columns, bindings) {
+            const decoded = Object.entries(columns).map(([column, values]) => [column, decodeColumn(values)]);
+            if (!from) {
+                this.columns = Object.fromEntries(decoded);
+            }
+            else {
+                for (const [column, values] of decoded) {
+                    this.columns[column] = spliceColumn(this.columns[column], from, values);
+                }
+            }
+            const previous = this.bindings;
+            this.bindings = bindings.map(([series, mapping, colors]) => ({ series, mapping, colors }));
+            for (const binding of this.bindings) {
+                const { series, mapping, colors } = binding;
+                if (from && previous.some((bound) => sameBinding(bound, binding))) {
+                    Handler.mergeData(series, from, this.rows(mapping, from, colors));
+                }
+                else {
+                    series.setData(this.rows(mapping, 0, colors));
+                }
+            }
+        }
+    }
+
     //import { TradeSeriesOptions, tradeDefaultOptions, TradeSeries } from "../tx-series/renderer";
     globalParamInit();
     class Handler {
@@ -6738,6 +7089,9 @@ var Lib = (function (exports, lightweightCharts) {
         precision = 2;
         series;
         volumeSeries;
+        volumeUpColor = 'rgba(83,141,131,0.8)';
+        volumeDownColor = 'rgba(200,127,130,0.8)';
+        dataset = new Dataset();
         legend;
         _topBar;
         toolBox;
@@ -7165,6 +7519,39 @@ var Lib = (function (exports, lightweightCharts) {
                 point.value || point.close || 0,
             ]);
         }
+        /**
+         * Updates the candle and volume series from a single bar.
+         * The volume bar is colored from the candle, so only the bar itself is shipped.
+         */
+        updateBar(bar) {
+            const { volume, ...candle } = bar;
+            this.series.update(candle);
+            if (volume === undefined)
+                return;
+            this.volumeSeries.update({
+                time: bar.time,
+                value: volume,
+                color: bar.close > bar.open ? this.volumeUpColor : this.volumeDownColor,
+            });
+        }
+        /**
+         * Replaces the data of a series from the given index onwards.
+         * A tail which only rewrites the last bar or appends new ones is applied through `update`,
+         * otherwise the unchanged head is reused and the series is set once.
+         * @param series - The series to update.
+         * @param from - The index of the first changed item.
+         * @param tail - The items replacing everything from `from`.
+         */
+        static mergeData(series, from, tail) {
+            const data = series.data();
+            const replacesLast = from === data.length - 1 && tail.length > 0 && tail[0].time === data[from].time;
+            if (from === data.length || replacesLast) {
+                tail.forEach((item) => series.update(item));
+            }
+            else {
+                series.setData([...data.slice(0, from), ...tail]);
+            }
+        }
         static syncCharts(childChart, parentChart, crosshairOnly = false) {
             function crosshairHandler(chart, point) {
                 //point: BarData | LineData) {
@@ -7294,6 +7681,249 @@ var Lib = (function (exports, lightweightCharts) {
         }
     }
 
+    /**
+     * The markers of a series, kept sorted by time so ranges are found by binary search.
+     * Changes are applied as deltas, and the series is given its markers once per frame.
+     */
+    class MarkerStore {
+        series;
+        static _stores = new WeakMap();
+        markers = [];
+        _ids = new Map();
+        _frame = null;
+        constructor(series) {
+            this.series = series;
+        }
+        static of(series) {
+            let store = this._stores.get(series);
+            if (!store) {
+                store = new MarkerStore(series);
+                this._stores.set(series, store);
+            }
+            return store;
+        }
+        /**
+         * Returns the index of the first marker at or after the given time,
+         * or after it if `after` is set.
+         */
+        _search(time, after = false) {
+            let low = 0, high = this.markers.length;
+            while (low < high) {
+                const mid = (low + high) >> 1;
+                const value = this.markers[mid].time;
+                if (value < time || (after && value === time))
+                    low = mid + 1;
+                else
+                    high = mid;
+            }
+            return low;
+        }
+        _indexOf(marker) {
+            for (let i = this._search(marker.time); i < this.markers.length; i++) {
+                if (this.markers[i] === marker)
+                    return i;
+            }
+            return -1;
+        }
+        _insert(marker) {
+            this.markers.splice(this._search(marker.time, true), 0, marker);
+        }
+        _render() {
+            if (this._frame !== null)
+                return;
+            this._frame = window.requestAnimationFrame(() => {
+                this._frame = null;
+                this.series.setMarkers(this.markers.map(({ id, requestedTime, ...marker }) => marker));
+            });
+        }
+        add(markers) {
+            this.remove(markers.filter((marker) => this._ids.has(marker.id)).map((marker) => marker.id));
+            markers.forEach((marker) => this._ids.set(marker.id, marker));
+            // Large batches are cheaper to sort once than to insert one by one.
+            if (markers.length > 64) {
+                this.markers.push(...markers);
+                this.markers.sort((a, b) => a.time - b.time);
+            }
+            else {
+                markers.forEach((marker) => this._insert(marker));
+            }
+            this._render();
+        }
+        /**
+         * Adds markers given by column; null values are left out of the markers.
+         */
+        addColumns(columns) {
+            const entries = Object.entries(columns);
+            const markers = columns.id.map((_, i) => {
+                const marker = {};
+                for (const [key, values] of entries) {
+                    if (values[i] !== null && values[i] !== undefined)
+                        marker[key] = values[i];
+                }
+                return marker;
+            });
+            this.add(markers);
+        }
+        update(id, fields) {
+            const marker = this._ids.get(id);
+            if (!marker)
+                return;
+            if (fields.time !== undefined && fields.time !== marker.time) {
+                this.markers.splice(this._indexOf(marker), 1);
+                delete marker.requestedTime;
+                Object.assign(marker, fields);
+                this._insert(marker);
+            }
+            else {
+                Object.assign(marker, fields);
+            }
+            this._render();
+        }
+        remove(ids) {
+            for (const id of ids) {
+                const marker = this._ids.get(id);
+                if (!marker)
+                    continue;
+                this.markers.splice(this._indexOf(marker), 1);
+                this._ids.delete(id);
+            }
+            this._render();
+        }
+        clear() {
+            this.markers = [];
+            this._ids.clear();
+            this._render();
+        }
+        /**
+         * Moves each marker onto the last bar at or before the time it was placed at,
+         * so markers stay on the chart once its data has been replaced.
+         * Only the first `prefix` bars are known to be unchanged, so the markers anchored
+         * before the last of them stay where they are; the rest cost a binary search each.
+         */
+        reanchor(prefix = 0) {
+            const data = this.series.data();
+            if (!data.length)
+                return;
+            const start = prefix > 0 ? this._search(data[Math.min(prefix, data.length) - 1].time) : 0;
+            for (let i = start; i < this.markers.length; i++) {
+                const marker = this.markers[i];
+                const time = (marker.requestedTime ?? marker.time);
+                let low = 0, high = data.length;
+                while (low < high) {
+                    const mid = (low + high) >> 1;
+                    if (data[mid].time <= time)
+                        low = mid + 1;
+                    else
+                        high = mid;
+                }
+                const anchor = data[Math.max(low - 1, 0)].time;
+                if (anchor !== time)
+                    marker.requestedTime = time;
+                else
+                    delete marker.requestedTime;
+                marker.time = anchor;
+            }
+            // Anchoring never reorders the markers, so they stay sorted.
+            this._render();
+        }
+    }
+
+    /**
+     * The objects created from Python, by id.
+     * Python releases an object by deleting its entry.
+     */
+    const handles = {};
+
+    /**
+     * A columnar copy of the rows bound to a table, along with the order in
+     * which they are shown once sorted and filtered.
+     */
+    class TableStore {
+        keys = [];
+        columns = {};
+        order = [];
+        _positions = new Map();
+        _sort = null;
+        _filter = null;
+        get sortColumn() {
+            return this._sort;
+        }
+        clear() {
+            this.set({ keys: [], columns: {} });
+        }
+        set(data) {
+            this.keys = data.keys;
+            this.columns = data.columns;
+            this._index();
+            this.refresh();
+        }
+        patch(patch) {
+            if (patch.delete.length) {
+                const deleted = new Set(patch.delete.map((key) => this._positions.get(key)));
+                const kept = (_, i) => !deleted.has(i);
+                this.keys = this.keys.filter(kept);
+                for (const column in this.columns)
+                    this.columns[column] = this.columns[column].filter(kept);
+            }
+            this.keys.push(...patch.insert.keys);
+            for (const column in this.columns)
+                this.columns[column].push(...(patch.insert.columns[column] || []));
+            this._index();
+            if (patch.order) {
+                const positions = patch.order.map((key) => this._positions.get(key));
+                this.keys = patch.order;
+                for (const column in this.columns) {
+                    const cells = this.columns[column];
+                    this.columns[column] = positions.map((i) => cells[i]);
+                }
+                this._index();
+            }
+            for (const column in patch.update) {
+                const [keys, values] = patch.update[column];
+                const cells = this.columns[column];
+                keys.forEach((key, i) => cells[this._positions.get(key)] = values[i]);
+            }
+            this.refresh();
+        }
+        sortBy(column, ascending = true) {
+            this._sort = column === null ? null : { column, ascending };
+            this.refresh();
+        }
+        filterBy(column, query = '') {
+            this._filter = column === null || !query ? null : { column, query: query.toLowerCase() };
+            this.refresh();
+        }
+        _index() {
+            this._positions = new Map(this.keys.map((key, i) => [key, i]));
+        }
+        /**
+         * Recomputes the order of the rows after their values have changed.
+         */
+        refresh() {
+            let order = this.keys.map((_, i) => i);
+            if (this._filter && this.columns[this._filter.column]) {
+                const { column, query } = this._filter;
+                const cells = this.columns[column];
+                order = order.filter((i) => cells[i].toLowerCase().includes(query));
+            }
+            if (this._sort && this.columns[this._sort.column]) {
+                const cells = this.columns[this._sort.column];
+                const numbers = cells.map((cell) => parseFloat(cell));
+                const sign = this._sort.ascending ? 1 : -1;
+                order.sort((a, b) => {
+                    const x = numbers[a], y = numbers[b];
+                    const diff = isNaN(x) || isNaN(y) ? cells[a].localeCompare(cells[b]) : x - y;
+                    return sign * diff || a - b;
+                });
+            }
+            this.order = order;
+        }
+    }
+
+    // Bound rows all have this height, so the rows in view are found from the scroll position.
+    const ROW_HEIGHT = 22;
+    // The rows drawn beyond each edge of the view, so that scrolling doesn't show gaps.
+    const OVERSCAN = 10;
     class Table {
         _div;
         callbackName;
@@ -7304,6 +7934,17 @@ var Lib = (function (exports, lightweightCharts) {
         headings;
         widths;
         alignments;
+        _scroller;
+        _headingCells = [];
+        // The rows bound with bindData, of which only those in view have elements.
+        _store = null;
+        _body = null;
+        _spacers = [];
+        _pool = [];
+        _returnClickedCell = false;
+        _renderPending = false;
+        // The text around the value of each formatted column.
+        formats = {};
         footer;
         header;
         constructor(width, height, headings, widths, alignments, position, draggable = false, tableBackgroundColor, borderColor, borderWidth, textColors, backgroundColors) {
@@ -7352,6 +7993,7 @@ var Lib = (function (exports, lightweightCharts) {
                 th.style.backgroundColor = backgroundColors.length > 0 ? backgroundColors[i] : tableBackgroundColor;
                 th.style.color = textColors[i];
                 row.appendChild(th);
+                this._headingCells.push(th);
             }
             let overflowWrapper = document.createElement('div');
             overflowWrapper.style.overflowY = 'auto';
@@ -7359,6 +8001,7 @@ var Lib = (function (exports, lightweightCharts) {
             overflowWrapper.style.backgroundColor = tableBackgroundColor;
             overflowWrapper.appendChild(this.table);
             this._div.appendChild(overflowWrapper);
+            this._scroller = overflowWrapper;
             window.containerDiv.appendChild(this._div);
             if (!draggable)
                 return;
@@ -7413,6 +8056,10 @@ var Lib = (function (exports, lightweightCharts) {
             for (let i = 0; i < numRows; i++)
                 this.table.deleteRow(-1);
             this.rows = {};
+            if (this._store) {
+                this._store.clear();
+                this._requestRender();
+            }
         }
         _getCell(rowId, column) {
             return this.rows[rowId].cells[this.headings.indexOf(column)];
@@ -7424,6 +8071,118 @@ var Lib = (function (exports, lightweightCharts) {
             const style = this._getCell(rowId, column).style;
             style[styleAttribute] = value;
         }
+        /**
+         * Applies the values and styles of every cell changed since the last update.
+         */
+        updateCells(values, styles) {
+            for (const rowId in values) {
+                for (const column in values[rowId]) {
+                    const format = this.formats[column];
+                    const value = values[rowId][column];
+                    this._getCell(+rowId, column).textContent = format ? format.join(value) : value;
+                }
+            }
+            for (const rowId in styles) {
+                for (const column in styles[rowId]) {
+                    Object.assign(this._getCell(+rowId, column).style, styles[rowId][column]);
+                }
+            }
+        }
+        /**
+         * Shows the given rows, drawing only those in view. Headings can then be clicked to sort the rows.
+         */
+        bindData(data, returnClickedCell = false) {
+            if (!this._store) {
+                this._store = new TableStore();
+                this._body = this.table.createTBody();
+                this._spacers = [0, 1].map(() => {
+                    const cell = this._body.insertRow().insertCell();
+                    cell.colSpan = this.headings.length;
+                    cell.style.padding = '0';
+                    return cell;
+                });
+                this._scroller.addEventListener('scroll', () => this._requestRender());
+                this._headingCells.forEach((th, i) => {
+                    th.style.cursor = 'pointer';
+                    th.addEventListener('click', () => {
+                        const sort = this._store.sortColumn;
+                        const ascending = sort?.column !== this.headings[i] || !sort.ascending;
+                        this.sortData(this.headings[i], ascending);
+                    });
+                });
+            }
+            this._returnClickedCell = returnClickedCell;
+            this._store.set(data);
+            this._requestRender();
+        }
+        patchData(patch) {
+            this._store?.patch(patch);
+            this._requestRender();
+        }
+        sortData(column, ascending = true) {
+            this._store?.sortBy(column, ascending);
+            this._requestRender();
+        }
+        filterData(column, query = '') {
+            this._store?.filterBy(column, query);
+            this._requestRender();
+        }
+        _requestRender() {
+            if (this._renderPending)
+                return;
+            this._renderPending = true;
+            requestAnimationFrame(() => {
+                this._renderPending = false;
+                this._render();
+            });
+        }
+        _poolRow() {
+            const row = document.createElement('tr');
+            row.style.cursor = 'default';
+            row.style.height = ROW_HEIGHT + 'px';
+            for (let i = 0; i < this.headings.length; i++) {
+                const cell = row.insertCell();
+                cell.style.width = this.widths[i];
+                cell.style.textAlign = this.alignments[i];
+                cell.style.border = this.borderWidth + 'px solid ' + this.borderColor;
+                cell.style.padding = '0';
+                cell.style.whiteSpace = 'nowrap';
+                cell.style.overflow = 'hidden';
+            }
+            row.addEventListener('mouseover', () => row.style.backgroundColor = 'rgba(60, 60, 60, 0.6)');
+            row.addEventListener('mouseout', () => row.style.backgroundColor = 'transparent');
+            row.addEventListener('click', (event) => {
+                const cell = event.target.closest('td');
+                const heading = this._returnClickedCell && cell ? `;;;${this.headings[cell.cellIndex]}` : '';
+                window.callbackFunction(`${this.callbackName}_~_${row.dataset.key}${heading}`);
+            });
+            return row;
+        }
+        _render() {
+            const store = this._store;
+            const total = store.order.length;
+            const first = Math.max(0, Math.floor(this._scroller.scrollTop / ROW_HEIGHT) - OVERSCAN);
+            const last = Math.min(total, first + Math.ceil(this._scroller.clientHeight / ROW_HEIGHT) + 2 * OVERSCAN);
+            while (this._pool.length < last - first) {
+                const row = this._poolRow();
+                this._body.insertBefore(row, this._spacers[1].parentElement);
+                this._pool.push(row);
+            }
+            this._spacers[0].style.height = first * ROW_HEIGHT + 'px';
+            this._spacers[1].style.height = (total - last) * ROW_HEIGHT + 'px';
+            this._pool.forEach((row, i) => {
+                const index = store.order[first + i];
+                row.style.display = index === undefined ? 'none' : '';
+                if (index === undefined)
+                    return;
+                row.dataset.key = store.keys[index];
+                this.headings.forEach((heading, j) => {
+                    const value = store.columns[heading]?.[index] ?? '';
+                    const format = this.formats[heading];
+                    row.cells[j].textContent = format && value ? format.join(value) : value;
+                });
+            });
+        }
         makeSection(id, type, numBoxes, func = false) {
             let section = document.createElement('div');
             section.style.display = 'flex';
@@ -7809,15 +8568,556 @@ var Lib = (function (exports, lightweightCharts) {
         }
     }
 
+    /**
+     * Returns the logical index of a time among the sorted times of a series' bars.
+     * Times between two bars are interpolated, and times past either end are
+     * extrapolated at the interval of the nearest two bars.
+     */
+    function logicalIndex(times, time) {
+        const length = times.length;
+        if (!length)
+            return null;
+        if (length === 1)
+            return 0;
+        let low = 0, high = length;
+        while (low < high) {
+            const mid = (low + high) >> 1;
+            if (times[mid] < time)
+                low = mid + 1;
+            else
+                high = mid;
+        }
+        if (times[low] === time)
+            return low;
+        const right = Math.min(Math.max(low, 1), length - 1);
+        return right - 1 + (time - times[right - 1]) / (times[right] - times[right - 1]);
+    }
+
+    /**
+     * The times of a series' bars, kept up to date as the series changes,
+     * so the logical index of any time is found by binary search.
+     */
+    class TimeIndex {
+        _series;
+        static _indexes = new WeakMap();
+        times;
+        _listeners = new Set();
+        constructor(_series) {
+            this._series = _series;
+            this.times = _series.data().map((item) => item.time);
+        }
+        /**
+         * Returns the index shared by everything drawn on the series.
+         */
+        static of(series) {
+            let index = this._indexes.get(series);
+            if (!index) {
+                const created = new TimeIndex(series);
+                series.subscribeDataChanged((scope) => created._changed(scope));
+                this._indexes.set(series, index = created);
+            }
+            return index;
+        }
+        /**
+         * Calls the listener with the time after which logical indexes have moved, whenever the data of the series
+         * moves any, so drawings sharing the index are placed again without each keeping a copy of the times.
+         */
+        subscribe(listener) {
+            this._listeners.add(listener);
+        }
+        unsubscribe(listener) {
+            this._listeners.delete(listener);
+        }
+        _changed(scope) {
+            const after = this.sync(scope);
+            if (after === null)
+                return;
+            this._listeners.forEach((listener) => listener(after));
+        }
+        /**
+         * Brings the index up to date after the data of the series changed.
+         * @returns The time after which logical indexes have moved, or null if none have.
+         */
+        sync(scope) {
+            if (scope === 'update') {
+                // Updates only ever touch the last bar, so only a new bar moves the times past it.
+                const bar = this._series.dataByIndex(this.times.length);
+                if (!bar)
+                    return null;
+                const last = this.times[this.times.length - 1] ?? -Infinity;
+                this.times.push(bar.time);
+                // With a single bar there was no interval to place the other times with.
+                return this.times.length > 2 ? last : -Infinity;
+            }
+            this.times = this._series.data().map((item) => item.time);
+            return -Infinity;
+        }
+        logical(time) {
+            return logicalIndex(this.times, time);
+        }
+        /**
+         * Builds drawing points from times and prices, resolving every time in one pass.
+         */
+        points(times, prices) {
+            return prices.map((price, i) => {
+                const time = times[i] ?? null;
+                return {
+                    time: time,
+                    logical: (time === null ? null : this.logical(time)),
+                    price,
+                };
+            });
+        }
+        /**
+         * Moves many drawings at once, given the times and prices of each drawing's points.
+         */
+        updateDrawings(drawings, times, prices) {
+            drawings.forEach((drawing, i) => drawing.updatePoints(...this.points(times[i], prices[i])));
+        }
+    }
+
+    /**
+     * A primitive whose drawings are placed by time and kept as logical indexes into
+     * the bars of its series, so they can sit between bars and past either end.
+     */
+    class LogicalLayer extends PluginBase {
+        _index = null;
+        attached(param) {
+            super.attached(param);
+            this._index = TimeIndex.of(this.series);
+            this._index.subscribe(this._dataChanged);
+            this.resolve(-Infinity);
+        }
+        detached() {
+            this._index?.unsubscribe(this._dataChanged);
+            this._index = null;
+            super.detached();
+        }
+        logical(time) {
+            return this._index ? this._index.logical(time) : null;
+        }
+        _dataChanged = (after) => {
+            this.resolve(after);
+            this.requestUpdate();
+        };
+    }
+
+    class DrawingLayerPaneRenderer {
+        _data;
+        constructor(data) {
+            this._data = data;
+        }
+        draw(target) {
+            target.useBitmapCoordinateSpace(scope => {
+                const ctx = scope.context;
+                ctx.scale(scope.horizontalPixelRatio, scope.verticalPixelRatio);
+                for (const [color, rects] of this._data.fills) {
+                    ctx.fillStyle = color;
+                    ctx.beginPath();
+                    for (let i = 0; i < rects.length; i += 4) {
+                        ctx.rect(rects[i], rects[i + 1], rects[i + 2], rects[i + 3]);
+                    }
+                    ctx.fill();
+                }
+                for (const { color, width, style, lines } of this._data.strokes.values()) {
+                    ctx.lineWidth = width;
+                    ctx.strokeStyle = color;
+                    setLineStyle(ctx, style);
+                    ctx.beginPath();
+                    for (let i = 0; i < lines.length; i += 4) {
+                        ctx.moveTo(lines[i], lines[i + 1]);
+                        ctx.lineTo(lines[i + 2], lines[i + 3]);
+                    }
+                    ctx.stroke();
+                }
+                ctx.setLineDash([]);
+                for (const { color, fillColor, width, points } of this._data.points.values()) {
+                    ctx.lineWidth = width;
+                    ctx.strokeStyle = color;
+                    ctx.fillStyle = fillColor;
+                    ctx.beginPath();
+                    for (let i = 0; i < points.length; i += 3) {
+                        ctx.moveTo(points[i] + points[i + 2], points[i + 1]);
+                        ctx.arc(points[i], points[i + 1], points[i + 2], 0, 2 * Math.PI);
+                    }
+                    ctx.fill();
+                    if (width)
+                        ctx.stroke();
+                }
+            });
+        }
+    }
+
+    class DrawingLayerPaneView {
+        _source;
+        _data = { strokes: new Map(), fills: new Map(), points: new Map() };
+        constructor(source) {
+            this._source = source;
+        }
+        _stroke(color, width, style) {
+            const key = `${color}|${width}|${style}`;
+            let stroke = this._data.strokes.get(key);
+            if (!stroke) {
+                stroke = { color, width, style, lines: [] };
+                this._data.strokes.set(key, stroke);
+            }
+            return stroke.lines;
+        }
+        _fill(color) {
+            let rects = this._data.fills.get(color);
+            if (!rects) {
+                rects = [];
+                this._data.fills.set(color, rects);
+            }
+            return rects;
+        }
+        _points(color, fillColor, width) {
+            const key = `${color}|${fillColor}|${width}`;
+            let points = this._data.points.get(key);
+            if (!points) {
+                points = { color, fillColor, width, points: [] };
+                this._data.points.set(key, points);
+            }
+            return points.points;
+        }
+        update() {
+            this._data = { strokes: new Map(), fills: new Map(), points: new Map() };
+            const chart = this._source.chart;
+            const series = this._source.series;
+            const timeScale = chart.timeScale();
+            const range = timeScale.getVisibleLogicalRange();
+            if (!range)
+                return;
+            const width = timeScale.width();
+            const height = chart.paneSize().height;
+            // The visible prices, so drawings off the pane are skipped before their coordinates are built.
+            const [topPrice, bottomPrice] = [series.coordinateToPrice(0), series.coordinateToPrice(height)];
+            const [low, high] = topPrice === null || bottomPrice === null
+                ? [-Infinity, Infinity]
+                : [Math.min(topPrice, bottomPrice), Math.max(topPrice, bottomPrice)];
+            const offScreen = (price) => price < low || price > high;
+            for (const item of this._source.items.values()) {
+                if (item.kind === 'horizontal') {
+                    if (offScreen(item.price))
+                        continue;
+                    const y = series.priceToCoordinate(item.price);
+                    if (y === null)
+                        continue;
+                    this._stroke(item.color, item.width, item.style).push(0, y, width, y);
+                    continue;
+                }
+                if (item.logical === null || item.logical === undefined)
+                    continue;
+                if (item.kind === 'ray') {
+                    if (item.logical > range.to || offScreen(item.price))
+                        continue;
+                    const y = series.priceToCoordinate(item.price);
+                    if (y === null)
+                        continue;
+                    const x = timeScale.logicalToCoordinate(item.logical) ?? 0;
+                    this._stroke(item.color, item.width, item.style).push(Math.max(x, 0), y, width, y);
+                    continue;
+                }
+                if (item.kind === 'point') {
+                    const radius = item.radius ?? 0;
+                    if (item.logical < range.from - 1 || item.logical > range.to + 1 || offScreen(item.price))
+                        continue;
+                    const y = series.priceToCoordinate(item.price);
+                    const x = timeScale.logicalToCoordinate(item.logical);
+                    if (x === null || y === null)
+                        continue;
+                    this._points(item.color, item.fillColor ?? item.color, item.width).push(x, y, radius);
+                    continue;
+                }
+                // Boxes and trend lines span two points.
+                if (item.endLogical === null || item.endLogical === undefined || item.endPrice === undefined)
+                    continue;
+                if (Math.min(item.logical, item.endLogical) > range.to)
+                    continue;
+                if (Math.max(item.logical, item.endLogical) < range.from)
+                    continue;
+                if (Math.max(item.price, item.endPrice) < low || Math.min(item.price, item.endPrice) > high)
+                    continue;
+                const y = series.priceToCoordinate(item.price);
+                const endY = series.priceToCoordinate(item.endPrice);
+                if (y === null || endY === null)
+                    continue;
+                const x = timeScale.logicalToCoordinate(item.logical);
+                const endX = timeScale.logicalToCoordinate(item.endLogical);
+                if (x === null || endX === null)
+                    continue;
+                if (item.kind === 'trend') {
+                    this._stroke(item.color, item.width, item.style).push(x, y, endX, endY);
+                    continue;
+                }
+                const [left, top] = [Math.min(x, endX), Math.min(y, endY)];
+                const [right, bottom] = [Math.max(x, endX), Math.max(y, endY)];
+                if (item.fillColor)
+                    this._fill(item.fillColor).push(left, top, right - left, bottom - top);
+                if (item.width) {
+                    this._stroke(item.color, item.width, item.style).push(left, top, right, top, right, top, right, bottom, right, bottom, left, bottom, left, bottom, left, top);
+                }
+            }
+        }
+        renderer() {
+            return new DrawingLayerPaneRenderer(this._data);
+        }
+    }
+
+    // The same defaults as the DrawingLayer methods in drawings.py, for drawings added without them.
+    const defaultLayerItem = {
+        color: '#1E80F0',
+        fillColor: 'rgba(255, 255, 255, 0.2)',
+        width: 2,
+        style: lightweightCharts.LineStyle.Solid,
+        radius: 5,
+    };
+    /**
+     * Draws any number of lines, rays, boxes and points with a single primitive,
+     * so that thousands of drawings cost one pane view and one renderer pass.
+     * Drawings are added, updated and removed in bulk, by column.
+     */
+    class DrawingLayer extends LogicalLayer {
+        items = new Map();
+        _paneViews;
+        constructor() {
+            super();
+            this._paneViews = [new DrawingLayerPaneView(this)];
+        }
+        updateAllViews() {
+            this._paneViews.forEach((view) => view.update());
+        }
+        paneViews() {
+            return this._paneViews;
+        }
+        _resolve(item) {
+            if (item.time !== undefined)
+                item.logical = this.logical(item.time);
+            if (item.endTime !== undefined)
+                item.endLogical = this.logical(item.endTime);
+        }
+        resolve(after) {
+            this.items.forEach((item) => {
+                if ((item.time ?? -Infinity) > after || (item.endTime ?? -Infinity) > after)
+                    this._resolve(item);
+            });
+        }
+        /**
+         * Adds drawings of one kind. Each column is either an array with a value
+         * per drawing, or a single value shared by all of them.
+         */
+        add(kind, columns) {
+            const entries = Object.entries(columns).filter(([key]) => key !== 'id');
+            columns.id.forEach((id, i) => {
+                const item = { ...defaultLayerItem, id, kind };
+                for (const [key, values] of entries) {
+                    const value = Array.isArray(values) ? values[i] : values;
+                    if (value !== null && value !== undefined)
+                        item[key] = value;
+                }
+                this._resolve(item);
+                this.items.set(id, item);
+            });
+            this.requestUpdate();
+        }
+        /**
+         * Updates the given drawings, with columns in the same form as `add`.
+         */
+        update(ids, columns) {
+            const entries = Object.entries(columns);
+            ids.forEach((id, i) => {
+                const item = this.items.get(id);
+                if (!item)
+                    return;
+                for (const [key, values] of entries) {
+                    item[key] = Array.isArray(values) ? values[i] : values;
+                }
+                this._resolve(item);
+            });
+            this.requestUpdate();
+        }
+        remove(ids) {
+            ids.forEach((id) => this.items.delete(id));
+            this.requestUpdate();
+        }
+        clear() {
+            this.items.clear();
+            this.requestUpdate();
+        }
+    }
+
+    class SpanLayerPaneRenderer {
+        _fills;
+        constructor(fills) {
+            this._fills = fills;
+        }
+        draw() { }
+        drawBackground(target) {
+            target.useBitmapCoordinateSpace(scope => {
+                const ctx = scope.context;
+                ctx.scale(scope.horizontalPixelRatio, scope.verticalPixelRatio);
+                const height = scope.mediaSize.height;
+                for (const [color, rects] of this._fills) {
+                    ctx.fillStyle = color;
+                    ctx.beginPath();
+                    for (let i = 0; i < rects.length; i += 2) {
+                        ctx.rect(rects[i], 0, rects[i + 1], height);
+                    }
+                    ctx.fill();
+                }
+            });
+        }
+    }
+
+    class SpanLayerPaneView {
+        _source;
+        // color -> x, width for each visible span
+        _fills = new Map();
+        constructor(source) {
+            this._source = source;
+        }
+        update() {
+            this._fills = new Map();
+            const timeScale = this._source.chart.timeScale();
+            const range = timeScale.getVisibleLogicalRange();
+            if (!range)
+                return;
+            const origin = timeScale.logicalToCoordinate(0) ?? 0;
+            const halfSpacing = ((timeScale.logicalToCoordinate(1) ?? origin) - origin) / 2;
+            // Each span covers its first and last bars in full.
+            for (const span of this._source.visible(range.from - 1, range.to + 1)) {
+                const left = timeScale.logicalToCoordinate(span.logical);
+                const right = timeScale.logicalToCoordinate(span.endLogical);
+                if (left === null || right === null)
+                    continue;
+                let rects = this._fills.get(span.color);
+                if (!rects) {
+                    rects = [];
+                    this._fills.set(span.color, rects);
+                }
+                rects.push(left - halfSpacing, right - left + 2 * halfSpacing);
+            }
+        }
+        renderer() {
+            return new SpanLayerPaneRenderer(this._fills);
+        }
+    }
+
+    /**
+     * Shades any number of time spans across the full height of the pane.
+     * Spans are kept sorted by their start, so those within the visible range are found by binary search.
+     */
+    class SpanLayer extends LogicalLayer {
+        spans = [];
+        // The running maximum of the spans' end indexes, to find the first span which reaches a given index.
+        _reach = [];
+        _paneViews;
+        constructor() {
+            super();
+            this._paneViews = [new SpanLayerPaneView(this)];
+        }
+        updateAllViews() {
+            this._paneViews.forEach((view) => view.update());
+        }
+        paneViews() {
+            return this._paneViews;
+        }
+        _resolve(span) {
+            span.logical = this._snap(span, this.logical(span.start));
+            span.endLogical = this._snap(span, this.logical(span.end));
+        }
+        _snap(span, logical) {
+            return span.round && logical !== null ? Math.round(logical) : logical;
+        }
+        _updateReach() {
+            let reach = -Infinity;
+            this._reach = this.spans.map((span) => (reach = Math.max(reach, span.endLogical ?? -Infinity)));
+        }
+        resolve(after) {
+            this.spans.forEach((span) => {
+                if (span.end > after)
+                    this._resolve(span);
+            });
+            this._updateReach();
+        }
+        /**
+         * Returns the spans which overlap the given logical range.
+         */
+        visible(from, to) {
+            let low = 0, high = this.spans.length;
+            while (low < high) {
+                const mid = (low + high) >> 1;
+                if ((this.spans[mid].logical ?? Infinity) <= to)
+                    low = mid + 1;
+                else
+                    high = mid;
+            }
+            const end = low;
+            low = 0;
+            while (low < high) {
+                const mid = (low + high) >> 1;
+                if (this._reach[mid] < from)
+                    low = mid + 1;
+                else
+                    high = mid;
+            }
+            const visible = [];
+            for (let i = low; i < end; i++) {
+                if ((this.spans[i].endLogical ?? -Infinity) >= from)
+                    visible.push(this.spans[i]);
+            }
+            return visible;
+        }
+        /**
+         * Adds spans by column. The color is either an array with a color per span or a single color.
+         * Rounded spans start and end on the bars nearest to their times.
+         */
+        add(columns) {
+            columns.id.forEach((id, i) => {
+                const span = {
+                    id,
+                    start: columns.start[i],
+                    end: columns.end[i],
+                    color: Array.isArray(columns.color) ? columns.color[i] : columns.color,
+                    round: !!columns.round,
+                    logical: null,
+                    endLogical: null,
+                };
+                this._resolve(span);
+                this.spans.push(span);
+            });
+            this.spans.sort((a, b) => a.start - b.start);
+            this._updateReach();
+            this.requestUpdate();
+        }
+        remove(ids) {
+            const removed = new Set(ids);
+            this.spans = this.spans.filter((span) => !removed.has(span.id));
+            this._updateReach();
+            this.requestUpdate();
+        }
+        clear() {
+            this.spans = [];
+            this._reach = [];
+            this.requestUpdate();
+        }
+    }
+
     exports.Box = Box;
+    exports.Dataset = Dataset;
+    exports.DrawingIndex = DrawingIndex;
+    exports.DrawingLayer = DrawingLayer;
     exports.FillArea = FillArea;
     exports.Handler = Handler;
     exports.HorizontalLine = HorizontalLine;
     exports.Legend = Legend;
+    exports.MarkerStore = MarkerStore;
     exports.PointMarker = PointMarker;
     exports.RayLine = RayLine;
+    exports.SpanLayer = SpanLayer;
     exports.SynchronizedTooltip = SynchronizedTooltip;
     exports.Table = Table;
+    exports.TimeIndex = TimeIndex;
     exports.ToolBox = ToolBox;
     exports.TooltipPrimitive = TooltipPrimitive;
     exports.TopBar = TopBar;
@@ -7825,8 +9125,10 @@ var Lib = (function (exports, lightweightCharts) {
     exports.VerticalLine = VerticalLine;
     exports.closedEye = closedEye;
     exports.defaultFillAreaOptions = defaultFillAreaOptions;
+    exports.defaultLayerItem = defaultLayerItem;
     exports.defaultPointMarkerOptions = defaultPointMarkerOptions;
     exports.globalParamInit = globalParamInit;
+    exports.handles = handles;
     exports.ohlcSeries = ohlcSeries;
     exports.ohlcdefaultOptions = ohlcdefaultOptions;
     exports.openEye = openEye;
@@ -1,19 +1,37 @@
 import asyncio
+import http.client
 import logging
 import datetime as dt
+import queue
+import random
 import re
 import json
-import urllib.request
-from typing import Literal, Union, List
+import os
+import struct
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Literal, Union, List, Optional
+import numpy as np
 import pandas as pd
 
+from .abstract import PreparedData
 from .chart import Chart
+from .providers import DataProvider
+from .util import PreparedCache, Ticks, resample_bars
 
 try:
     import websockets
 except ImportError:
     websockets = None
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 SEC_TYPE = Literal['stocks', 'options', 'indices', 'forex', 'crypto']
 
 ch = logging.StreamHandler()
@@ -29,6 +47,19 @@ _set_on_load = []
 
 _lasts = {}
 _ws = {'stocks': None, 'options': None, 'indices': None, 'crypto': None, 'forex': None}
+_connections = {}
+SOCKET_URL = 'wss://socket.polygon.io'
+# The seconds waited before reconnecting a dropped websocket, doubling up to the maximum with each failed attempt.
+RECONNECT_BACKOFF = 0.5
+RECONNECT_MAX = 30
+
+_LOG_MAGIC = b'LWCTICK1'
+# The time a message was received in nanoseconds, the index of its security type and its length.
+_LOG_RECORD = struct.Struct('<qBI')
+_SEC_TYPES = ('stocks', 'options', 'indices', 'forex', 'crypto')
+_recorder: Optional['TickRecorder'] = None
+# The log replayed in place of the websockets, and the speed it is replayed at.
+_replay = None
 _subscription_type = {
     'stocks': ('Q', 'A'),
     'options': ('Q', 'A'),
@@ -36,6 +67,7 @@ _subscription_type = {
     'forex': ('C', 'CA'),
     'crypto': ('XQ', 'XA'),
 }
+_ticker_keys = {'stocks': 'sym', 'options': 'sym', 'indices': 'T', 'forex': 'p', 'crypto': 'pair'}
 
 
 def _convert_timeframe(timeframe):
@@ -64,47 +96,493 @@ def _get_sec_type(ticker):
         return 'stocks'
 
 
-def _polygon_request(query_url):
-    query_url = 'https://api.polygon.io'+query_url
-    query_url += f'&apiKey={api_key}'
+class _TokenBucket:
+    """
+    Allows `rate` requests per second on average, and bursts of up to `burst` requests.
+    """
+    def __init__(self, rate: Optional[float], burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class _Client:
+    """
+    Makes requests to Polygon.io over a pool of kept-alive connections, and
+    retries with exponential backoff when rate limited or the server fails.
+    """
+    def __init__(
+            self, base_url: str = 'https://api.polygon.io', concurrency: int = 4,
+            rate: Optional[float] = None, burst: int = 1, retries: int = 5, backoff: float = 0.5,
+    ):
+        url = urllib.parse.urlsplit(base_url)
+        self.base_url = base_url
+        self._host = url.netloc
+        self._connection_type = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self._bucket = _TokenBucket(rate, burst)
+        self._retries = retries
+        self._backoff = backoff
+        self._connections = queue.LifoQueue()
+        self.concurrency = concurrency
+        self.executor = ThreadPoolExecutor(concurrency, thread_name_prefix='polygon')
+
+    def _request(self, path: str):
+        try:
+            connection = self._connections.get_nowait()
+        except queue.Empty:
+            connection = self._connection_type(self._host, timeout=30)
+        try:
+            connection.request('GET', path, headers={'User-Agent': 'lightweight_charts/1.0', 'Connection': 'keep-alive'})
+            response = connection.getresponse()
+            body = response.read()
+        except (http.client.HTTPException, OSError):
+            connection.close()
+            raise
+        self._connections.put(connection)
+        return response.status, body
+
+    def get(self, url: str) -> Optional[dict]:
+        """
+        Requests a path or a full URL of the API, returning the decoded response.
+        """
+        url = urllib.parse.urlsplit(url)
+        query = f'{url.query}&apiKey={api_key}' if url.query else f'apiKey={api_key}'
+        path = f'{url.path}?{query}'
+        for attempt in range(self._retries + 1):
+            self._bucket.acquire()
+            try:
+                status, body = self._request(path)
+            except (http.client.HTTPException, OSError) as e:
+                status, body = None, str(e).encode()
+            if status == 200:
+                return json.loads(body)
+            if status is not None and status != 429 and status < 500:
+                break
+            if attempt < self._retries:
+                time.sleep(self._backoff * 2 ** attempt * (1 + random.random()))
+        try:
+            error = json.loads(body).get('error')
+        except ValueError:
+            error = body.decode(errors='replace')
+        _log.error(f'({status}) Request failed: {error}')
+        return None
+
+    def get_all(self, url: str) -> Optional[list]:
+        """
+        Requests every page of results, following the `next_url` of each.
+        """
+        results = []
+        while url:
+            data = self.get(url)
+            if data is None:
+                return None
+            results += data.get('results', [])
+            url = data.get('next_url')
+        return results
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
 
-    request = urllib.request.Request(query_url, headers={'User-Agent': 'lightweight_charts/1.0'})
-    with urllib.request.urlopen(request) as response:
-        if response.status != 200:
-            error = response.json()
-            _log.error(f'({response.status}) Request failed: {error["error"]}')
+_client = _Client()
+
+# Bars of these timespans are requested in slices of this many days at once.
+_SLICE_DAYS = {'minute': 30, 'hour': 365}
+# The minutes in each timespan whose bars can be rolled up from shorter bars.
+_SPAN_MINUTES = {'minute': 1, 'hour': 60}
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'lightweight_charts', 'polygon')
+_DAY = pd.Timedelta(days=1)
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + _DAY:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _missing_ranges(ranges, start, end):
+    missing = []
+    for covered_start, covered_end in ranges:
+        if covered_end < start:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > start:
+            missing.append((start, covered_start - _DAY))
+        start = covered_end + _DAY
+    if start <= end:
+        missing.append((start, end))
+    return missing
+
+
+class _BarCache:
+    """
+    Keeps the bars requested for each ticker and timeframe on disk, along with
+    the dates they cover, so that only the dates not yet covered are requested.
+    The current day is never covered, as its bars are still being made.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        ticker, mult, span = key
+        return os.path.join(self.directory, re.sub(r'[^\w.-]', '_', f'{ticker}_{mult}{span}') + '.npz')
+
+    def load(self, key):
+        """
+        Returns the cached bars and the date ranges they cover.
+        """
+        path = self._path(key)
+        with self._lock:
+            if not os.path.exists(path):
+                return None, []
+            with np.load(path) as file:
+                ranges = [(pd.Timestamp(start), pd.Timestamp(end)) for start, end in file['ranges']]
+                df = pd.DataFrame({name: file[name] for name in file.files if name != 'ranges'})
+        return df, ranges
+
+    def store(self, key, df: pd.DataFrame, ranges):
+        today = pd.Timestamp.now().normalize()
+        ranges = [(start, min(end, today - _DAY)) for start, end in ranges if start < today]
+        columns = {name: df[name].to_numpy() for name in df.columns}
+        columns['ranges'] = np.array(ranges, dtype='datetime64[D]').reshape(-1, 2)
+        path = self._path(key)
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            # Written beside the cache first, so a failed write never leaves half a file.
+            with open(path + '.tmp', 'wb') as file:
+                np.savez(file, **columns)
+            os.replace(path + '.tmp', path)
+
+
+_cache: Optional[_BarCache] = None
+
+
+class _BarRequest:
+    """
+    The bars of a ticker between two dates, split into the requests for the dates not already cached.
+    """
+    def __init__(self, ticker: str, timeframe: str, start_date: str, end_date: str, limit: int):
+        end_date = dt.datetime.now().strftime('%Y-%m-%d') if end_date == 'now' else end_date
+        mult, span = _convert_timeframe(timeframe)
+        self.ticker = ticker.replace('-', '') if '-' in ticker else ticker
+        self.key = (self.ticker, mult, span)
+        self.limit = limit
+        self.interval = pd.Timedelta(minutes=int(mult) * _SPAN_MINUTES[span]) if span in _SPAN_MINUTES else None
+        self.start, self.end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        self.state_key = self.key + (self.start, self.end)
+        self.cache = _cache
+        self.cached, self.ranges = self.cache.load(self.key) if self.cache else (None, [])
+        self.missing = _missing_ranges(self.ranges, self.start, self.end)
+        if self.missing and self.cache and self.interval is not None:
+            self._finer_cached()
+
+    @property
+    def slices(self) -> List[tuple]:
+        """
+        The dates not already cached, in slices of `_SLICE_DAYS`.
+        """
+        days = _SLICE_DAYS.get(self.key[2])
+        slices = []
+        for start, end in self.missing:
+            starts = list(pd.date_range(start, end, freq=f'{days}D')) if days else [start]
+            ends = [slice_start - _DAY for slice_start in starts[1:]] + [end]
+            slices += zip(starts, ends)
+        return slices
+
+    @property
+    def urls(self) -> List[str]:
+        """
+        The requests for each slice of the dates not already cached.
+        """
+        _, mult, span = self.key
+        return [
+            f"/v2/aggs/ticker/{self.ticker}/range/{mult}/{span}/{start:%Y-%m-%d}/{end:%Y-%m-%d}?limit={self.limit}&sort=asc"
+            for start, end in self.slices
+        ]
+
+    def _finer_cached(self):
+        """
+        Rolls up the cached bars of the shorter timeframe covering the most of the requested dates.
+        """
+        minutes = self.interval // pd.Timedelta(minutes=1)
+        best, most = None, 0
+        for source in range(minutes - 1, 0, -1):
+            if minutes % source:
+                continue
+            key = (self.ticker, source // 60, 'hour') if source % 60 == 0 else (self.ticker, source, 'minute')
+            df, ranges = self.cache.load(key)
+            covered = sum((end - start).days + 1 for start, end in self._overlap(ranges))
+            if df is not None and covered > most:
+                best, most = (df, ranges), covered
+        if best is not None:
+            self._adopt(*best)
+
+    def _overlap(self, ranges):
+        return [(max(start, self.start), min(end, self.end)) for start, end in ranges
+                if start <= self.end and end >= self.start]
+
+    def _adopt(self, df: pd.DataFrame, ranges):
+        """
+        Rolls up the bars of a shorter timeframe on the dates they cover, so that only the dates left are requested.
+        """
+        ranges = self._overlap(ranges)
+        if df is None or df.empty or not ranges:
+            return
+        days = df['time'].dt.normalize()
+        covered = np.zeros(len(df), dtype=bool)
+        for start, end in ranges:
+            covered |= ((days >= start) & (days <= end)).to_numpy()
+        rolled = resample_bars(df[covered], self.interval)
+        frames = [frame for frame in (self.cached, rolled) if frame is not None and not frame.empty]
+        if not frames:
             return
-        data = json.loads(response.read())
-        if 'results' not in data:
-            _log.error(f'No results for {query_url}')
+        df = pd.concat(frames) if len(frames) > 1 else frames[0]
+        self.cached = df.drop_duplicates('time', keep='last').sort_values('time', ignore_index=True)
+        self.ranges = _merge_ranges(self.ranges + ranges)
+        self.missing = _missing_ranges(self.ranges, self.start, self.end)
+
+    def adopt(self, source: '_BarRequest', df: Optional[pd.DataFrame]):
+        """
+        Rolls up the bars loaded by another request where they overlap this one's dates, if they are of
+        the same ticker and of a timeframe dividing this one, so that only the dates left are requested.
+        The current day is always requested again, as its bars were still being made.
+        """
+        if (
+            df is None or self.interval is None or source.interval is None
+            or source.ticker != self.ticker or self.interval % source.interval
+        ):
             return
-        return data['results']
+        # Only the dates the source has all the bars of are covered, which leaves out any slices it failed to fetch.
+        today = pd.Timestamp.now().normalize()
+        self._adopt(df, [(start, min(end, today - _DAY)) for start, end in source._overlap(source.ranges) if start < today])
+
+    def _frame(self, results: list) -> pd.DataFrame:
+        df = pd.DataFrame(results, columns=['t', 'o', 'h', 'l', 'c', 'v'])
+        df['t'] = pd.to_datetime(df['t'], unit='ms')
+        rename = {'o': 'open', 'h': 'high', 'l': 'low', 'c': 'close', 't': 'time'}
+        if not self.ticker.startswith('I:'):
+            rename['v'] = 'volume'
+        return df[list(rename)].rename(columns=rename)
+
+    def _in_range(self, df: Optional[pd.DataFrame]):
+        if df is None:
+            return None
+        df = df[(df['time'] >= self.start) & (df['time'] < self.end + _DAY)].reset_index(drop=True)
+        if df.empty:
+            _log.error(f'No results for {self.ticker}')
+            return None
+        return df
+
+    def cached_bars(self) -> Optional[pd.DataFrame]:
+        """
+        Returns the cached bars within the requested dates, without requesting anything.
+        """
+        return self._in_range(self.cached) if self.cached is not None and not self.cached.empty else None
+
+    def finish(self, slices: List[Optional[list]]) -> Optional[pd.DataFrame]:
+        """
+        Merges the requested bars into those cached, storing them, and returns the bars within the requested dates.
+        The dates of any failed request are left uncovered, so that they are requested again.
+        """
+        fetched_dates = [dates for dates, results in zip(self.slices, slices) if results is not None]
+        if not fetched_dates:
+            return self.cached_bars()
+        fetched = self._frame([bar for results in slices if results is not None for bar in results])
+        frames = [df for df in (self.cached, fetched) if df is not None and not df.empty]
+        df = pd.concat(frames) if frames else fetched
+        self.cached = df.drop_duplicates('time', keep='last').sort_values('time', ignore_index=True)
+        self.ranges = _merge_ranges(self.ranges + fetched_dates)
+        self.missing = _missing_ranges(self.ranges, self.start, self.end)
+        if self.cache:
+            self.cache.store(self.key, self.cached, self.ranges)
+        return self._in_range(self.cached)
 
 
 def get_bar_data(ticker: str, timeframe: str, start_date: str, end_date: str, limit: int = 5_000):
-    end_date = dt.datetime.now().strftime('%Y-%m-%d') if end_date == 'now' else end_date
-    mult, span = _convert_timeframe(timeframe)
-    if '-' in ticker:
-        ticker = ticker.replace('-', '')
-
-    query_url = f"/v2/aggs/ticker/{ticker}/range/{mult}/{span}/{start_date}/{end_date}?limit={limit}"
-    results = _polygon_request(query_url)
-    if not results:
-        return None
+    """
+    Requests the bars between two dates, fetching slices of the range concurrently and every page of each.
+    When the cache is enabled, only the dates not already cached are requested.
+    """
+    request = _BarRequest(ticker, timeframe, start_date, end_date, limit)
+    return request.finish(list(_client.executor.map(_client.get_all, request.urls)))
 
-    df = pd.DataFrame(results)
-    df['t'] = pd.to_datetime(df['t'], unit='ms')
 
-    rename = {'o': 'open', 'h': 'high', 'l': 'low', 'c': 'close', 't': 'time'}
-    if not ticker.startswith('I:'):
-        rename['v'] = 'volume'
+async def _async_request(ticker: str, timeframe: str, start_date: str, end_date: str, limit: int) -> _BarRequest:
+    """
+    Makes a request off the event loop, as it loads the cached bars of its timeframe and of shorter ones from disk.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _BarRequest, ticker, timeframe, start_date, end_date, limit)
 
-    return df[rename.keys()].rename(columns=rename)
+
+async def _async_fetch(request: _BarRequest):
+    loop = asyncio.get_running_loop()
+    slices = await asyncio.gather(*(loop.run_in_executor(_client.executor, _client.get_all, url) for url in request.urls))
+    # Merging and writing the cache happens off the event loop.
+    return await loop.run_in_executor(None, request.finish, slices)
 
 
 async def async_get_bar_data(ticker: str, timeframe: str, start_date: str, end_date: str, limit: int = 5_000):
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, get_bar_data, ticker, timeframe, start_date, end_date, limit)
+    return await _async_fetch(await _async_request(ticker, timeframe, start_date, end_date, limit))
+
+
+class Conflation:
+    """
+    Thins out the ticks passed to a subscriber to at most `rate` updates a second for each ticker.
+
+    In `last` mode only the last tick of each window is passed on. In `ohlc` mode its first,
+    highest, lowest and last ticks are, so the bars they are rolled into never lose their highs and lows.
+    The volumes of the ticks dropped are added onto the ticks passed on after them.
+    """
+    def __init__(self, rate: float, mode: Literal['last', 'ohlc'] = 'ohlc', clock=time.monotonic):
+        if mode not in ('last', 'ohlc'):
+            raise ValueError(f'Unknown conflation mode "{mode}".')
+        self.window = 1 / rate
+        self.mode = mode
+        self.received = 0
+        self.emitted = 0
+        self._clock = clock
+        self._pending = []
+        self._last = -float('inf')
+        self._timer = None
+        self._deliver = None
+
+    @property
+    def dropped(self) -> int:
+        return self.received - self.emitted - sum(len(ticks) for ticks in self._pending)
+
+    def push(self, ticks: Ticks):
+        self.received += len(ticks)
+        self._pending.append(ticks)
+        now = self._clock()
+        if now - self._last >= self.window:
+            self.flush()
+            return
+        if self._timer is not None:
+            return
+        # The last ticks of a burst are passed on once the window ends, rather than waiting for the next ticks.
+        try:
+            self._timer = asyncio.get_running_loop().call_later(self._last + self.window - now, self.flush)
+        except RuntimeError:
+            pass
+
+    def flush(self):
+        self.cancel()
+        if not self._pending:
+            return
+        ticks = Ticks.concat(self._pending)
+        self._pending = []
+        self._last = self._clock()
+        ticks = self._conflate(ticks)
+        self.emitted += len(ticks)
+        self._deliver(ticks)
+
+    def cancel(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _conflate(self, ticks: Ticks) -> Ticks:
+        last = len(ticks) - 1
+        if self.mode == 'last':
+            kept = np.array([last])
+        else:
+            kept = np.unique([0, ticks.price.argmax(), ticks.price.argmin(), last])
+        if len(kept) == len(ticks):
+            return ticks
+        volume = None if ticks.volume is None else np.diff(np.cumsum(ticks.volume)[kept], prepend=0)
+        return Ticks(ticks.time[kept], ticks.price[kept], volume, ticks.symbol)
+
+
+class TickRecorder:
+    """
+    Appends the raw websocket messages received to a binary log, each with the time it was received.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(_LOG_MAGIC)
+
+    def write(self, sec_type: SEC_TYPE, message: Union[str, bytes]):
+        data = message.encode() if isinstance(message, str) else message
+        self._file.write(_LOG_RECORD.pack(time.time_ns(), _SEC_TYPES.index(sec_type), len(data)))
+        self._file.write(data)
+
+    def close(self):
+        self._file.close()
+
+
+def read_log(path: str) -> Iterator[tuple]:
+    """
+    Yields the time in nanoseconds, security type and message of each record of a log written by `TickRecorder`.
+    """
+    with open(path, 'rb') as file:
+        if file.read(len(_LOG_MAGIC)) != _LOG_MAGIC:
+            raise ValueError(f'"{path}" is not a tick log.')
+        while True:
+            header = file.read(_LOG_RECORD.size)
+            if len(header) < _LOG_RECORD.size:
+                return
+            received, sec_type, length = _LOG_RECORD.unpack(header)
+            message = file.read(length)
+            # A record cut short by the recording process ending is skipped.
+            if len(message) < length:
+                return
+            yield received, _SEC_TYPES[sec_type], message
+
+
+class _ReplaySocket:
+    async def send(self, message):
+        pass
+
+
+async def _replay_connect(sec_type: SEC_TYPE) -> dict:
+    """
+    Passes the messages of the replayed log to `_handle_frame`, spaced as they were received divided by the speed,
+    or as fast as they are handled when the speed is None.
+    Returns the number of messages replayed, the seconds taken and how many seconds each message was handled late.
+    """
+    path, speed = _replay
+    _ws[sec_type] = _ReplaySocket()
+    start, first, lags = time.perf_counter(), None, []
+    for received, log_type, message in read_log(path):
+        if log_type != sec_type:
+            continue
+        first = received if first is None else first
+        due = (received - first) / 1e9 / speed if speed else time.perf_counter() - start
+        delay = due - (time.perf_counter() - start)
+        await asyncio.sleep(max(delay, 0))
+        _handle_frame(sec_type, _loads(message))
+        lags.append(time.perf_counter() - start - due)
+    elapsed = time.perf_counter() - start
+    _log.info(f'Replayed {len(lags)} {sec_type} messages in {elapsed:.2f}s')
+    return {'messages': len(lags), 'seconds': elapsed, 'lags': np.array(lags)}
 
 
 async def _send(sec_type: SEC_TYPE, action: str, params: str):
@@ -112,12 +590,23 @@ async def _send(sec_type: SEC_TYPE, action: str, params: str):
     while ws is None:
         await asyncio.sleep(0.05)
         ws = _ws[sec_type]
-    await ws.send(json.dumps({'action': action, 'params': params}))
+    try:
+        await ws.send(json.dumps({'action': action, 'params': params}))
+    except websockets.exceptions.ConnectionClosed:
+        # Subscriptions are sent again once the websocket has reconnected.
+        pass
 
 
-async def subscribe(ticker: str, sec_type: SEC_TYPE, func, args, precision=2):
-    if not _ws[sec_type]:
-        asyncio.create_task(_websocket_connect(sec_type))
+async def subscribe(ticker: str, sec_type: SEC_TYPE, func, args, precision=2, conflation: Optional[Conflation] = None):
+    """
+    Passes `func` the `Ticks` of `ticker` within each websocket message, followed by `args`.
+    Given a `Conflation`, the ticks are thinned out by it first.
+
+    Every subscriber of a ticker is passed the same `Ticks`, and the ticker is only subscribed
+    to upstream by its first subscriber.
+    """
+    if sec_type not in _connections or _connections[sec_type].done():
+        _connections[sec_type] = asyncio.create_task((_replay_connect if _replay else _websocket_connect)(sec_type))
 
     if sec_type in ('forex', 'crypto'):
         key = ticker[ticker.index(':')+1:]
@@ -129,96 +618,195 @@ async def subscribe(ticker: str, sec_type: SEC_TYPE, func, args, precision=2):
         _lasts[key] = {
             'price': 0,
             'funcs': [],
-            'precision': precision
+            'precision': precision,
+            'ticker': ticker,
+            'sec_type': sec_type,
         }
         if sec_type != 'indices':
             _lasts[key]['volume'] = 0
 
     data = _lasts[key]
+    if any(f == func for f, *_ in data['funcs']):
+        return
+    if conflation is not None:
+        conflation._deliver = lambda ticks: func(ticks, *args)
+    data['funcs'].append((func, args, conflation))
 
-    quotes, aggs = _subscription_type[sec_type]
-    await _send(sec_type, 'subscribe', f'{quotes}.{ticker}')
-    await _send(sec_type, 'subscribe', f'{aggs}.{ticker}') if aggs else None
+    # Until the websocket is connected, it subscribes to every ticker with subscribers itself once it is.
+    if len(data['funcs']) == 1 and _ws[sec_type] is not None:
+        for params in _subscription_params(sec_type, ticker):
+            await _send(sec_type, 'subscribe', params)
 
-    if func in data['funcs']:
-        return
-    data['funcs'].append((func, args))
 
+def _subscription_params(sec_type: SEC_TYPE, ticker: str):
+    return [f'{channel}.{ticker}' for channel in _subscription_type[sec_type] if channel]
 
-async def unsubscribe(func):
-    for key, data in _lasts.items():
-        if val := next(((f, args) for f, args in data['funcs'] if f == func), None):
-            break
-    else:
-        return
-    data['funcs'].remove(val)
 
-    if data['funcs']:
-        return
-    sec_type = _get_sec_type(key)
-    quotes, aggs = _subscription_type[sec_type]
-    await _send(sec_type, 'unsubscribe', f'{quotes}.{key}')
-    await _send(sec_type, 'unsubscribe', f'{aggs}.{key}')
+def _detach(func) -> List[dict]:
+    """
+    Removes `func` from the subscribers of every ticker, returning the tickers left without any.
+    """
+    detached = []
+    for data in _lasts.values():
+        subs = [sub for sub in data['funcs'] if sub[0] == func]
+        for sub in subs:
+            data['funcs'].remove(sub)
+            if sub[2] is not None:
+                sub[2].cancel()
+        if subs and not data['funcs']:
+            detached.append(data)
+    return detached
+
+
+async def _unsubscribe_upstream(detached: List[dict]):
+    for data in detached:
+        if _ws[data['sec_type']] is None:
+            continue
+        for params in _subscription_params(data['sec_type'], data['ticker']):
+            await _send(data['sec_type'], 'unsubscribe', params)
+
+
+async def unsubscribe(func):
+    """
+    Unsubscribes `func` from its tickers, which are only unsubscribed from upstream once they have no subscribers left.
+    """
+    await _unsubscribe_upstream(_detach(func))
 
 
 async def _websocket_connect(sec_type):
+    """
+    Keeps the websocket of a security type connected, reconnecting with exponential backoff whenever it drops.
+    Once reconnected, every ticker is subscribed to again and the bars missed in between are backfilled.
+    """
     if websockets is None:
         raise ImportError('The "websockets" library was not found, and must be installed to pull live data.')
-    ticker_key = {
-        'stocks': 'sym',
-        'options': 'sym',
-        'indices': 'T',
-        'forex': 'p',
-        'crypto': 'pair',
-    }[sec_type]
-    async with websockets.connect(f'wss://socket.polygon.io/{sec_type}') as ws:
-        _ws[sec_type] = ws
-        await _send(sec_type, 'auth', api_key)
-        while 1:
-            response = await ws.recv()
-            data_list: List[dict] = json.loads(response)
-            for i, data in enumerate(data_list):
-                if data['ev'] == 'status':
-                    _log.info(f'{data["message"]}')
-                    continue
-                _ticker_key = {
-                    'stocks': 'sym',
-                    'options': 'sym',
-                    'indices': 'T',
-                    'forex': 'p',
-                    'crypto': 'pair',
-                }
-                await _handle_tick(data[ticker_key], data)
-
-
-async def _handle_tick(ticker, data):
-    lasts = _lasts[ticker]
-    sec_type = _get_sec_type(ticker)
-
-    if data['ev'] in ('Q', 'V', 'C', 'XQ'):
-        if sec_type == 'forex':
-            data['bp'] = data.pop('b')
-            data['ap'] = data.pop('a')
-        price = (data['bp'] + data['ap']) / 2 if sec_type != 'indices' else data['val']
-        if abs(price - lasts['price']) < (1/(10**lasts['precision'])):
-            return
-        lasts['price'] = price
+    delay, reconnecting = RECONNECT_BACKOFF, False
+    while True:
+        try:
+            async with websockets.connect(f'{SOCKET_URL}/{sec_type}') as ws:
+                await ws.send(json.dumps({'action': 'auth', 'params': api_key}))
+                subscribed = [data for data in _lasts.values() if data['sec_type'] == sec_type and data['funcs']]
+                params = [param for data in subscribed for param in _subscription_params(sec_type, data['ticker'])]
+                # Tickers subscribed to from here on send their own subscriptions.
+                _ws[sec_type] = ws
+                if params:
+                    await ws.send(json.dumps({'action': 'subscribe', 'params': ','.join(params)}))
+                delay = RECONNECT_BACKOFF
+                if reconnecting:
+                    _log.info(f'Reconnected to the {sec_type} websocket')
+                    # Messages received meanwhile wait in the websocket, so live ticks follow the backfilled ones.
+                    await _backfill(sec_type, subscribed)
+                async for message in ws:
+                    if _recorder is not None:
+                        _recorder.write(sec_type, message)
+                    _handle_frame(sec_type, _loads(message))
+        except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+            _log.error(f'The {sec_type} websocket dropped: {e!r}')
+        except Exception:
+            _log.exception(f'The {sec_type} websocket failed, reconnecting')
+        finally:
+            # Subscriptions made meanwhile wait for the next connection rather than using a closed websocket.
+            _ws[sec_type] = None
+        reconnecting = True
+        await asyncio.sleep(delay * random.uniform(0.5, 1))
+        delay = min(delay * 2, RECONNECT_MAX)
+
+
+async def _backfill(sec_type: SEC_TYPE, subscribed: List[dict]):
+    """
+    Requests the minute bars made since the last tick of each ticker and passes them on as ticks.
+    Each bar becomes a tick at its open, high, low and close, so the bars they are rolled into keep their extremes.
+    """
+    subscribed = [data for data in subscribed if data.get('time')]
+    requests = await asyncio.gather(*(
+        _async_request(data['ticker'], '1min', pd.to_datetime(data['time'], unit='ms').strftime('%Y-%m-%d'), 'now', 50_000)
+        for data in subscribed
+    ))
+    frames = await asyncio.gather(*(_async_fetch(request) for request in requests), return_exceptions=True)
+    for data, bars in zip(subscribed, frames):
+        if not isinstance(bars, pd.DataFrame):
+            continue
+        last = pd.to_datetime(data['time'], unit='ms')
+        bars = bars[bars['time'] >= last.floor('min')]
+        if bars.empty:
+            continue
+        times = np.maximum(bars['time'].to_numpy(), last.to_datetime64())
+        prices = bars[['open', 'high', 'low', 'close']].to_numpy(dtype=float).ravel()
+        volumes = None
+        if 'volume' in bars and 'volume' in data:
+            volumes = bars['volume'].to_numpy(dtype=float)
+            # The ticks of the first minute before the drop have been counted already.
+            volumes[0] = 0 if bars['time'].iloc[0] < last else volumes[0]
+            volumes = np.column_stack([np.zeros((len(bars), 3)), volumes]).ravel()
+        data['price'] = prices[-1]
+        data['time'] = int(pd.Timestamp(times[-1]).value // 10**6)
+        _deliver(data, Ticks(np.repeat(times, 4), prices, volumes, data['ticker']))
+
+
+def _group_ticks(sec_type: SEC_TYPE, events: List[dict]) -> dict:
+    """
+    Groups the events of a frame by ticker, into the time, price and volume of each tick.
+    Quotes which moved the price by less than the ticker's precision are dropped.
+    """
+    ticker_key = _ticker_keys[sec_type]
+    quote_keys = ('b', 'a') if sec_type == 'forex' else ('bp', 'ap')
+    groups = {}
+    for data in events:
+        event = data['ev']
+        if event == 'status':
+            _log.info(f'{data["message"]}')
+            continue
+        ticker = data[ticker_key]
+        lasts = _lasts.get(ticker)
+        if lasts is None:
+            continue
+        if event in ('Q', 'V', 'C', 'XQ'):
+            price = data['val'] if sec_type == 'indices' else (data[quote_keys[0]] + data[quote_keys[1]]) / 2
+            if abs(price - lasts['price']) < (1/(10**lasts['precision'])):
+                continue
+            lasts['price'] = price
+            if sec_type != 'indices':
+                lasts['volume'] = 0
+            lasts['time'] = data['t'] if 't' in data else data['s']
+        elif event in ('A', 'CA', 'XA'):
+            lasts['volume'] = data['v']
+            if not lasts.get('time'):
+                continue
+        else:
+            continue
+        ticks = groups.get(ticker)
+        if ticks is None:
+            ticks = groups[ticker] = ([], [], [])
+        ticks[0].append(lasts['time'])
+        ticks[1].append(lasts['price'])
+        ticks[2].append(lasts.get('volume', 0))
+    return groups
 
-        if sec_type != 'indices':
-            lasts['volume'] = 0
 
-        if 't' not in data:
-            lasts['time'] = pd.to_datetime(data.pop('s'), unit='ms')
-        else:
-            lasts['time'] = pd.to_datetime(data['t'], unit='ms')
+def _handle_frame(sec_type: SEC_TYPE, events: List[dict]):
+    """
+    Converts the ticks of each ticker within the frame once, passing the same `Ticks` to all of its subscribers.
+    """
+    for ticker, (times, prices, volumes) in _group_ticks(sec_type, events).items():
+        data = _lasts[ticker]
+        volumes = np.array(volumes, dtype=float) if sec_type != 'indices' else None
+        _deliver(data, Ticks(np.array(times, dtype='datetime64[ms]'), np.array(prices, dtype=float), volumes,
+                             data['ticker']))
 
-    elif data['ev'] in ('A', 'CA', 'XA'):
-        lasts['volume'] = data['v']
-        if not lasts.get('time'):
-            return
-    lasts['symbol'] = ticker
-    for func, args in lasts['funcs']:
-        func(pd.Series(lasts), *args)
+
+def _deliver(data: dict, ticks: Ticks):
+    """
+    Passes the ticks to each subscriber of a ticker. A subscriber which raises is logged,
+    and neither stops the others nor the websocket from receiving.
+    """
+    for func, args, conflation in list(data['funcs']):
+        try:
+            if conflation is None:
+                func(ticks, *args)
+            else:
+                conflation.push(ticks)
+        except Exception:
+            _log.exception(f'A subscriber of {data["ticker"]} failed on its ticks')
 
 
 class PolygonAPI:
@@ -232,6 +820,13 @@ class PolygonAPI:
 
     def __init__(self, chart):
         self._chart = chart
+        self._request: Optional[_BarRequest] = None
+        # The last bars requested, from which longer timeframes are rolled up.
+        self._source = None
+        self._states = PreparedCache()
+        self._conflate = None
+        # The conflation of the live ticks currently subscribed, holding the counts of the ticks received and passed on.
+        self.conflation: Optional[Conflation] = None
 
     def set(self, *args):
         if asyncio.get_event_loop().is_running():
@@ -241,20 +836,104 @@ class PolygonAPI:
             _set_on_load.append(args)
             return False
 
+    def _detach(self):
+        """
+        Stops the live ticks of the chart, unsubscribing upstream from any ticker no other chart follows.
+        """
+        detached = _detach(self._chart.update_from_ticks)
+        if not detached:
+            return
+        try:
+            asyncio.get_running_loop().create_task(_unsubscribe_upstream(detached))
+        except RuntimeError:
+            pass
+
     async def async_set(self, sec_type: Literal['stocks', 'options', 'indices', 'forex', 'crypto'], ticker, timeframe,
                         start_date, end_date, limit, live):
-        await unsubscribe(self._chart.update_from_tick)
+        await unsubscribe(self._chart.update_from_ticks)
 
-        df = await async_get_bar_data(ticker, timeframe, start_date, end_date, limit)
-
-        self._chart.set(df, keep_drawings=_tickers.get(self._chart) == ticker)
+        request = self._request = await _async_request(ticker, timeframe, start_date, end_date, limit)
+        keep_drawings = _tickers.get(self._chart) == ticker
         _tickers[self._chart] = ticker
+        prepared = self._states.get(request.state_key)
+        cached = None
+        if prepared is None:
+            cached = await asyncio.get_running_loop().run_in_executor(None, self._cached_bars, request, self._source)
+            # Another ticker or timeframe may have been set meanwhile.
+            if self._request is not request:
+                return True
+        if prepared is not None:
+            self._chart.set(prepared, keep_drawings=keep_drawings)
+            # Bars of the current day were still being made when they were prepared.
+            if request.end >= pd.Timestamp.now().normalize():
+                asyncio.create_task(self._top_up(request))
+        elif cached is None:
+            df = await _async_fetch(request)
+            self._source = (request, df)
+            self._show(request, df, keep_drawings)
+        else:
+            self._show(request, cached, keep_drawings)
+            if request.urls:
+                asyncio.create_task(self._top_up(request))
+            else:
+                self._source = (request, cached)
 
         if not live:
             return True
-        await subscribe(ticker, sec_type, self._chart.update_from_tick, (True,), self._chart.num_decimals)
+        self.conflation = Conflation(*self._conflate) if self._conflate else None
+        await subscribe(ticker, sec_type, self._chart.update_from_ticks, (True,), self._chart.num_decimals, self.conflation)
         return True
 
+    @staticmethod
+    def _cached_bars(request: _BarRequest, source) -> Optional[pd.DataFrame]:
+        if source:
+            # Longer timeframes are rolled up from the bars already loaded, requesting only the dates they miss.
+            request.adopt(*source)
+        return request.cached_bars()
+
+    def _show(self, request: _BarRequest, df: Optional[pd.DataFrame], keep_drawings: bool):
+        if df is None:
+            self._chart.set(df, keep_drawings=keep_drawings)
+            return
+        prepared = self._chart.prepare(df)
+        self._states.put(request.state_key, prepared)
+        self._chart.set(prepared, keep_drawings=keep_drawings)
+
+    async def _top_up(self, request: _BarRequest):
+        df = await _async_fetch(request)
+        self._source = (request, df)
+        if df is None:
+            return
+        # Another ticker or timeframe may have been set while the missing bars were requested.
+        if self._request is request:
+            self._show(request, df, keep_drawings=True)
+        else:
+            self._states.put(request.state_key, self._chart.prepare(df))
+
+    async def prefetch(self, tickers: List[str], timeframe: str, start_date: str, end_date: str = 'now',
+                       limit: int = 5_000):
+        """
+        Requests the bars of each ticker and prepares them for the chart, so that setting any of them
+        later with the same timeframe and dates shows them at once.\n
+        :param tickers:     Polygon.io tickers, prefixed by their market as in `O:`, `I:`, `C:` or `X:`.
+        :param timeframe:   Timeframe to request (1min, 5min, 2H, 1D, 1W, 2M, etc).
+        :param start_date:  Start date of the data (YYYY-MM-DD).
+        :param end_date:    End date of the data (YYYY-MM-DD). If left blank, this will be set to today.
+        :param limit:       The limit of base aggregates queried to create the timeframe given (max 50_000).
+        """
+        async def fetch(ticker):
+            request = await _async_request(ticker, timeframe, start_date, end_date, limit)
+            if request.state_key in self._states:
+                return
+            if request.urls:
+                df = await _async_fetch(request)
+            else:
+                df = await asyncio.get_running_loop().run_in_executor(None, request.cached_bars)
+            if df is not None:
+                self._states.put(request.state_key, self._chart.prepare(df))
+
+        await asyncio.gather(*(fetch(ticker) for ticker in tickers))
+
     def stock(
             self, symbol: str, timeframe: str, start_date: str, end_date='now',
             limit: int = 5_000, live: bool = False
@@ -372,6 +1051,35 @@ class PolygonAPI:
     ) -> bool:
         return await self.async_set('crypto', f'X:{crypto_pair}', timeframe, start_date, end_date, limit, live)
 
+    def conflate(self, rate: Optional[float], mode: Literal['last', 'ohlc'] = 'ohlc'):
+        """
+        Limits the updates made to the chart from live data, applying to the tickers set after this is called.\n
+        :param rate:    The most updates made each second, or None for no limit.
+        :param mode:    `last` keeps only the last tick of each update, while `ohlc` also keeps the highest and lowest.
+        """
+        self._conflate = (rate, mode) if rate else None
+
+    @staticmethod
+    def record(path: Optional[str]):
+        """
+        Appends every websocket message received to a binary log, so it can be replayed later with `replay`.\n
+        :param path: The file to append to, or None to stop recording.
+        """
+        global _recorder
+        if _recorder is not None:
+            _recorder.close()
+        _recorder = TickRecorder(path) if path else None
+
+    @staticmethod
+    def replay(path: Optional[str], speed: Optional[float] = 1):
+        """
+        Replays a log written by `record` in place of the websockets, for the live tickers set after this is called.\n
+        :param path:    The log to replay, or None to use the websockets again.
+        :param speed:   How many times faster than it was recorded the log is replayed, or None for as fast as possible.
+        """
+        global _replay
+        _replay = (path, speed) if path else None
+
     @staticmethod
     def log(info: bool):
         """
@@ -379,6 +1087,29 @@ class PolygonAPI:
         """
         _log.setLevel(logging.INFO) if info else _log.setLevel(logging.ERROR)
 
+    @staticmethod
+    def client(concurrency: int = 4, rate: Optional[float] = None, burst: int = 1, retries: int = 5):
+        """
+        Configures the requests made to Polygon.io.\n
+        :param concurrency: The number of requests made at once, each over its own kept-alive connection.
+        :param rate:        The most requests made per second on average, or None for no limit.
+        :param burst:       The number of requests which can be made at once before the rate applies.
+        :param retries:     The number of times a rate limited or failed request is retried, backing off each time.
+        """
+        global _client
+        _client.close()
+        _client = _Client(_client.base_url, concurrency, rate, burst, retries)
+
+    @staticmethod
+    def cache(directory: Optional[str] = CACHE_DIR):
+        """
+        Keeps the bars requested on disk, so that only the dates not yet requested are requested again.
+        Cached bars are shown at once, while the rest are requested.\n
+        :param directory: The directory to keep the bars in, or None to stop caching.
+        """
+        global _cache
+        _cache = _BarCache(directory) if directory else None
+
     @staticmethod
     def api_key(key: str):
         """
@@ -388,6 +1119,38 @@ class PolygonAPI:
         api_key = key
 
 
+class PolygonProvider(DataProvider):
+    """
+    Serves Polygon.io's bars, live ticks and tickers to a `ProviderChart`, through the same client and cache as `PolygonAPI`.
+    """
+    # Bars reaching the present are requested again after a minute, as newer bars will have been made since.
+    max_age = 60
+
+    def __init__(self, api_key: str, limit: int = 5_000, **kwargs):
+        super().__init__(**kwargs)
+        PolygonAPI.api_key(api_key)
+        self.limit = limit
+
+    def get_bars(self, symbol, timeframe, start, end):
+        end = end or pd.Timestamp.now()
+        start = start if start is not None else end - pd.Timedelta(days=365)
+        return get_bar_data(symbol, timeframe, f'{start:%Y-%m-%d}', f'{end:%Y-%m-%d}', self.limit)
+
+    async def stream_ticks(self, symbol):
+        ticks = asyncio.Queue()
+        await subscribe(symbol, _get_sec_type(symbol), ticks.put_nowait, ())
+        try:
+            while True:
+                yield await ticks.get()
+        finally:
+            await unsubscribe(ticks.put_nowait)
+
+    def search_symbols(self, query, limit=20):
+        query = urllib.parse.quote(query)
+        data = _client.get(f'/v3/reference/tickers?search={query}&active=true&limit={limit}')
+        return [result['ticker'] for result in data.get('results', [])] if data else []
+
+
 class PolygonChart(Chart):
     """
     A prebuilt callback chart object allowing for a standalone, plug-and-play
@@ -398,13 +1161,18 @@ class PolygonChart(Chart):
     If using the standard `show` method, the `block` parameter must be set to True.
     `show_async` can also be used.
     """
+    _PREFIXES = {'Stock': '', 'Option': 'O:', 'Index': 'I:', 'Forex': 'C:', 'Crypto': 'X:'}
+    # The number of recently shown tickers prefetched whenever the timeframe or ticker changes.
+    RECENT = 5
+
     def __init__(
             self, api_key: str, live: bool = False, num_bars: int = 200, end_date: str = 'now', limit: int = 5_000,
             timeframe_options: tuple = ('1min', '5min', '30min', 'D', 'W'),
             security_options: tuple = ('Stock', 'Option', 'Index', 'Forex', 'Crypto'),
             toolbox: bool = True, width: int = 800, height: int = 600, x: int = None, y: int = None,
             on_top: bool = False, maximize: bool = False, debug: bool = False,
-            title: str = '', screen: int = None,
+            title: str = '', screen: int = None, cache: Optional[str] = None,
+            watchlist: tuple = (), max_memory: int = 256 * 2**20,
     ):
         super().__init__(width, height, x, y, title, screen, on_top, maximize, debug, toolbox)
 
@@ -412,11 +1180,16 @@ class PolygonChart(Chart):
         self.end_date = end_date
         self.limit = limit
         self.live = live
+        self.watchlist = list(watchlist)
+        self._recent = []
+        self._prefetch = None
+        self.polygon._states.max_bytes = max_memory
         self.win.style(
             active_background_color='rgba(91, 98, 246, 0.8)',
             muted_background_color='rgba(91, 98, 246, 0.5)'
         )
         self.polygon.api_key(api_key)
+        self.polygon.cache(cache)
         self.events.search += self.on_search
         self.legend(True)
         self.grid(False, False)
@@ -431,12 +1204,8 @@ class PolygonChart(Chart):
         {self.id}.search.box.focus()
         ''')
 
-    async def _polygon(self, symbol):
-        self.spinner(True)
-        self.set(pd.DataFrame(), True)
-        self.crosshair(vert_visible=False, horz_visible=False)
-
-        mult, span = _convert_timeframe(self.topbar['timeframe'].value)
+    def _start_date(self, timeframe):
+        mult, span = _convert_timeframe(timeframe)
         delta = dt.timedelta(**{span + 's': int(mult)})
         short_delta = (delta < dt.timedelta(days=7))
         start_date = dt.datetime.now() if self.end_date == 'now' else dt.datetime.strptime(self.end_date, '%Y-%m-%d')
@@ -448,16 +1217,34 @@ class PolygonChart(Chart):
             remaining_bars -= 1
         epoch = dt.datetime.fromtimestamp(0)
         start_date = epoch if start_date < epoch else start_date
-        success = await getattr(self.polygon, 'async_'+self.topbar['security'].value.lower())(
+        return start_date.strftime('%Y-%m-%d')
+
+    async def _polygon(self, symbol):
+        # Tickers shown recently are restored at once, so the chart is only cleared once the new bars are set.
+        self.spinner(True)
+        self.crosshair(vert_visible=False, horz_visible=False)
+
+        security, timeframe = self.topbar['security'].value, self.topbar['timeframe'].value
+        start_date = self._start_date(timeframe)
+        success = await getattr(self.polygon, 'async_'+security.lower())(
             symbol,
-            timeframe=self.topbar['timeframe'].value,
-            start_date=start_date.strftime('%Y-%m-%d'),
+            timeframe=timeframe,
+            start_date=start_date,
             end_date=self.end_date,
             limit=self.limit,
             live=self.live
         )
         self.spinner(False)
         self.crosshair() if success else None
+        if success:
+            ticker = self._PREFIXES.get(security, '') + symbol
+            self._recent = [ticker] + [recent for recent in self._recent if recent != ticker][:self.RECENT - 1]
+            tickers = [t for t in dict.fromkeys(self._recent[1:] + self.watchlist) if t != ticker]
+            if self._prefetch:
+                self._prefetch.cancel()
+            self._prefetch = asyncio.create_task(
+                self.polygon.prefetch(tickers, timeframe, start_date, self.end_date, self.limit)
+            )
         return success
 
     async def on_search(self, chart, searched_string):
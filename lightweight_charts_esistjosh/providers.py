@@ -0,0 +1,421 @@
+import asyncio
+import glob
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import AsyncIterator, Iterable, List, Optional, Union
+
+import pandas as pd
+
+from .chart import Chart
+from .util import PreparedCache, Ticks, resample_bars
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+COLUMNS = ['time', 'open', 'high', 'low', 'close', 'volume']
+_UNITS = {'min': 'minutes', 'H': 'hours', 'D': 'days', 'W': 'weeks', 'M': 'months'}
+
+_log = logging.getLogger(__name__)
+
+
+def _parse_timeframe(timeframe: str):
+    match = re.fullmatch(r'(\d*)(min|H|D|W|M)', timeframe)
+    if not match:
+        raise ValueError(f'Unknown timeframe "{timeframe}".')
+    return int(match[1] or 1), match[2]
+
+
+def timeframe_interval(timeframe: str) -> pd.Timedelta:
+    """
+    Returns the length of a timeframe such as 1min, 5min, 2H, D, W or M, taking months as 31 days.
+    """
+    mult, unit = _parse_timeframe(timeframe)
+    return pd.Timedelta(days=31 * mult) if unit == 'M' else pd.Timedelta(**{_UNITS[unit]: mult})
+
+
+def roll_up(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Rolls bars up into a longer timeframe. Weeks start on Sunday and months on their first day.
+    """
+    mult, unit = _parse_timeframe(timeframe)
+    if unit not in ('W', 'M'):
+        return resample_bars(df, timeframe_interval(timeframe))
+    rule = f'{mult}W-SAT' if unit == 'W' else f'{mult}MS'
+    agg = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last'}
+    if 'volume' in df:
+        agg['volume'] = 'sum'
+    rolled = df.set_index('time').resample(rule, label='left', closed='left').agg(agg)
+    if unit == 'W':
+        rolled.index += pd.Timedelta(days=1)
+    return rolled.dropna(subset=['open']).rename_axis('time').reset_index()
+
+
+class DataProvider:
+    """
+    A source of bars, live ticks and symbols for charts.
+
+    Subclasses implement `get_bars`, and optionally `stream_ticks` and `search_symbols`.
+    Bars read through `bars` or `async_bars` are cached in memory, read concurrently
+    and rolled up into longer timeframes, so subclasses only need to read their source.
+    """
+    # The timeframe the source keeps its bars at, which longer timeframes are rolled up from.
+    # When None, the source is asked for the bars of each timeframe instead.
+    resolution: Optional[str] = None
+    # The seconds cached bars reaching the present are kept for, as the source may have newer bars since.
+    max_age: Optional[float] = None
+    # The times the span read for a count of bars is widened fourfold, when too few bars are found within it.
+    WIDEN = 4
+
+    def __init__(self, concurrency: int = 4, max_bytes: int = 256 * 2**20):
+        self.executor = ThreadPoolExecutor(concurrency, thread_name_prefix=type(self).__name__)
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get_bars(
+            self, symbol: str, timeframe: str, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]
+    ) -> Union[pd.DataFrame, Iterable[pd.DataFrame], None]:
+        """
+        Reads the bars of a symbol between two times, sorted by time, where None leaves that side unbounded.
+        The bars can be returned as one DataFrame, or as pages of it.
+        """
+        raise NotImplementedError
+
+    async def stream_ticks(self, symbol: str) -> AsyncIterator[Union[pd.DataFrame, Ticks]]:
+        """
+        Yields the live ticks of a symbol, as `Ticks` or as DataFrames with the columns time, price and the volume traded by each tick.
+        """
+        raise NotImplementedError(f'{type(self).__name__} has no live data.')
+        yield
+
+    def search_symbols(self, query: str, limit: int = 20) -> List[str]:
+        """
+        Returns the symbols matching a search, best matches first.
+        """
+        return []
+
+    @staticmethod
+    def _match(symbols: Iterable[str], query: str, limit: int) -> List[str]:
+        query = query.upper()
+        matches = [symbol for symbol in symbols if query in symbol.upper()]
+        matches.sort(key=lambda symbol: (not symbol.upper().startswith(query), len(symbol), symbol))
+        return matches[:limit]
+
+    def _cached(self, key, start, end) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is None:
+                return None
+            df, cached_start, cached_end, read_at = entry
+            if cached_start is not None and (start is None or start < cached_start):
+                return None
+            if cached_end is not None and (end is None or end > cached_end):
+                return None
+            if cached_end is None and self.max_age is not None and time.monotonic() - read_at > self.max_age:
+                return None
+            self._frames.move_to_end(key)
+            return df
+
+    def _store(self, key, df: pd.DataFrame, start, end):
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            if key in self._frames:
+                self._size -= int(self._frames.pop(key)[0].memory_usage(deep=True).sum())
+            self._frames[key] = (df, start, end, time.monotonic())
+            self._size += size
+            while self._size > self.max_bytes and len(self._frames) > 1:
+                dropped = self._frames.popitem(last=False)[1][0]
+                self._size -= int(dropped.memory_usage(deep=True).sum())
+
+    def _read(self, symbol: str, timeframe: str, start, end) -> pd.DataFrame:
+        result = self.get_bars(symbol, timeframe, start, end)
+        pages = [result] if result is None or isinstance(result, pd.DataFrame) else list(result)
+        pages = [page for page in pages if page is not None and not page.empty]
+        if not pages:
+            return pd.DataFrame(columns=COLUMNS)
+        df = pd.concat(pages, ignore_index=True) if len(pages) > 1 else pages[0].reset_index(drop=True)
+        df['time'] = pd.to_datetime(df['time'])
+        return df if df['time'].is_monotonic_increasing else df.sort_values('time', ignore_index=True)
+
+    def bars(self, symbol: str, timeframe: Optional[str] = None, start=None, end='now',
+             count: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """
+        Returns the bars of a symbol between two times, read through the cache and rolled up into `timeframe`.\n
+        :param symbol:      The symbol to read.
+        :param timeframe:   The timeframe of the bars, or None for the resolution of the source.
+        :param start:       The time of the first bar, or None to read from the start of the source.
+        :param end:         The time of the last bar, or 'now'. Whole days are given as dates (YYYY-MM-DD).
+        :param count:       The number of bars to return at most, counting back from the end.
+        """
+        timeframe = timeframe or self.resolution
+        source = self.resolution or timeframe
+        end = None if end in (None, 'now') else pd.Timestamp(end)
+        if end is not None and end == end.normalize():
+            end += pd.Timedelta(days=1) - pd.Timedelta(1)
+        if start is not None or count is None:
+            df = self._rolled(self._range(symbol, source, start and pd.Timestamp(start), end), source, timeframe)
+        else:
+            # Intraday timeframes leave room for nights and weekends, and longer ones for weekends.
+            interval = timeframe_interval(timeframe)
+            span = interval * count * (6 if interval < pd.Timedelta(days=1) else 1.5)
+            # The span is widened until it holds enough bars once rolled up, as the source may end well before `end`.
+            # One more bar than asked for is needed, as the span may cut into the first.
+            for _ in range(self.WIDEN + 1):
+                df = self._rolled(self._range(symbol, source, (end or pd.Timestamp.now()) - span, end), source, timeframe)
+                if len(df) > count:
+                    break
+                span *= 4
+        if df.empty:
+            return None
+        return df.tail(count).reset_index(drop=True) if count else df.reset_index(drop=True)
+
+    @staticmethod
+    def _rolled(df: pd.DataFrame, source: str, timeframe: str) -> pd.DataFrame:
+        return roll_up(df, timeframe) if timeframe != source and not df.empty else df
+
+    def _range(self, symbol, source, start, end) -> pd.DataFrame:
+        df = self._cached((symbol, source), start, end)
+        if df is None:
+            df = self._read(symbol, source, start, end)
+            self._store((symbol, source), df, start, end)
+        if start is not None:
+            df = df[df['time'] >= start]
+        if end is not None:
+            df = df[df['time'] <= end]
+        return df
+
+    async def async_bars(self, symbol: str, timeframe: Optional[str] = None, start=None, end='now',
+                         count: Optional[int] = None) -> Optional[pd.DataFrame]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.bars, symbol, timeframe, start, end, count)
+
+    async def prefetch(self, symbols: List[str], timeframe: Optional[str] = None, start=None, end='now',
+                       count: Optional[int] = None):
+        """
+        Reads the bars of many symbols at once into the cache.
+        """
+        await asyncio.gather(*(self.async_bars(symbol, timeframe, start, end, count) for symbol in symbols))
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+class CSVProvider(DataProvider):
+    """
+    Reads bars from a directory holding a CSV file for each symbol, named `<symbol>.csv`.
+    Files are read in chunks, stopping at the first chunk past the requested times.
+    """
+    def __init__(self, directory: str, resolution: str = '1min', chunksize: int = 100_000, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+        self.resolution = resolution
+        self.chunksize = chunksize
+
+    def get_bars(self, symbol, timeframe, start, end):
+        path = os.path.join(self.directory, f'{symbol}.csv')
+        if not os.path.exists(path):
+            return
+        for chunk in pd.read_csv(path, chunksize=self.chunksize):
+            chunk.columns = chunk.columns.str.lower()
+            chunk = chunk.rename(columns={'date': 'time'})
+            chunk['time'] = pd.to_datetime(chunk['time'])
+            if end is not None and chunk['time'].iloc[0] > end:
+                return
+            if start is not None and chunk['time'].iloc[-1] < start:
+                continue
+            yield chunk
+
+    def search_symbols(self, query, limit=20):
+        files = glob.glob(os.path.join(glob.escape(self.directory), '*.csv'))
+        return self._match((os.path.basename(file)[:-4] for file in files), query, limit)
+
+
+class ParquetProvider(DataProvider):
+    """
+    Reads bars from a directory holding a Parquet file for each symbol, named `<symbol>.parquet`.
+    Only the row groups within the requested times are read.
+    """
+    def __init__(self, directory: str, resolution: str = '1min', **kwargs):
+        if pyarrow is None:
+            raise ImportError('The "pyarrow" library was not found, and must be installed to read Parquet files.')
+        super().__init__(**kwargs)
+        self.directory = directory
+        self.resolution = resolution
+
+    def get_bars(self, symbol, timeframe, start, end):
+        path = os.path.join(self.directory, f'{symbol}.parquet')
+        if not os.path.exists(path):
+            return None
+        filters = [('time', '>=', start)] if start is not None else []
+        filters += [('time', '<=', end)] if end is not None else []
+        return pd.read_parquet(path, engine='pyarrow', filters=filters or None)
+
+    def search_symbols(self, query, limit=20):
+        files = glob.glob(os.path.join(glob.escape(self.directory), '*.parquet'))
+        return self._match((os.path.basename(file)[:-8] for file in files), query, limit)
+
+
+class SQLiteProvider(DataProvider):
+    """
+    Reads bars from a table of an SQLite database, holding the bars of every symbol and indexed on (symbol, time).
+    Times are kept as integers since the epoch, in `time_unit`.
+    """
+    def __init__(self, path: str, table: str = 'bars', resolution: str = '1min', time_unit: str = 'ms',
+                 page_size: int = 50_000, **kwargs):
+        if not re.fullmatch(r'\w+', table):
+            raise ValueError(f'Invalid table name "{table}".')
+        super().__init__(**kwargs)
+        self.path = path
+        self.table = table
+        self.resolution = resolution
+        self.time_unit = time_unit
+        self.page_size = page_size
+        with closing(sqlite3.connect(path)) as db, db:
+            exists = db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+            if exists:
+                db.execute(f'CREATE INDEX IF NOT EXISTS {table}_symbol_time ON {table} (symbol, time)')
+            else:
+                # Keyed on (symbol, time) without a rowid, so the bars of each symbol are stored in order.
+                db.execute(f'''
+                    CREATE TABLE {table} (
+                        symbol TEXT NOT NULL, time INTEGER NOT NULL,
+                        open REAL, high REAL, low REAL, close REAL, volume REAL,
+                        PRIMARY KEY (symbol, time)
+                    ) WITHOUT ROWID
+                ''')
+
+    def _time(self, timestamp: pd.Timestamp) -> int:
+        return int(timestamp.value // pd.Timedelta(1, unit=self.time_unit).value)
+
+    def write(self, symbol: str, df: pd.DataFrame):
+        """
+        Adds bars to the table, replacing any of the same symbol and time.
+        """
+        times = pd.to_datetime(df['time']).to_numpy(dtype='datetime64[ns]').astype('int64')
+        times //= pd.Timedelta(1, unit=self.time_unit).value
+        volume = df['volume'] if 'volume' in df else None
+        rows = zip(
+            [symbol] * len(df), times.tolist(), df['open'].tolist(), df['high'].tolist(), df['low'].tolist(),
+            df['close'].tolist(), volume.tolist() if volume is not None else [None] * len(df),
+        )
+        with closing(sqlite3.connect(self.path)) as db, db:
+            db.executemany(f'INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        with self._lock:
+            self._frames = OrderedDict((key, entry) for key, entry in self._frames.items() if key[0] != symbol)
+
+    def get_bars(self, symbol, timeframe, start, end):
+        query = f'SELECT {", ".join(COLUMNS)} FROM {self.table} WHERE symbol = ?'
+        params = [symbol]
+        if start is not None:
+            query += ' AND time >= ?'
+            params.append(self._time(start))
+        if end is not None:
+            query += ' AND time <= ?'
+            params.append(self._time(end))
+        with closing(sqlite3.connect(self.path)) as db:
+            cursor = db.execute(query + ' ORDER BY time', params)
+            while rows := cursor.fetchmany(self.page_size):
+                page = pd.DataFrame.from_records(rows, columns=COLUMNS)
+                page['time'] = pd.to_datetime(page['time'], unit=self.time_unit)
+                yield page
+
+    def search_symbols(self, query, limit=20):
+        pattern = '%' + re.sub(r'([%_\\])', r'\\\1', query) + '%'
+        with closing(sqlite3.connect(self.path)) as db:
+            rows = db.execute(
+                f"SELECT DISTINCT symbol FROM {self.table} WHERE symbol LIKE ? ESCAPE '\\'", (pattern,)
+            ).fetchall()
+        return self._match((symbol for symbol, in rows), query, limit)
+
+
+class ProviderChart(Chart):
+    """
+    A prebuilt callback chart object, searching, switching timeframes and updating
+    live from any `DataProvider` in the same way as the `PolygonChart`.
+
+    If using the standard `show` method, the `block` parameter must be set to True.
+    `show_async` can also be used.
+    """
+    def __init__(
+            self, provider: DataProvider, live: bool = False, num_bars: int = 200, end_date: str = 'now',
+            timeframe_options: tuple = ('1min', '5min', '30min', 'D', 'W'),
+            toolbox: bool = True, width: int = 800, height: int = 600, x: int = None, y: int = None,
+            on_top: bool = False, maximize: bool = False, debug: bool = False,
+            title: str = '', screen: int = None, max_memory: int = 256 * 2**20,
+    ):
+        super().__init__(width, height, x, y, title, screen, on_top, maximize, debug, toolbox)
+
+        self.provider = provider
+        self.live = live
+        self.num_bars = num_bars
+        self.end_date = end_date
+        self._states = PreparedCache(max_memory)
+        self._stream = None
+        self.win.style(
+            active_background_color='rgba(91, 98, 246, 0.8)',
+            muted_background_color='rgba(91, 98, 246, 0.5)'
+        )
+        self.events.search += self.on_search
+        self.legend(True)
+        self.grid(False, False)
+        self.crosshair(vert_visible=False, horz_visible=False)
+
+        self.topbar.textbox('symbol')
+        self.topbar.switcher('timeframe', timeframe_options, func=self._on_timeframe_selection)
+
+        self.run_script(f'''
+        {self.id}.search.window.style.display = "flex"
+        {self.id}.search.box.focus()
+        ''')
+
+    async def load(self, symbol: str) -> bool:
+        """
+        Shows the bars of a symbol in the selected timeframe, following its live ticks if `live` is set.
+        """
+        self.spinner(True)
+        timeframe = self.topbar['timeframe'].value
+        key = (symbol, timeframe, self.end_date)
+        prepared = self._states.get(key)
+        if prepared is None:
+            df = await self.provider.async_bars(symbol, timeframe, end=self.end_date, count=self.num_bars)
+            if df is not None:
+                prepared = self.prepare(df)
+                self._states.put(key, prepared)
+        self.spinner(False)
+        if self._stream:
+            self._stream.cancel()
+            self._stream = None
+        if prepared is None:
+            _log.error(f'No bars for {symbol}')
+            return False
+        self.set(prepared)
+        self.crosshair()
+        if self.live:
+            self._stream = asyncio.create_task(self._follow(symbol))
+        return True
+
+    async def _follow(self, symbol):
+        try:
+            async for ticks in self.provider.stream_ticks(symbol):
+                self.update_from_ticks(ticks, cumulative_volume=True)
+        except NotImplementedError as e:
+            _log.error(e)
+
+    async def on_search(self, chart, searched_string):
+        loop = asyncio.get_running_loop()
+        symbols = await loop.run_in_executor(self.provider.executor, self.provider.search_symbols, searched_string)
+        symbol = searched_string if not symbols or searched_string in symbols else symbols[0]
+        chart.topbar['symbol'].set(symbol if await self.load(symbol) else '')
+
+    async def _on_timeframe_selection(self, chart):
+        await self.load(chart.topbar['symbol'].value) if chart.topbar['symbol'].value else None
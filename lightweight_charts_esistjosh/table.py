@@ -1,7 +1,11 @@
 import asyncio
+import json
 import random
+import threading
 from typing import Union, Optional, Callable
 
+import pandas as pd
+
 from .util import jbool, Pane, NUM
 
 
@@ -9,11 +13,12 @@ class Section(Pane):
     def __init__(self, table, section_type):
         super().__init__(table.win)
         self._table = table
+        table._adopt(self)
         self.type = section_type
 
     def __call__(self, number_of_text_boxes: int, func: Optional[Callable] = None):
         if func is not None:
-            self.win.handlers[self.id] = lambda boxId: func(self._table, int(boxId))
+            self._handler(self.id, lambda boxId: func(self._table, int(boxId)))
         self.run_script(f'''
         {self._table.id}.makeSection("{self.id}", "{self.type}", {number_of_text_boxes}, {"true" if func else ""})
         ''')
@@ -29,6 +34,9 @@ class Row(dict):
         self._table = table
         self.id = id
         self.meta = {}
+        # The text and styles last given to each cell, so that unchanged ones aren't sent again.
+        self._text = {}
+        self._styles = {}
         self.run_script(f'{self._table.id}.newRow("{self.id}", {jbool(table.return_clicked_cells)})')
         for key, val in items.items():
             self[key] = val
@@ -37,18 +45,22 @@ class Row(dict):
         if isinstance(column, tuple):
             [self.__setitem__(col, val) for col, val in zip(column, value)]
             return
-        original_value = value
-        if column in self._table._formatters:
-            value = self._table._formatters[column].replace(self._table.VALUE, str(value))
-        self.run_script(f'{self._table.id}.updateCell("{self.id}", "{column}", "{value}")')
-        return super().__setitem__(column, original_value)
+        text = str(value)
+        if self._text.get(column) != text:
+            self._text[column] = text
+            self._table._queue(self.id, column, text=text)
+        return super().__setitem__(column, value)
 
     def background_color(self, column, color): self._style('backgroundColor', column, color)
 
-    def text_color(self, column, color): self._style('textColor', column, color)
+    def text_color(self, column, color): self._style('color', column, color)
 
     def _style(self, style, column, arg):
-        self.run_script(f"{self._table.id}.styleCell({self.id}, '{column}', '{style}', '{arg}')")
+        styles = self._styles.setdefault(column, {})
+        if styles.get(style) == arg:
+            return
+        styles[style] = arg
+        self._table._queue(self.id, column, style={style: arg})
 
     def delete(self):
         self.run_script(f"{self._table.id}.deleteRow('{self.id}')")
@@ -57,6 +69,8 @@ class Row(dict):
 
 class Table(Pane, dict):
     VALUE = 'CELL__~__VALUE__~__PLACEHOLDER'
+    # Cells changed within this many seconds are sent together, when changed within an asyncio loop.
+    FRAME_INTERVAL = 1 / 60
 
     def __init__(
             self,
@@ -79,21 +93,32 @@ class Table(Pane, dict):
         dict.__init__(self)
         Pane.__init__(self, window)
         self._formatters = {}
+        # The cells changed since the last frame, by row and column.
+        self._values = {}
+        self._styles = {}
+        self._lock = threading.Lock()
+        # The DataFrame given to bind, and the text of its cells as last sent.
+        self._bound: Optional[pd.DataFrame] = None
+        self._sent: Optional[pd.DataFrame] = None
         self.headings = headings
         self.is_shown = True
+
+        def row(rId):
+            return self._bound.loc[rId] if self._bound is not None else self[rId]
+
         def wrapper(rId, cId=None):
             if return_clicked_cells:
-                func(self[rId], cId)
+                func(row(rId), cId)
             else:
-                func(self[rId])
+                func(row(rId))
 
         async def async_wrapper(rId, cId=None):
             if return_clicked_cells:
-                await func(self[rId], cId)
+                await func(row(rId), cId)
             else:
-                await func(self[rId])
+                await func(row(rId))
 
-        self.win.handlers[self.id] = async_wrapper if asyncio.iscoroutinefunction(func) else wrapper
+        self._handler(self.id, async_wrapper if asyncio.iscoroutinefunction(func) else wrapper)
         self.return_clicked_cells = return_clicked_cells
 
         self.run_script(f'''
@@ -120,13 +145,96 @@ class Table(Pane, dict):
         self[row_id] = Row(self, row_id, {heading: item for heading, item in zip(self.headings, values)})
         return self[row_id]
 
-    def clear(self): self.run_script(f"{self.id}.clearRows()"), super().clear()
+    def _queue(self, row_id, column, text: Optional[str] = None, style: Optional[dict] = None):
+        with self._lock:
+            if text is not None:
+                self._values.setdefault(row_id, {})[column] = text
+            else:
+                self._styles.setdefault(row_id, {}).setdefault(column, {}).update(style)
+        self.win.run_coalesced(f'{self.id}.updateCells', self._updates, self.FRAME_INTERVAL)
+
+    def _updates(self) -> str:
+        """
+        Makes the script sending every cell changed since the last frame, emptying the queue.
+        """
+        with self._lock:
+            values, styles, self._values, self._styles = self._values, self._styles, {}, {}
+        return f'{self.id}.updateCells({json.dumps(values)}, {json.dumps(styles)})'
+
+    def bind(self, df: pd.DataFrame, key: Optional[str] = None):
+        """
+        Shows the rows of a DataFrame, identified by the `key` column or the index.
+        Binding again sends only the rows inserted or deleted and the cells changed since.
+        """
+        df = df.set_index(key, drop=False) if key is not None else df
+        if df.index.has_duplicates:
+            raise ValueError(f'The keys of a bound table must be unique; "{df.index[df.index.duplicated()][0]}" is repeated.')
+        df = df.set_axis(df.index.astype(str))
+        with self._lock:
+            self._bound = df
+        self.win.run_coalesced(f'{self.id}.bindData', self._bind_script, self.FRAME_INTERVAL)
+
+    def _bind_script(self) -> str:
+        """
+        Makes the script bringing the table from the rows last sent to the latest bound rows.
+        """
+        with self._lock:
+            df = self._bound
+        columns = [heading for heading in self.headings if heading in df.columns]
+        text = df[columns].astype(object).where(df[columns].notna(), '').astype(str)
+        sent, self._sent = self._sent, text
+        if sent is None or not sent.columns.equals(text.columns):
+            data = {'keys': text.index.tolist(), 'columns': {column: text[column].tolist() for column in columns}}
+            return f'{self.id}.bindData({json.dumps(data)}, {jbool(self.return_clicked_cells)})'
+
+        inserted = text.index.difference(sent.index, sort=False)
+        common = text.index.intersection(sent.index, sort=False)
+        changed = text.loc[common].ne(sent.loc[common])
+        update = {}
+        for column in columns:
+            keys = common[changed[column].to_numpy()]
+            if len(keys):
+                update[column] = [keys.tolist(), text.loc[keys, column].tolist()]
+        deleted = sent.index.difference(text.index, sort=False)
+        # Inserted rows are appended in the webview, so the order is only sent when that is not the order of the rows.
+        reordered = not text.index.equals(sent.index[sent.index.isin(text.index)].append(inserted))
+        if not (update or len(inserted) or len(deleted) or reordered):
+            return ''
+        patch = {
+            'delete': deleted.tolist(),
+            'insert': {'keys': inserted.tolist(), 'columns': {column: text.loc[inserted, column].tolist() for column in columns}},
+            'update': update,
+        }
+        if reordered:
+            patch['order'] = text.index.tolist()
+        return f'{self.id}.patchData({json.dumps(patch)})'
+
+    def sort(self, column: Optional[str] = None, ascending: bool = True):
+        """
+        Sorts the bound rows by a column, or back into their bound order if no column is given.
+        """
+        self.run_script(f'{self.id}.sortData({json.dumps(column)}, {jbool(ascending)})')
+
+    def filter(self, column: Optional[str] = None, query: str = ''):
+        """
+        Shows only the bound rows whose text in the column contains the query.
+        """
+        self.run_script(f'{self.id}.filterData({json.dumps(column)}, {json.dumps(query)})')
+
+    def clear(self):
+        with self._lock:
+            self._bound, self._sent = None, None
+        self.run_script(f"{self.id}.clearRows()"), super().clear()
 
     def get(self, __key: Union[int, str]) -> Row: return super().get(int(__key))
 
     def __getitem__(self, item): return super().__getitem__(int(item))
 
-    def format(self, column: str, format_str: str): self._formatters[column] = format_str
+    def format(self, column: str, format_str: str):
+        self._formatters[column] = format_str
+        for row in self.values():
+            row._text.pop(column, None)
+        self.run_script(f'{self.id}.formats[{json.dumps(column)}] = {json.dumps(format_str.split(self.VALUE))}')
 
     def resize(self, width: NUM, height: NUM): self.run_script(f'{self.id}.reSize({width}, {height})')
 
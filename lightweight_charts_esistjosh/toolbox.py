@@ -7,7 +7,7 @@ class ToolBox:
         self.id = chart.id
         self._save_under = None
         self.drawings = {}
-        chart.win.handlers[f'save_drawings{self.id}'] = self._save_drawings
+        chart._handler(f'save_drawings{self.id}', self._save_drawings)
         self.run_script(f'{self.id}.createToolBox()')
 
     def save_drawings_under(self, widget: 'Widget'):
@@ -10,6 +10,7 @@ ALIGN = Literal['left', 'right']
 class Widget(Pane):
     def __init__(self, topbar, value, func: callable = None, convert_boolean=False):
         super().__init__(topbar.win)
+        topbar._adopt(self)
         self.value = value
 
         def wrapper(v):
@@ -23,7 +24,7 @@ class Widget(Pane):
             self.value = v
             await func(topbar._chart)
 
-        self.win.handlers[self.id] = async_wrapper if asyncio.iscoroutinefunction(func) else wrapper
+        self._handler(self.id, async_wrapper if asyncio.iscoroutinefunction(func) else wrapper)
 
 
 class TextWidget(Widget):
@@ -90,6 +91,7 @@ class TopBar(Pane):
     def __init__(self, chart):
         super().__init__(chart.win)
         self._chart = chart
+        chart._adopt(self)
         self._widgets: Dict[str, Widget] = {}
         self._created = False
 
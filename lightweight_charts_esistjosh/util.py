@@ -1,32 +1,76 @@
 import asyncio
+import base64
 import json
+from collections import OrderedDict
 from datetime import datetime
-from random import choices
-from typing import Literal, Union
+from functools import lru_cache
+from itertools import count
+from typing import List, Literal, Optional, Union
 from numpy import isin
+import numpy as np
 import pandas as pd
 
 
 class Pane:
     def __init__(self, window):
-        from lightweight_charts_esistjosh import Window
+        from .abstract import Window
         self.win: Window = window
         self.run_script = window.run_script
         self.bulk_run = window.bulk_run
         if hasattr(self, 'id'):
             return
         self.id = Window._id_gen.generate()
-
-
-class IDGen(list):
-    ascii = 'abcdefghijklmnopqrstuvwxyz'
+        # The objects and callbacks released along with this one.
+        self._owner = None
+        self._children = {}
+        self._handlers = set()
+        window._live[self.id] = type(self).__name__
+
+    def _adopt(self, child: 'Pane'):
+        if child is self:
+            return
+        child._owner = self
+        self._children[child.id] = child
+
+    def _handler(self, name: str, func):
+        self.win.handlers[name] = func
+        self._handlers.add(name)
+
+    def _release(self) -> list:
+        """
+        Drops the Python state of this object and everything it owns.
+        :return: the ids of the released objects.
+        """
+        ids = []
+        for child in self._children.values():
+            ids += child._release()
+        self._children.clear()
+        for name in self._handlers:
+            self.win.handlers.pop(name, None)
+        self._handlers.clear()
+        self.win._live.pop(self.id, None)
+        return [*ids, self.id]
+
+    def _free(self):
+        """
+        Releases this object and everything it owns, and deletes their handles in the webview.
+        """
+        if self._owner is not None:
+            self._owner._children.pop(self.id, None)
+            self._owner = None
+        self.run_script('\n'.join(f'delete {id}' for id in self._release()))
+
+
+class IDGen:
+    """
+    Allocates the ids of objects created in the webview.
+    Each id names an entry of the `Lib.handles` table, which is deleted to release the object.
+    """
+    def __init__(self):
+        self._counter = count()
 
     def generate(self) -> str:
-        var = ''.join(choices(self.ascii, k=8))
-        if var not in self:
-            self.append(var)
-            return f'window.{var}'
-        self.generate()
+        return f'Lib.handles.h{next(self._counter)}'
 
 
 def parse_event_message(window, string):
@@ -46,6 +90,330 @@ def js_data(data: Union[pd.DataFrame, pd.Series]):
     return json.dumps(filtered_records)
 
 
+STYLE_COLUMNS = {'color': 'color', 'bordercolor': 'borderColor', 'wickcolor': 'wickColor', 'shape': 'shape'}
+
+
+def style_columns(df: pd.DataFrame) -> dict:
+    """
+    Returns the per-bar style columns of the given DataFrame, mapped to their data item keys.
+    """
+    return {col: STYLE_COLUMNS[key] for col in df.columns
+            if isinstance(col, str) and (key := col.replace('_', '').lower()) in STYLE_COLUMNS}
+
+
+def dictionary_encode(values: pd.Series):
+    """
+    Returns the distinct values of a low-cardinality column and the index of each row's value.
+    Missing values are given the index of a trailing null in the palette.
+    """
+    codes, palette = pd.factorize(values)
+    codes[codes == -1] = len(palette)
+    return palette.tolist() + [None], codes
+
+
+def regular_axis(values: pd.Series):
+    """
+    Returns a regular time column as its start, interval and the rows where it jumps,
+    or None if the column is too irregular for this to be any smaller.
+    Each gap is a `[row, time]` pair, from which the column continues at the same interval.
+    """
+    times = values.to_numpy()
+    if len(times) < 2 or values.hasnans:
+        return None
+    steps = np.diff(times)
+    interval = pd.Series(steps).mode().iloc[0]
+    gaps = np.flatnonzero(steps != interval) + 1
+    if interval <= 0 or len(gaps) > len(times) // 4:
+        return None
+    return {
+        'start': times[0].item(),
+        'interval': interval.item(),
+        'length': len(times),
+        'gaps': [[int(row), times[row].item()] for row in gaps],
+    }
+
+
+def js_columns(df: pd.DataFrame, encode=(), regular=()):
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if column in regular and (axis := regular_axis(values)) is not None:
+            columns[column] = axis
+            continue
+        if column in encode:
+            palette, codes = dictionary_encode(values)
+            # Columns with too many distinct values are cheaper to ship as they are.
+            if len(palette) <= 256:
+                codes = base64.b64encode(codes.astype(np.uint8).tobytes()).decode()
+                columns[column] = {'palette': palette, 'codes': codes}
+                continue
+        if values.hasnans:
+            values = values.astype(object).where(values.notna(), None)
+        columns[column] = values.tolist()
+    return json.dumps(columns)
+
+
+def fingerprint(df: pd.DataFrame) -> np.ndarray:
+    """
+    Returns one 64-bit hash per row of the given DataFrame.
+    """
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def shared_prefix(old: np.ndarray, new: np.ndarray) -> int:
+    """
+    Returns the number of leading rows two fingerprint arrays have in common.
+    """
+    n = min(len(old), len(new))
+    mismatches = np.flatnonzero(old[:n] != new[:n])
+    return int(mismatches[0]) if len(mismatches) else n
+
+
+def js_value(value) -> str:
+    if isinstance(value, str):
+        return json.dumps(value)
+    if value is None or value is pd.NA:
+        return 'null'
+    return json.dumps(float(value))
+
+
+@lru_cache(maxsize=None)
+def _row_template(keys: tuple) -> str:
+    return '{' + ', '.join(f'{json.dumps(key)}: %s' for key in keys) + '}'
+
+
+def js_row(row: dict) -> str:
+    """
+    Encodes a single data item, using a template compiled once for its keys.
+    """
+    return _row_template(tuple(row)) % tuple(map(js_value, row.values()))
+
+
+class RowSchema:
+    """
+    Maps the labels of an update onto the keys of a series' data items.
+    It is compiled once for each set of labels, so updates are formatted without pandas.
+    """
+    def __init__(self, keys: tuple, time_from_name: bool = False):
+        self.keys = keys
+        self.time_from_name = time_from_name
+
+    @classmethod
+    def compile(cls, labels: tuple, name: str = ''):
+        """
+        Follows the same rules as the DataFrame path: labels are lowercased unless a time
+        label is given, `date` becomes `time`, and the series name becomes `value`.
+        """
+        keys = list(labels)
+        if 'date' not in keys and 'time' not in keys:
+            keys = [name if name and str(key).lower() == name.lower() else str(key).lower() for key in keys]
+        keys = ['time' if key == 'date' else key for key in keys]
+        if name:
+            keys = ['value' if key == name else key for key in keys]
+        time_from_name = 'time' not in keys
+        return cls(tuple(keys) + (('time',) if time_from_name else ()), time_from_name)
+
+    def row(self, values: list, name=None) -> dict:
+        if self.time_from_name:
+            values = [*values, name]
+        return dict(zip(self.keys, values))
+
+
+class BarStore:
+    """
+    The data of a series, kept as a DataFrame plus the bars added since it was last read.
+    Updates only touch plain dicts, and are folded into the frame once it is read again,
+    so the frame is built once between updates and keeps the dtype of its time column.
+    The last bar is always kept as a dict, as it is the one being updated.
+    """
+    def __init__(self):
+        self.set(pd.DataFrame())
+
+    def set(self, df: pd.DataFrame):
+        self._frame = df
+        self._rows = []
+        # Whether the first pending row replaces the last row of the frame.
+        self._replace = False
+        self._last = df.iloc[-1].to_dict() if len(df) else None
+
+    def __len__(self):
+        return len(self._frame) + len(self._rows) - self._replace
+
+    @property
+    def last(self):
+        return self._last
+
+    def update(self, row: dict) -> bool:
+        """
+        Replaces the last bar if it has the same time, otherwise appends a new one.
+        :return: whether a new bar was appended.
+        """
+        appended = self._last is None or self._last['time'] != row['time']
+        if not appended and self._rows:
+            self._rows[-1] = row
+        else:
+            self._replace = self._replace or not (appended or self._rows)
+            self._rows.append(row)
+        self._last = row
+        return appended
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        if self._rows:
+            frame = self._frame.iloc[:-1] if self._replace else self._frame
+            rows = pd.DataFrame(self._rows)
+            if len(frame) and 'time' in frame and 'time' in rows:
+                rows['time'] = rows['time'].astype(frame['time'].dtype)
+            self._frame = self._concat(frame, rows)
+            self._rows = []
+            self._replace = False
+        return self._frame
+
+    @staticmethod
+    def _concat(*frames):
+        frames = [frame for frame in frames if len(frame)]
+        if len(frames) == 1:
+            return frames[0].reset_index(drop=True)
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+class PreparedCache:
+    """
+    Data prepared for a chart by `AbstractChart.prepare`, kept so that it can be set again at once.
+    The least recently used is dropped once together it takes up more than `max_bytes`.
+    """
+    def __init__(self, max_bytes: int = 256 * 2**20):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key][0]
+
+    def put(self, key, prepared):
+        if key in self._entries:
+            self._size -= self._entries.pop(key)[1]
+        size = prepared.nbytes
+        self._entries[key] = (prepared, size)
+        self._size += size
+        # The entry just put is kept even when it alone is larger than the limit.
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            self._size -= self._entries.popitem(last=False)[1][1]
+
+
+def roll_ticks(times: np.ndarray, prices: np.ndarray, volumes: Optional[np.ndarray] = None,
+               cumulative_volume: bool = False) -> tuple:
+    """
+    Rolls ticks up into bars, given the time of the bar each tick falls in.
+    :return: the times, opens, highs, lows, closes and volumes (or None) of the bars.
+    """
+    if (np.diff(times) < 0).any():
+        raise ValueError('Ticks must be sorted by time.')
+    starts = np.flatnonzero(np.r_[True, times[1:] != times[:-1]])
+    ends = np.r_[starts[1:], len(times)] - 1
+    if volumes is not None:
+        volumes = np.add.reduceat(volumes, starts) if cumulative_volume else volumes[ends]
+    return (times[starts], prices[starts], np.maximum.reduceat(prices, starts), np.minimum.reduceat(prices, starts),
+            prices[ends], volumes)
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    # A view is copied, as whatever it views could still be written to.
+    array = array.copy() if array.base is not None else array
+    array.flags.writeable = False
+    return array
+
+
+class Ticks:
+    """
+    The ticks of a symbol, converted once and shared by everything they are passed to.
+    Its arrays are read-only, and the bars they roll up into are kept for each interval,
+    so that charts of the same timeframe only roll them up once between them.
+    """
+    __slots__ = ('symbol', 'time', 'price', 'volume', '_frame', '_bars')
+
+    def __init__(self, time: np.ndarray, price: np.ndarray, volume: Optional[np.ndarray] = None, symbol: str = None):
+        self.symbol = symbol
+        self.time = _read_only(np.asarray(time, dtype='datetime64[ns]'))
+        self.price = _read_only(np.asarray(price, dtype=float))
+        self.volume = None if volume is None else _read_only(np.asarray(volume, dtype=float))
+        self._frame = None
+        self._bars = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'Ticks':
+        times = df['time'] if 'time' in df else df['date']
+        volume = df['volume'].to_numpy(dtype=float) if 'volume' in df else None
+        return cls(times.to_numpy(dtype='datetime64[ns]'), df['price'].to_numpy(dtype=float), volume,
+                   df.attrs.get('symbol'))
+
+    @classmethod
+    def concat(cls, ticks: List['Ticks']) -> 'Ticks':
+        if len(ticks) == 1:
+            return ticks[0]
+        volume = None if ticks[0].volume is None else np.concatenate([t.volume for t in ticks])
+        return cls(np.concatenate([t.time for t in ticks]), np.concatenate([t.price for t in ticks]), volume,
+                   ticks[0].symbol)
+
+    def __len__(self):
+        return len(self.time)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """
+        The ticks as a DataFrame with the columns time, price and volume, made on first use.
+        """
+        if self._frame is None:
+            columns = {'time': self.time, 'price': self.price}
+            if self.volume is not None:
+                columns['volume'] = self.volume
+            self._frame = pd.DataFrame(columns)
+            self._frame.attrs['symbol'] = self.symbol
+        return self._frame
+
+    def bars(self, interval: float, offset: float = 0, cumulative_volume: bool = False) -> tuple:
+        """
+        Rolls the ticks up into bars of `interval` seconds, as `roll_ticks` does.
+        """
+        key = (interval, offset, cumulative_volume)
+        if key not in self._bars:
+            seconds = self.time.astype('int64') / 1e9
+            self._bars[key] = roll_ticks(interval * (seconds // interval) + offset, self.price, self.volume,
+                                         cumulative_volume)
+        return self._bars[key]
+
+
+def resample_bars(df: pd.DataFrame, interval: pd.Timedelta) -> pd.DataFrame:
+    """
+    Rolls bars sorted by time up into bars of a longer interval, each starting at a multiple of it.
+    """
+    if df.empty:
+        return df.copy()
+    times = df['time'].to_numpy(dtype='datetime64[ns]').astype('int64')
+    buckets = times - times % interval.value
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(df)] - 1
+    columns = {
+        'time': pd.to_datetime(buckets[starts]),
+        'open': df['open'].to_numpy()[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(), starts),
+        'close': df['close'].to_numpy()[ends],
+    }
+    if 'volume' in df:
+        columns['volume'] = np.add.reduceat(df['volume'].to_numpy(), starts)
+    return pd.DataFrame(columns)[[column for column in df.columns if column in columns]]
+
+
 def snake_to_camel(s: str):
     components = s.split('_')
     return components[0] + ''.join(x.title() for x in components[1:])
@@ -131,7 +499,7 @@ class JSEmitter:
         async def final_async_wrapper(*arg):
             await other(self._chart, *arg) if not self._wrapper else await self._wrapper(other, self._chart, *arg)
 
-        self._chart.win.handlers[self._name] = final_async_wrapper if asyncio.iscoroutinefunction(other) else final_wrapper
+        self._chart._handler(self._name, final_async_wrapper if asyncio.iscoroutinefunction(other) else final_wrapper)
         self._on_iadd(other)
         return self
 
@@ -145,7 +513,7 @@ class Events:
             {chart.id}.search = Lib.Handler.makeSearchBox({chart.id})
             ''')
         )
-        salt = chart.id[chart.id.index('.')+1:]
+        salt = chart.id.rsplit('.', 1)[-1]
         self.range_change = JSEmitter(chart, f'range_change{salt}',
             lambda o: chart.run_script(f'''
             let checkLogicalRange{salt} = (logical) => {{
@@ -2,7 +2,7 @@ import asyncio
 import html
 
 from .util import parse_event_message
-from lightweight_charts_esistjosh import abstract
+from . import abstract
 
 try:
     import wx.html2
@@ -0,0 +1,109 @@
+import { LineStyle } from "lightweight-charts";
+import { LogicalLayer } from "./logical-layer";
+import { DrawingLayerPaneView } from "./pane-view";
+
+export type LayerItemKind = 'horizontal' | 'ray' | 'trend' | 'box' | 'point';
+
+export interface LayerItem {
+    id: string;
+    kind: LayerItemKind;
+    price: number;
+    time?: number;
+    endPrice?: number;
+    endTime?: number;
+    color: string;
+    fillColor?: string;
+    width: number;
+    style: LineStyle;
+    radius?: number;
+    // The logical indexes of the times, resolved against the bars of the series.
+    logical?: number | null;
+    endLogical?: number | null;
+}
+
+// The same defaults as the DrawingLayer methods in drawings.py, for drawings added without them.
+export const defaultLayerItem = {
+    color: '#1E80F0',
+    fillColor: 'rgba(255, 255, 255, 0.2)',
+    width: 2,
+    style: LineStyle.Solid,
+    radius: 5,
+};
+
+/**
+ * Draws any number of lines, rays, boxes and points with a single primitive,
+ * so that thousands of drawings cost one pane view and one renderer pass.
+ * Drawings are added, updated and removed in bulk, by column.
+ */
+export class DrawingLayer extends LogicalLayer {
+    public items: Map<string, LayerItem> = new Map();
+    _paneViews: DrawingLayerPaneView[];
+
+    constructor() {
+        super();
+        this._paneViews = [new DrawingLayerPaneView(this)];
+    }
+
+    updateAllViews() {
+        this._paneViews.forEach((view) => view.update());
+    }
+
+    paneViews() {
+        return this._paneViews;
+    }
+
+    private _resolve(item: LayerItem) {
+        if (item.time !== undefined) item.logical = this.logical(item.time);
+        if (item.endTime !== undefined) item.endLogical = this.logical(item.endTime);
+    }
+
+    protected resolve(after: number) {
+        this.items.forEach((item) => {
+            if ((item.time ?? -Infinity) > after || (item.endTime ?? -Infinity) > after) this._resolve(item);
+        });
+    }
+
+    /**
+     * Adds drawings of one kind. Each column is either an array with a value
+     * per drawing, or a single value shared by all of them.
+     */
+    public add(kind: LayerItemKind, columns: Record<string, any>) {
+        const entries = Object.entries(columns).filter(([key]) => key !== 'id');
+        columns.id.forEach((id: string, i: number) => {
+            const item: any = { ...defaultLayerItem, id, kind };
+            for (const [key, values] of entries) {
+                const value = Array.isArray(values) ? values[i] : values;
+                if (value !== null && value !== undefined) item[key] = value;
+            }
+            this._resolve(item);
+            this.items.set(id, item);
+        });
+        this.requestUpdate();
+    }
+
+    /**
+     * Updates the given drawings, with columns in the same form as `add`.
+     */
+    public update(ids: string[], columns: Record<string, any>) {
+        const entries = Object.entries(columns);
+        ids.forEach((id, i) => {
+            const item = this.items.get(id);
+            if (!item) return;
+            for (const [key, values] of entries) {
+                (item as any)[key] = Array.isArray(values) ? values[i] : values;
+            }
+            this._resolve(item);
+        });
+        this.requestUpdate();
+    }
+
+    public remove(ids: string[]) {
+        ids.forEach((id) => this.items.delete(id));
+        this.requestUpdate();
+    }
+
+    public clear() {
+        this.items.clear();
+        this.requestUpdate();
+    }
+}
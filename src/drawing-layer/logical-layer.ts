@@ -0,0 +1,38 @@
+import { SeriesAttachedParameter, Time } from "lightweight-charts";
+import { PluginBase } from "../plugin-base";
+import { TimeIndex } from "../drawing/time-index";
+
+/**
+ * A primitive whose drawings are placed by time and kept as logical indexes into
+ * the bars of its series, so they can sit between bars and past either end.
+ */
+export abstract class LogicalLayer extends PluginBase {
+    private _index: TimeIndex | null = null;
+
+    attached(param: SeriesAttachedParameter<Time>) {
+        super.attached(param);
+        this._index = TimeIndex.of(this.series);
+        this._index.subscribe(this._dataChanged);
+        this.resolve(-Infinity);
+    }
+
+    detached() {
+        this._index?.unsubscribe(this._dataChanged);
+        this._index = null;
+        super.detached();
+    }
+
+    protected logical(time: number): number | null {
+        return this._index ? this._index.logical(time) : null;
+    }
+
+    /**
+     * Resolves the logical indexes of the drawings with a time after the given one.
+     */
+    protected abstract resolve(after: number): void;
+
+    private _dataChanged = (after: number) => {
+        this.resolve(after);
+        this.requestUpdate();
+    }
+}
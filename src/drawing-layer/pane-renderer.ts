@@ -0,0 +1,54 @@
+import { CanvasRenderingTarget2D } from "fancy-canvas";
+import { ISeriesPrimitivePaneRenderer } from "lightweight-charts";
+import { setLineStyle } from "../helpers/canvas-rendering";
+import { LayerViewData } from "./pane-view";
+
+export class DrawingLayerPaneRenderer implements ISeriesPrimitivePaneRenderer {
+    _data: LayerViewData;
+
+    constructor(data: LayerViewData) {
+        this._data = data;
+    }
+
+    draw(target: CanvasRenderingTarget2D) {
+        target.useBitmapCoordinateSpace(scope => {
+            const ctx = scope.context;
+            ctx.scale(scope.horizontalPixelRatio, scope.verticalPixelRatio);
+
+            for (const [color, rects] of this._data.fills) {
+                ctx.fillStyle = color;
+                ctx.beginPath();
+                for (let i = 0; i < rects.length; i += 4) {
+                    ctx.rect(rects[i], rects[i + 1], rects[i + 2], rects[i + 3]);
+                }
+                ctx.fill();
+            }
+
+            for (const { color, width, style, lines } of this._data.strokes.values()) {
+                ctx.lineWidth = width;
+                ctx.strokeStyle = color;
+                setLineStyle(ctx, style);
+                ctx.beginPath();
+                for (let i = 0; i < lines.length; i += 4) {
+                    ctx.moveTo(lines[i], lines[i + 1]);
+                    ctx.lineTo(lines[i + 2], lines[i + 3]);
+                }
+                ctx.stroke();
+            }
+
+            ctx.setLineDash([]);
+            for (const { color, fillColor, width, points } of this._data.points.values()) {
+                ctx.lineWidth = width;
+                ctx.strokeStyle = color;
+                ctx.fillStyle = fillColor;
+                ctx.beginPath();
+                for (let i = 0; i < points.length; i += 3) {
+                    ctx.moveTo(points[i] + points[i + 2], points[i + 1]);
+                    ctx.arc(points[i], points[i + 1], points[i + 2], 0, 2 * Math.PI);
+                }
+                ctx.fill();
+                if (width) ctx.stroke();
+            }
+        });
+    }
+}
@@ -0,0 +1,139 @@
+import { ISeriesPrimitivePaneView, LineStyle } from "lightweight-charts";
+import { DrawingLayer } from "./drawing-layer";
+import { DrawingLayerPaneRenderer } from "./pane-renderer";
+
+export interface LayerStroke {
+    color: string;
+    width: number;
+    style: LineStyle;
+    lines: number[]; // x1, y1, x2, y2 for each line
+}
+
+export interface LayerPoints {
+    color: string;
+    fillColor: string;
+    width: number;
+    points: number[]; // x, y, radius for each point
+}
+
+/**
+ * The visible drawings, grouped by style so each group is drawn with one path.
+ */
+export interface LayerViewData {
+    strokes: Map<string, LayerStroke>;
+    fills: Map<string, number[]>; // color -> x, y, width, height for each box
+    points: Map<string, LayerPoints>;
+}
+
+export class DrawingLayerPaneView implements ISeriesPrimitivePaneView {
+    _source: DrawingLayer;
+    _data: LayerViewData = { strokes: new Map(), fills: new Map(), points: new Map() };
+
+    constructor(source: DrawingLayer) {
+        this._source = source;
+    }
+
+    private _stroke(color: string, width: number, style: LineStyle): number[] {
+        const key = `${color}|${width}|${style}`;
+        let stroke = this._data.strokes.get(key);
+        if (!stroke) {
+            stroke = { color, width, style, lines: [] };
+            this._data.strokes.set(key, stroke);
+        }
+        return stroke.lines;
+    }
+
+    private _fill(color: string): number[] {
+        let rects = this._data.fills.get(color);
+        if (!rects) {
+            rects = [];
+            this._data.fills.set(color, rects);
+        }
+        return rects;
+    }
+
+    private _points(color: string, fillColor: string, width: number): number[] {
+        const key = `${color}|${fillColor}|${width}`;
+        let points = this._data.points.get(key);
+        if (!points) {
+            points = { color, fillColor, width, points: [] };
+            this._data.points.set(key, points);
+        }
+        return points.points;
+    }
+
+    update() {
+        this._data = { strokes: new Map(), fills: new Map(), points: new Map() };
+        const chart = this._source.chart;
+        const series = this._source.series;
+        const timeScale = chart.timeScale();
+        const range = timeScale.getVisibleLogicalRange();
+        if (!range) return;
+        const width = timeScale.width();
+        const height = chart.paneSize().height;
+        // The visible prices, so drawings off the pane are skipped before their coordinates are built.
+        const [topPrice, bottomPrice] = [series.coordinateToPrice(0), series.coordinateToPrice(height)];
+        const [low, high] = topPrice === null || bottomPrice === null
+            ? [-Infinity, Infinity]
+            : [Math.min(topPrice, bottomPrice), Math.max(topPrice, bottomPrice)];
+        const offScreen = (price: number) => price < low || price > high;
+
+        for (const item of this._source.items.values()) {
+            if (item.kind === 'horizontal') {
+                if (offScreen(item.price)) continue;
+                const y = series.priceToCoordinate(item.price);
+                if (y === null) continue;
+                this._stroke(item.color, item.width, item.style).push(0, y, width, y);
+                continue;
+            }
+            if (item.logical === null || item.logical === undefined) continue;
+            if (item.kind === 'ray') {
+                if (item.logical > range.to || offScreen(item.price)) continue;
+                const y = series.priceToCoordinate(item.price);
+                if (y === null) continue;
+                const x = timeScale.logicalToCoordinate(item.logical as any) ?? 0;
+                this._stroke(item.color, item.width, item.style).push(Math.max(x, 0), y, width, y);
+                continue;
+            }
+            if (item.kind === 'point') {
+                const radius = item.radius ?? 0;
+                if (item.logical < range.from - 1 || item.logical > range.to + 1 || offScreen(item.price)) continue;
+                const y = series.priceToCoordinate(item.price);
+                const x = timeScale.logicalToCoordinate(item.logical as any);
+                if (x === null || y === null) continue;
+                this._points(item.color, item.fillColor ?? item.color, item.width).push(x, y, radius);
+                continue;
+            }
+            // Boxes and trend lines span two points.
+            if (item.endLogical === null || item.endLogical === undefined || item.endPrice === undefined) continue;
+            if (Math.min(item.logical, item.endLogical) > range.to) continue;
+            if (Math.max(item.logical, item.endLogical) < range.from) continue;
+            if (Math.max(item.price, item.endPrice) < low || Math.min(item.price, item.endPrice) > high) continue;
+            const y = series.priceToCoordinate(item.price);
+            const endY = series.priceToCoordinate(item.endPrice);
+            if (y === null || endY === null) continue;
+            const x = timeScale.logicalToCoordinate(item.logical as any);
+            const endX = timeScale.logicalToCoordinate(item.endLogical as any);
+            if (x === null || endX === null) continue;
+            if (item.kind === 'trend') {
+                this._stroke(item.color, item.width, item.style).push(x, y, endX, endY);
+                continue;
+            }
+            const [left, top] = [Math.min(x, endX), Math.min(y, endY)];
+            const [right, bottom] = [Math.max(x, endX), Math.max(y, endY)];
+            if (item.fillColor) this._fill(item.fillColor).push(left, top, right - left, bottom - top);
+            if (item.width) {
+                this._stroke(item.color, item.width, item.style).push(
+                    left, top, right, top,
+                    right, top, right, bottom,
+                    right, bottom, left, bottom,
+                    left, bottom, left, top,
+                );
+            }
+        }
+    }
+
+    renderer() {
+        return new DrawingLayerPaneRenderer(this._data);
+    }
+}
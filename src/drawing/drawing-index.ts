@@ -0,0 +1,127 @@
+import { Drawing } from './drawing';
+
+/**
+ * The extent of a drawing in logical indexes and prices.
+ * Lines which run off the chart have infinite bounds in that direction.
+ */
+export interface DrawingBounds {
+    minLogical: number;
+    maxLogical: number;
+    minPrice: number;
+    maxPrice: number;
+}
+
+// Drawings spanning more cells than this are checked on every query instead.
+const MAX_CELLS = 1024;
+
+/**
+ * A uniform grid over logical indexes and prices, so that hit tests only
+ * visit the drawings near the mouse rather than every drawing on the chart.
+ * Drawings unbounded in time are kept by price row, drawings unbounded
+ * in price by logical column, and the rest by grid cell.
+ */
+export class DrawingIndex {
+    private _cells: Map<string, Set<Drawing>> = new Map();
+    private _rows: Map<number, Set<Drawing>> = new Map();
+    private _columns: Map<number, Set<Drawing>> = new Map();
+    private _always: Set<Drawing> = new Set();
+    private _keys: Map<Drawing, [Map<any, Set<Drawing>> | null, any[]]> = new Map();
+
+    private _cellPrice: number | null = null;
+
+    constructor(private _cellLogical: number = 8) {}
+
+    get size() {
+        return this._keys.size;
+    }
+
+    private _span(min: number, max: number, size: number): [number, number] {
+        return [Math.floor(min / size), Math.floor(max / size)];
+    }
+
+    private _place(bounds: DrawingBounds | null): [Map<any, Set<Drawing>> | null, any[]] {
+        if (!bounds) return [null, []];
+        const { minLogical, maxLogical, minPrice, maxPrice } = bounds;
+        const logicalBound = isFinite(minLogical) && isFinite(maxLogical);
+        const priceBound = isFinite(minPrice) && isFinite(maxPrice);
+        if (priceBound && this._cellPrice === null) {
+            // Prices of one symbol share a magnitude, so the grid is sized from the first of them.
+            this._cellPrice = Math.abs(maxPrice) * 0.002 || 1;
+        }
+        const rows = priceBound ? this._span(minPrice, maxPrice, this._cellPrice!) : null;
+        const columns = logicalBound ? this._span(minLogical, maxLogical, this._cellLogical) : null;
+        const range = ([from, to]: [number, number]) => Array.from({ length: to - from + 1 }, (_, i) => from + i);
+
+        if (rows && columns) {
+            if ((rows[1] - rows[0] + 1) * (columns[1] - columns[0] + 1) > MAX_CELLS) return [null, []];
+            const keys = [];
+            for (let i = columns[0]; i <= columns[1]; i++) {
+                for (let j = rows[0]; j <= rows[1]; j++) keys.push(`${i},${j}`);
+            }
+            return [this._cells, keys];
+        }
+        if (rows && rows[1] - rows[0] < MAX_CELLS) return [this._rows, range(rows)];
+        if (columns && columns[1] - columns[0] < MAX_CELLS) return [this._columns, range(columns)];
+        return [null, []];
+    }
+
+    /**
+     * Adds the drawing, or moves it to where its points now are.
+     */
+    public update(drawing: Drawing) {
+        const [map, keys] = this._place(drawing.bounds());
+        const current = this._keys.get(drawing);
+        if (current && current[0] === map && current[1].join() === keys.join()) return;
+        this.remove(drawing);
+        this._keys.set(drawing, [map, keys]);
+        if (!map) {
+            this._always.add(drawing);
+            return;
+        }
+        for (const key of keys) {
+            let drawings = map.get(key);
+            if (!drawings) map.set(key, drawings = new Set());
+            drawings.add(drawing);
+        }
+    }
+
+    public remove(drawing: Drawing) {
+        const current = this._keys.get(drawing);
+        if (!current) return;
+        const [map, keys] = current;
+        if (!map) this._always.delete(drawing);
+        for (const key of keys) {
+            const drawings = map!.get(key)!;
+            drawings.delete(drawing);
+            if (!drawings.size) map!.delete(key);
+        }
+        this._keys.delete(drawing);
+    }
+
+    public clear() {
+        [this._cells, this._rows, this._columns].forEach((map) => map.clear());
+        this._always.clear();
+        this._keys.clear();
+        this._cellPrice = null;
+    }
+
+    /**
+     * Returns the drawings whose bounds may overlap the given area.
+     */
+    public query(bounds: DrawingBounds): Set<Drawing> {
+        const columns = this._span(bounds.minLogical, bounds.maxLogical, this._cellLogical);
+        const rows = this._cellPrice === null ? [0, 0] : this._span(bounds.minPrice, bounds.maxPrice, this._cellPrice);
+        // When zoomed far out the area covers more cells than there are drawings.
+        if ((columns[1] - columns[0] + 1) * (rows[1] - rows[0] + 1) > MAX_CELLS) return new Set(this._keys.keys());
+
+        const found = new Set(this._always);
+        const add = (drawings?: Set<Drawing>) => drawings?.forEach((drawing) => found.add(drawing));
+        for (let i = columns[0]; i <= columns[1]; i++) add(this._columns.get(i));
+        if (this._cellPrice === null) return found;
+        for (let j = rows[0]; j <= rows[1]; j++) {
+            add(this._rows.get(j));
+            for (let i = columns[0]; i <= columns[1]; i++) add(this._cells.get(`${i},${j}`));
+        }
+        return found;
+    }
+}
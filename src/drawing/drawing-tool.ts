@@ -6,6 +6,7 @@ import {
     SeriesType,
 } from 'lightweight-charts';
 import { Drawing } from './drawing';
+import { DrawingIndex } from './drawing-index';
 import { HorizontalLine } from '../horizontal-line/horizontal-line';
 import { Measure } from '../measure/measure';
 
@@ -20,6 +21,10 @@ export class DrawingTool {
     private _drawingType: (new (...args: any[]) => Drawing) | null = null;
     private _measureClickCount: number = 0;
 
+    private _index = new DrawingIndex();
+    // The drawings given the last mouse move, so those the mouse has left are reset.
+    private _touched: Set<Drawing> = new Set();
+
     constructor(chart: IChartApi, series: ISeriesApi<SeriesType>, finishDrawingCallback: Function | null = null) {
         this._chart = chart;
         this._series = series;
@@ -53,7 +58,13 @@ export class DrawingTool {
 
     addNewDrawing(drawing: Drawing) {
         this._series.attachPrimitive(drawing);
+        this._push(drawing);
+    }
+
+    private _push(drawing: Drawing) {
         this._drawings.push(drawing);
+        drawing._index = this._index;
+        this._index.update(drawing);
     }
 
     delete(d: Drawing | null) {
@@ -61,12 +72,20 @@ export class DrawingTool {
         const idx = this._drawings.indexOf(d);
         if (idx == -1) return;
         this._drawings.splice(idx, 1);
+        d._index = null;
+        this._index.remove(d);
+        this._touched.delete(d);
         d.detach();
     }
 
     clearDrawings() {
-        for (const d of this._drawings) d.detach();
+        for (const d of this._drawings) {
+            d._index = null;
+            d.detach();
+        }
         this._drawings = [];
+        this._index.clear();
+        this._touched.clear();
     }
 
     repositionOnTime() {
@@ -135,7 +154,7 @@ export class DrawingTool {
                 if (this._drawingType == HorizontalLine) this._onClick(param);
             }
             else {
-                this._drawings.push(this._activeDrawing);
+                this._push(this._activeDrawing);
                 this.stopDrawing();
 
                 if (!this._finishDrawingCallback) return;
@@ -147,7 +166,15 @@ export class DrawingTool {
     private _onMouseMove(param: MouseEventParams) {
         if (!param) return;
 
-        for (const t of this._drawings) t._handleHoverInteraction(param);
+        const nearby = this._nearby(param);
+        // The hovered drawing follows the mouse while it is dragged.
+        const hovered = Drawing.hoveredObject;
+        if (hovered && hovered._index === this._index) nearby.add(hovered);
+        for (const t of this._touched) t._handleHoverInteraction(param);
+        for (const t of nearby) {
+            if (!this._touched.has(t)) t._handleHoverInteraction(param);
+        }
+        this._touched = nearby;
 
         if (!this._isDrawing || !this._activeDrawing) return;
 
@@ -156,4 +183,23 @@ export class DrawingTool {
         this._activeDrawing.updatePoints(null, point);
         // this._activeDrawing.setSecondPoint(point);
         }
+
+    /**
+     * Returns the drawings within reach of the mouse, looked up in the index
+     * rather than hit testing every drawing on the chart.
+     */
+    private _nearby(param: MouseEventParams, tolerance = 12): Set<Drawing> {
+        if (!param.point || param.logical == null) return new Set();
+        const { x, y } = param.point;
+        const timeScale = this._chart.timeScale();
+        const prices = [y - tolerance, y + tolerance].map((coordinate) => this._series.coordinateToPrice(coordinate));
+        const logicals = [x - tolerance, x + tolerance].map((coordinate) => timeScale.coordinateToLogical(coordinate));
+        if (prices.includes(null) || logicals.includes(null)) return new Set(this._drawings);
+        return this._index.query({
+            minLogical: Math.min(...logicals as number[]),
+            maxLogical: Math.max(...logicals as number[]),
+            minPrice: Math.min(...prices as number[]),
+            maxPrice: Math.max(...prices as number[]),
+        });
+    }
     }
\ No newline at end of file
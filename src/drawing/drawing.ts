@@ -9,6 +9,7 @@ import { PluginBase } from '../plugin-base';
 import { DiffPoint, Point } from './data-source';
 import { DrawingOptions, defaultOptions } from './options';
 import { DrawingPaneView } from './pane-view';
+import { DrawingBounds, DrawingIndex } from './drawing-index';
 
 export enum InteractionState {
     NONE,
@@ -39,6 +40,8 @@ export abstract class Drawing extends PluginBase {
 
     protected _listeners: any[] = [];
 
+    public _index: DrawingIndex | null = null;
+
     constructor(
         options?: Partial<DrawingOptions>
     ) {
@@ -49,6 +52,28 @@ export abstract class Drawing extends PluginBase {
         };
     }
 
+    protected requestUpdate() {
+        // Keeps the drawing where the hit tests look for it whenever it changes.
+        this._index?.update(this);
+        super.requestUpdate();
+    }
+
+    /**
+     * Returns the extent of the drawing, or null if it can't be placed.
+     */
+    public bounds(): DrawingBounds | null {
+        const points = this.points.filter((point): point is Point => !!point);
+        if (!points.length || points.some((point) => point.logical == null)) return null;
+        const logicals = points.map((point) => point.logical as number);
+        const prices = points.map((point) => point.price);
+        return {
+            minLogical: Math.min(...logicals),
+            maxLogical: Math.max(...logicals),
+            minPrice: Math.min(...prices),
+            maxPrice: Math.max(...prices),
+        };
+    }
+
     updateAllViews() {
         this._paneViews.forEach(pw => pw.update());
     }
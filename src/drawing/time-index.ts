@@ -0,0 +1,93 @@
+import { DataChangedScope, ISeriesApi, Logical, SeriesType, Time } from "lightweight-charts";
+import { logicalIndex } from "../helpers/time";
+import { Point } from "./data-source";
+import { Drawing } from "./drawing";
+
+/**
+ * The times of a series' bars, kept up to date as the series changes,
+ * so the logical index of any time is found by binary search.
+ */
+export class TimeIndex {
+    private static _indexes: WeakMap<ISeriesApi<SeriesType>, TimeIndex> = new WeakMap();
+
+    public times: number[];
+    private _listeners: Set<(after: number) => void> = new Set();
+
+    constructor(private _series: ISeriesApi<SeriesType>) {
+        this.times = _series.data().map((item) => item.time as number);
+    }
+
+    /**
+     * Returns the index shared by everything drawn on the series.
+     */
+    public static of(series: ISeriesApi<SeriesType>): TimeIndex {
+        let index = this._indexes.get(series);
+        if (!index) {
+            const created = new TimeIndex(series);
+            series.subscribeDataChanged((scope) => created._changed(scope));
+            this._indexes.set(series, index = created);
+        }
+        return index;
+    }
+
+    /**
+     * Calls the listener with the time after which logical indexes have moved, whenever the data of the series
+     * moves any, so drawings sharing the index are placed again without each keeping a copy of the times.
+     */
+    public subscribe(listener: (after: number) => void) {
+        this._listeners.add(listener);
+    }
+
+    public unsubscribe(listener: (after: number) => void) {
+        this._listeners.delete(listener);
+    }
+
+    private _changed(scope: DataChangedScope) {
+        const after = this.sync(scope);
+        if (after === null) return;
+        this._listeners.forEach((listener) => listener(after));
+    }
+
+    /**
+     * Brings the index up to date after the data of the series changed.
+     * @returns The time after which logical indexes have moved, or null if none have.
+     */
+    public sync(scope: DataChangedScope): number | null {
+        if (scope === 'update') {
+            // Updates only ever touch the last bar, so only a new bar moves the times past it.
+            const bar = this._series.dataByIndex(this.times.length);
+            if (!bar) return null;
+            const last = this.times[this.times.length - 1] ?? -Infinity;
+            this.times.push(bar.time as number);
+            // With a single bar there was no interval to place the other times with.
+            return this.times.length > 2 ? last : -Infinity;
+        }
+        this.times = this._series.data().map((item) => item.time as number);
+        return -Infinity;
+    }
+
+    public logical(time: number): number | null {
+        return logicalIndex(this.times, time);
+    }
+
+    /**
+     * Builds drawing points from times and prices, resolving every time in one pass.
+     */
+    public points(times: (number | null)[], prices: number[]): Point[] {
+        return prices.map((price, i) => {
+            const time = times[i] ?? null;
+            return {
+                time: time as Time | null,
+                logical: (time === null ? null : this.logical(time)) as Logical,
+                price,
+            };
+        });
+    }
+
+    /**
+     * Moves many drawings at once, given the times and prices of each drawing's points.
+     */
+    public updateDrawings(drawings: Drawing[], times: (number | null)[][], prices: number[][]) {
+        drawings.forEach((drawing, i) => drawing.updatePoints(...this.points(times[i], prices[i])));
+    }
+}
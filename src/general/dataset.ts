@@ -0,0 +1,187 @@
+import { ISeriesApi, SeriesType } from "lightweight-charts";
+import { Handler } from "./handler";
+
+/**
+ * A dictionary-encoded column, where each row holds an index into the palette.
+ */
+export interface EncodedColumn {
+    palette: any[];
+    codes: number[];
+}
+
+/**
+ * A fixed-frequency time column, rebuilt from its start and interval when read.
+ * Each gap is a `[row, time]` pair, from which the column continues at the same interval.
+ */
+export interface RegularColumn {
+    start: number;
+    interval: number;
+    length: number;
+    gaps: [number, number][];
+}
+
+export type DatasetColumn = any[] | EncodedColumn | RegularColumn;
+
+function isRegular(column: DatasetColumn): column is RegularColumn {
+    return !Array.isArray(column) && 'interval' in column;
+}
+
+function columnLength(column: DatasetColumn): number {
+    if (Array.isArray(column)) return column.length;
+    return isRegular(column) ? column.length : column.codes.length;
+}
+
+function valueAt(column: DatasetColumn, index: number): any {
+    if (Array.isArray(column)) return column[index];
+    if (!isRegular(column)) return column.palette[column.codes[index]];
+    // Find the last gap at or before the row.
+    let [row, time] = [0, column.start];
+    let low = 0, high = column.gaps.length - 1;
+    while (low <= high) {
+        const mid = (low + high) >> 1;
+        if (column.gaps[mid][0] <= index) {
+            [row, time] = column.gaps[mid];
+            low = mid + 1;
+        }
+        else high = mid - 1;
+    }
+    return time + (index - row) * column.interval;
+}
+
+/**
+ * Colors derived from the dataset rather than shipped with it,
+ * using `upColor` when the close is above the open and `downColor` otherwise.
+ */
+export interface DatasetColors {
+    upColor: string;
+    downColor: string;
+}
+
+export interface DatasetBinding {
+    series: ISeriesApi<SeriesType>;
+    mapping: Record<string, string>; // data item key -> dataset column
+    colors?: DatasetColors;
+}
+
+function decodeColumn(column: any): DatasetColumn {
+    if (Array.isArray(column) || 'interval' in column) return column;
+    // Codes are shipped as base64 encoded uint8 values.
+    const codes = Array.from(atob(column.codes), (char) => char.charCodeAt(0));
+    return { palette: column.palette, codes };
+}
+
+function expandColumn(column: DatasetColumn): any[] {
+    if (Array.isArray(column)) return column;
+    if (isRegular(column)) return Array.from({ length: column.length }, (_, index) => valueAt(column, index));
+    return column.codes.map((code) => column.palette[code]);
+}
+
+function spliceColumn(column: DatasetColumn, from: number, values: DatasetColumn): DatasetColumn {
+    if (isRegular(column) && (Array.isArray(values) || isRegular(values))) {
+        const gaps = column.gaps.filter(([row]) => row < from);
+        const spliced = { start: column.start, interval: column.interval, length: from + columnLength(values), gaps };
+        if (isRegular(values) && values.interval === column.interval) {
+            if (valueAt(spliced, from) !== values.start) gaps.push([from, values.start]);
+            gaps.push(...values.gaps.map(([row, time]) => [row + from, time] as [number, number]));
+        }
+        else {
+            // Rows which don't follow on from the previous one become gaps.
+            expandColumn(values).forEach((time, index) => {
+                if (valueAt(spliced, from + index) !== time) gaps.push([from + index, time]);
+            });
+        }
+        return spliced;
+    }
+    if (Array.isArray(column) || Array.isArray(values) || isRegular(column) || isRegular(values)) {
+        return [...expandColumn(column).slice(0, from), ...expandColumn(values)];
+    }
+    // Re-index the new codes into the existing palette.
+    const palette = [...column.palette];
+    const remap = values.palette.map((value) => {
+        const index = palette.indexOf(value);
+        return index !== -1 ? index : palette.push(value) - 1;
+    });
+    return { palette, codes: [...column.codes.slice(0, from), ...values.codes.map((code) => remap[code])] };
+}
+
+function sameBinding(a: DatasetBinding, b: DatasetBinding) {
+    return a.series === b.series
+        && JSON.stringify(a.mapping) === JSON.stringify(b.mapping)
+        && JSON.stringify(a.colors) === JSON.stringify(b.colors);
+}
+
+/**
+ * A columnar frame shared by every series built from it.
+ * The columns are shipped once, and each bound series picks the columns it needs.
+ */
+export class Dataset {
+    public columns: Record<string, DatasetColumn> = {};
+    public bindings: DatasetBinding[] = [];
+
+    get length(): number {
+        const time = this.columns.time;
+        return time ? columnLength(time) : 0;
+    }
+
+    /**
+     * Builds the data items of a series from the dataset.
+     * Null values are omitted, so a row without a value becomes whitespace data.
+     * Encoded columns are expanded here, one row at a time.
+     */
+    public rows(mapping: Record<string, string>, from: number = 0, colors?: DatasetColors): any[] {
+        const entries = Object.entries(mapping)
+            .filter(([_, column]) => column in this.columns)
+            .map(([key, column]) => [key, this.columns[column]] as [string, DatasetColumn]);
+        const opens = colors && this.columns.open ? expandColumn(this.columns.open) : null;
+        const closes = colors && this.columns.close ? expandColumn(this.columns.close) : null;
+        const rows = [];
+        const length = this.length;
+        for (let i = from; i < length; i++) {
+            const row: any = {};
+            for (const [key, column] of entries) {
+                const value = valueAt(column, i);
+                if (value !== null && value !== undefined) row[key] = value;
+            }
+            if (colors && opens && closes) {
+                row.color = closes[i] > opens[i] ? colors.upColor : colors.downColor;
+            }
+            rows.push(row);
+        }
+        return rows;
+    }
+
+    /**
+     * Replaces the dataset from the given row onwards and refreshes the bound series.
+     * Series which were already bound the same way only receive the changed rows.
+     * @param from - The index of the first changed row.
+     * @param columns - The rows from `from` onwards, by column.
+     * @param bindings - The series built from the dataset, the columns they use and their derived colors.
+     */
+    public set(
+        from: number,
+        columns: Record<string, any>,
+        bindings: [ISeriesApi<SeriesType>, Record<string, string>, DatasetColors?][]
+    ) {
+        const decoded = Object.entries(columns).map(([column, values]) => [column, decodeColumn(values)] as [string, DatasetColumn]);
+        if (!from) {
+            this.columns = Object.fromEntries(decoded);
+        }
+        else {
+            for (const [column, values] of decoded) {
+                this.columns[column] = spliceColumn(this.columns[column], from, values);
+            }
+        }
+        const previous = this.bindings;
+        this.bindings = bindings.map(([series, mapping, colors]) => ({ series, mapping, colors }));
+
+        for (const binding of this.bindings) {
+            const { series, mapping, colors } = binding;
+            if (from && previous.some((bound) => sameBinding(bound, binding))) {
+                Handler.mergeData(series, from, this.rows(mapping, from, colors));
+            }
+            else {
+                series.setData(this.rows(mapping, 0, colors));
+            }
+        }
+    }
+}
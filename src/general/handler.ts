@@ -15,6 +15,7 @@ import {
 
 } from "lightweight-charts";
 import { FillArea } from "../fill-area/fill-area";
+import { Dataset } from "./dataset";
 import { GlobalParams, globalParamInit, LegendItem } from "./global-params";
 import { Legend } from "./legend";
 import { ToolBox } from "./toolbox";
@@ -66,6 +67,9 @@ export class Handler {
 
     public series: ISeriesApiExtended;
     public volumeSeries: ISeriesApiExtended;
+    public volumeUpColor: string = 'rgba(83,141,131,0.8)';
+    public volumeDownColor: string = 'rgba(200,127,130,0.8)';
+    public dataset: Dataset = new Dataset();
 
     public legend: Legend;
     private _topBar: TopBar | undefined;
@@ -635,6 +639,39 @@ export class Handler {
         ]);
     }
 
+    /**
+     * Updates the candle and volume series from a single bar.
+     * The volume bar is colored from the candle, so only the bar itself is shipped.
+     */
+    public updateBar(bar: { time: Time, open: number, high: number, low: number, close: number, volume?: number }) {
+        const { volume, ...candle } = bar;
+        this.series.update(candle);
+        if (volume === undefined) return;
+        this.volumeSeries.update({
+            time: bar.time,
+            value: volume,
+            color: bar.close > bar.open ? this.volumeUpColor : this.volumeDownColor,
+        });
+    }
+
+    /**
+     * Replaces the data of a series from the given index onwards.
+     * A tail which only rewrites the last bar or appends new ones is applied through `update`,
+     * otherwise the unchanged head is reused and the series is set once.
+     * @param series - The series to update.
+     * @param from - The index of the first changed item.
+     * @param tail - The items replacing everything from `from`.
+     */
+    public static mergeData(series: ISeriesApi<SeriesType>, from: number, tail: any[]) {
+        const data = series.data();
+        const replacesLast = from === data.length - 1 && tail.length > 0 && tail[0].time === data[from].time;
+        if (from === data.length || replacesLast) {
+            tail.forEach((item) => series.update(item));
+        }
+        else {
+            series.setData([...data.slice(0, from), ...tail]);
+        }
+    }
 
     public static syncCharts(
         childChart: Handler,
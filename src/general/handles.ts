@@ -0,0 +1,5 @@
+/**
+ * The objects created from Python, by id.
+ * Python releases an object by deleting its entry.
+ */
+export const handles: Record<string, any> = {};
@@ -1,6 +1,9 @@
 // TODO this won't be necessary with ws
 
 export * from './handler';
+export * from './dataset';
+export * from './markers';
+export * from './handles';
 export * from './global-params';
 export * from './legend';
 export * from './table';
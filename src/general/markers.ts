@@ -0,0 +1,152 @@
+import { ISeriesApi, SeriesMarker, SeriesType, Time } from "lightweight-charts";
+
+export interface StoredMarker extends SeriesMarker<Time> {
+    id: string;
+    // The time the marker was placed at, before it was anchored to a bar.
+    requestedTime?: Time;
+}
+
+/**
+ * The markers of a series, kept sorted by time so ranges are found by binary search.
+ * Changes are applied as deltas, and the series is given its markers once per frame.
+ */
+export class MarkerStore {
+    private static _stores: WeakMap<ISeriesApi<SeriesType>, MarkerStore> = new WeakMap();
+
+    public markers: StoredMarker[] = [];
+    private _ids: Map<string, StoredMarker> = new Map();
+    private _frame: number | null = null;
+
+    constructor(public series: ISeriesApi<SeriesType>) {}
+
+    public static of(series: ISeriesApi<SeriesType>): MarkerStore {
+        let store = this._stores.get(series);
+        if (!store) {
+            store = new MarkerStore(series);
+            this._stores.set(series, store);
+        }
+        return store;
+    }
+
+    /**
+     * Returns the index of the first marker at or after the given time,
+     * or after it if `after` is set.
+     */
+    private _search(time: number, after: boolean = false): number {
+        let low = 0, high = this.markers.length;
+        while (low < high) {
+            const mid = (low + high) >> 1;
+            const value = this.markers[mid].time as number;
+            if (value < time || (after && value === time)) low = mid + 1;
+            else high = mid;
+        }
+        return low;
+    }
+
+    private _indexOf(marker: StoredMarker): number {
+        for (let i = this._search(marker.time as number); i < this.markers.length; i++) {
+            if (this.markers[i] === marker) return i;
+        }
+        return -1;
+    }
+
+    private _insert(marker: StoredMarker) {
+        this.markers.splice(this._search(marker.time as number, true), 0, marker);
+    }
+
+    private _render() {
+        if (this._frame !== null) return;
+        this._frame = window.requestAnimationFrame(() => {
+            this._frame = null;
+            this.series.setMarkers(this.markers.map(({ id, requestedTime, ...marker }) => marker));
+        });
+    }
+
+    public add(markers: StoredMarker[]) {
+        this.remove(markers.filter((marker) => this._ids.has(marker.id)).map((marker) => marker.id));
+        markers.forEach((marker) => this._ids.set(marker.id, marker));
+        // Large batches are cheaper to sort once than to insert one by one.
+        if (markers.length > 64) {
+            this.markers.push(...markers);
+            this.markers.sort((a, b) => (a.time as number) - (b.time as number));
+        }
+        else {
+            markers.forEach((marker) => this._insert(marker));
+        }
+        this._render();
+    }
+
+    /**
+     * Adds markers given by column; null values are left out of the markers.
+     */
+    public addColumns(columns: Record<string, any[]>) {
+        const entries = Object.entries(columns);
+        const markers = columns.id.map((_, i) => {
+            const marker: any = {};
+            for (const [key, values] of entries) {
+                if (values[i] !== null && values[i] !== undefined) marker[key] = values[i];
+            }
+            return marker as StoredMarker;
+        });
+        this.add(markers);
+    }
+
+    public update(id: string, fields: Partial<StoredMarker>) {
+        const marker = this._ids.get(id);
+        if (!marker) return;
+        if (fields.time !== undefined && fields.time !== marker.time) {
+            this.markers.splice(this._indexOf(marker), 1);
+            delete marker.requestedTime;
+            Object.assign(marker, fields);
+            this._insert(marker);
+        }
+        else {
+            Object.assign(marker, fields);
+        }
+        this._render();
+    }
+
+    public remove(ids: string[]) {
+        for (const id of ids) {
+            const marker = this._ids.get(id);
+            if (!marker) continue;
+            this.markers.splice(this._indexOf(marker), 1);
+            this._ids.delete(id);
+        }
+        this._render();
+    }
+
+    public clear() {
+        this.markers = [];
+        this._ids.clear();
+        this._render();
+    }
+
+    /**
+     * Moves each marker onto the last bar at or before the time it was placed at,
+     * so markers stay on the chart once its data has been replaced.
+     * Only the first `prefix` bars are known to be unchanged, so the markers anchored
+     * before the last of them stay where they are; the rest cost a binary search each.
+     */
+    public reanchor(prefix: number = 0) {
+        const data = this.series.data();
+        if (!data.length) return;
+        const start = prefix > 0 ? this._search(data[Math.min(prefix, data.length) - 1].time as number) : 0;
+        for (let i = start; i < this.markers.length; i++) {
+            const marker = this.markers[i];
+            const time = (marker.requestedTime ?? marker.time) as number;
+            let low = 0, high = data.length;
+            while (low < high) {
+                const mid = (low + high) >> 1;
+                if ((data[mid].time as number) <= time) low = mid + 1;
+                else high = mid;
+            }
+            const anchor = data[Math.max(low - 1, 0)].time;
+            if (anchor !== time) marker.requestedTime = time as Time;
+            else delete marker.requestedTime;
+            marker.time = anchor;
+        }
+        // Anchoring never reorders the markers, so they stay sorted.
+        this._render();
+    }
+}
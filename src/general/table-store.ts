@@ -0,0 +1,107 @@
+export interface TableColumns {
+    keys: string[];
+    columns: { [column: string]: string[] };
+}
+
+export interface TablePatch {
+    delete: string[];
+    insert: TableColumns;
+    // The keys of the changed cells of each column, followed by their new values.
+    update: { [column: string]: [string[], string[]] };
+    // The keys of every row in their bound order, when inserting at the end does not give it.
+    order?: string[];
+}
+
+/**
+ * A columnar copy of the rows bound to a table, along with the order in
+ * which they are shown once sorted and filtered.
+ */
+export class TableStore {
+    public keys: string[] = [];
+    public columns: { [column: string]: string[] } = {};
+    public order: number[] = [];
+
+    private _positions: Map<string, number> = new Map();
+    private _sort: { column: string, ascending: boolean } | null = null;
+    private _filter: { column: string, query: string } | null = null;
+
+    get sortColumn() {
+        return this._sort;
+    }
+
+    clear() {
+        this.set({ keys: [], columns: {} });
+    }
+
+    set(data: TableColumns) {
+        this.keys = data.keys;
+        this.columns = data.columns;
+        this._index();
+        this.refresh();
+    }
+
+    patch(patch: TablePatch) {
+        if (patch.delete.length) {
+            const deleted = new Set(patch.delete.map((key) => this._positions.get(key)));
+            const kept = (_: string, i: number) => !deleted.has(i);
+            this.keys = this.keys.filter(kept);
+            for (const column in this.columns) this.columns[column] = this.columns[column].filter(kept);
+        }
+        this.keys.push(...patch.insert.keys);
+        for (const column in this.columns) this.columns[column].push(...(patch.insert.columns[column] || []));
+        this._index();
+        if (patch.order) {
+            const positions = patch.order.map((key) => this._positions.get(key)!);
+            this.keys = patch.order;
+            for (const column in this.columns) {
+                const cells = this.columns[column];
+                this.columns[column] = positions.map((i) => cells[i]);
+            }
+            this._index();
+        }
+
+        for (const column in patch.update) {
+            const [keys, values] = patch.update[column];
+            const cells = this.columns[column];
+            keys.forEach((key, i) => cells[this._positions.get(key)!] = values[i]);
+        }
+        this.refresh();
+    }
+
+    sortBy(column: string | null, ascending = true) {
+        this._sort = column === null ? null : { column, ascending };
+        this.refresh();
+    }
+
+    filterBy(column: string | null, query = '') {
+        this._filter = column === null || !query ? null : { column, query: query.toLowerCase() };
+        this.refresh();
+    }
+
+    private _index() {
+        this._positions = new Map(this.keys.map((key, i) => [key, i]));
+    }
+
+    /**
+     * Recomputes the order of the rows after their values have changed.
+     */
+    refresh() {
+        let order = this.keys.map((_, i) => i);
+        if (this._filter && this.columns[this._filter.column]) {
+            const { column, query } = this._filter;
+            const cells = this.columns[column];
+            order = order.filter((i) => cells[i].toLowerCase().includes(query));
+        }
+        if (this._sort && this.columns[this._sort.column]) {
+            const cells = this.columns[this._sort.column];
+            const numbers = cells.map((cell) => parseFloat(cell));
+            const sign = this._sort.ascending ? 1 : -1;
+            order.sort((a, b) => {
+                const x = numbers[a], y = numbers[b];
+                const diff = isNaN(x) || isNaN(y) ? cells[a].localeCompare(cells[b]) : x - y;
+                return sign * diff || a - b;
+            });
+        }
+        this.order = order;
+    }
+}
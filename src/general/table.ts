@@ -1,4 +1,5 @@
 import { GlobalParams } from "./global-params";
+import { TableColumns, TablePatch, TableStore } from "./table-store";
 
 declare const window: GlobalParams
 
@@ -7,6 +8,15 @@ interface RowDictionary {
     [key: number]: HTMLTableRowElement;
 }
 
+interface CellChanges<T> {
+    [rowId: string]: { [column: string]: T };
+}
+
+// Bound rows all have this height, so the rows in view are found from the scroll position.
+const ROW_HEIGHT = 22;
+// The rows drawn beyond each edge of the view, so that scrolling doesn't show gaps.
+const OVERSCAN = 10;
+
 
 export class Table {
     private _div: HTMLDivElement;
@@ -19,6 +29,19 @@ export class Table {
     private headings: string[];
     private widths: string[];
     private alignments: string[];
+    private _scroller: HTMLDivElement;
+    private _headingCells: HTMLTableCellElement[] = [];
+
+    // The rows bound with bindData, of which only those in view have elements.
+    private _store: TableStore | null = null;
+    private _body: HTMLTableSectionElement | null = null;
+    private _spacers: HTMLTableCellElement[] = [];
+    private _pool: HTMLTableRowElement[] = [];
+    private _returnClickedCell = false;
+    private _renderPending = false;
+
+    // The text around the value of each formatted column.
+    public formats: { [column: string]: string[] } = {};
 
     public footer: HTMLDivElement[] | undefined;
     public header: HTMLDivElement[] | undefined;
@@ -74,6 +97,7 @@ export class Table {
             th.style.backgroundColor = backgroundColors.length > 0 ? backgroundColors[i] : tableBackgroundColor
             th.style.color = textColors[i]
             row.appendChild(th)
+            this._headingCells.push(th)
         }
 
         let overflowWrapper = document.createElement('div')
@@ -82,6 +106,7 @@ export class Table {
         overflowWrapper.style.backgroundColor = tableBackgroundColor
         overflowWrapper.appendChild(this.table)
         this._div.appendChild(overflowWrapper)
+        this._scroller = overflowWrapper
         window.containerDiv.appendChild(this._div)
 
         if (!draggable) return
@@ -147,6 +172,10 @@ export class Table {
         for (let i = 0; i < numRows; i++)
             this.table.deleteRow(-1)
         this.rows = {}
+        if (this._store) {
+            this._store.clear();
+            this._requestRender();
+        }
     }
 
     private _getCell(rowId: number, column: string) {
@@ -162,6 +191,126 @@ export class Table {
         (style as any)[styleAttribute] = value;
     }
 
+    /**
+     * Applies the values and styles of every cell changed since the last update.
+     */
+    updateCells(values: CellChanges<string>, styles: CellChanges<{ [style: string]: string }>) {
+        for (const rowId in values) {
+            for (const column in values[rowId]) {
+                const format = this.formats[column];
+                const value = values[rowId][column];
+                this._getCell(+rowId, column).textContent = format ? format.join(value) : value;
+            }
+        }
+        for (const rowId in styles) {
+            for (const column in styles[rowId]) {
+                Object.assign(this._getCell(+rowId, column).style, styles[rowId][column]);
+            }
+        }
+    }
+
+    /**
+     * Shows the given rows, drawing only those in view. Headings can then be clicked to sort the rows.
+     */
+    bindData(data: TableColumns, returnClickedCell = false) {
+        if (!this._store) {
+            this._store = new TableStore();
+            this._body = this.table.createTBody();
+            this._spacers = [0, 1].map(() => {
+                const cell = this._body!.insertRow().insertCell();
+                cell.colSpan = this.headings.length;
+                cell.style.padding = '0';
+                return cell;
+            });
+            this._scroller.addEventListener('scroll', () => this._requestRender());
+            this._headingCells.forEach((th, i) => {
+                th.style.cursor = 'pointer';
+                th.addEventListener('click', () => {
+                    const sort = this._store!.sortColumn;
+                    const ascending = sort?.column !== this.headings[i] || !sort.ascending;
+                    this.sortData(this.headings[i], ascending);
+                });
+            });
+        }
+        this._returnClickedCell = returnClickedCell;
+        this._store.set(data);
+        this._requestRender();
+    }
+
+    patchData(patch: TablePatch) {
+        this._store?.patch(patch);
+        this._requestRender();
+    }
+
+    sortData(column: string | null, ascending = true) {
+        this._store?.sortBy(column, ascending);
+        this._requestRender();
+    }
+
+    filterData(column: string | null, query = '') {
+        this._store?.filterBy(column, query);
+        this._requestRender();
+    }
+
+    private _requestRender() {
+        if (this._renderPending) return;
+        this._renderPending = true;
+        requestAnimationFrame(() => {
+            this._renderPending = false;
+            this._render();
+        });
+    }
+
+    private _poolRow() {
+        const row = document.createElement('tr');
+        row.style.cursor = 'default';
+        row.style.height = ROW_HEIGHT + 'px';
+        for (let i = 0; i < this.headings.length; i++) {
+            const cell = row.insertCell();
+            cell.style.width = this.widths[i];
+            cell.style.textAlign = this.alignments[i];
+            cell.style.border = this.borderWidth+'px solid '+this.borderColor;
+            cell.style.padding = '0';
+            cell.style.whiteSpace = 'nowrap';
+            cell.style.overflow = 'hidden';
+        }
+        row.addEventListener('mouseover', () => row.style.backgroundColor = 'rgba(60, 60, 60, 0.6)');
+        row.addEventListener('mouseout', () => row.style.backgroundColor = 'transparent');
+        row.addEventListener('click', (event) => {
+            const cell = (event.target as HTMLElement).closest('td') as HTMLTableCellElement | null;
+            const heading = this._returnClickedCell && cell ? `;;;${this.headings[cell.cellIndex]}` : '';
+            window.callbackFunction(`${this.callbackName}_~_${row.dataset.key}${heading}`);
+        });
+        return row;
+    }
+
+    private _render() {
+        const store = this._store!;
+        const total = store.order.length;
+        const first = Math.max(0, Math.floor(this._scroller.scrollTop / ROW_HEIGHT) - OVERSCAN);
+        const last = Math.min(total, first + Math.ceil(this._scroller.clientHeight / ROW_HEIGHT) + 2 * OVERSCAN);
+
+        while (this._pool.length < last - first) {
+            const row = this._poolRow();
+            this._body!.insertBefore(row, this._spacers[1].parentElement);
+            this._pool.push(row);
+        }
+        this._spacers[0].style.height = first * ROW_HEIGHT + 'px';
+        this._spacers[1].style.height = (total - last) * ROW_HEIGHT + 'px';
+
+        this._pool.forEach((row, i) => {
+            const index = store.order[first + i];
+            row.style.display = index === undefined ? 'none' : '';
+            if (index === undefined) return;
+            row.dataset.key = store.keys[index];
+            this.headings.forEach((heading, j) => {
+                const value = store.columns[heading]?.[index] ?? '';
+                const format = this.formats[heading];
+                row.cells[j].textContent = format && value ? format.join(value) : value;
+            });
+        });
+    }
+
     makeSection(id: string, type: string, numBoxes: number, func=false) {
         let section = document.createElement('div')
         section.style.display = 'flex'
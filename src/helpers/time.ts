@@ -32,3 +32,23 @@ export function formattedDateAndTime(timestamp: number | undefined): [string, st
 
 	return [formattedDate, formattedTime];
 }
+
+/**
+ * Returns the logical index of a time among the sorted times of a series' bars.
+ * Times between two bars are interpolated, and times past either end are
+ * extrapolated at the interval of the nearest two bars.
+ */
+export function logicalIndex(times: number[], time: number): number | null {
+	const length = times.length;
+	if (!length) return null;
+	if (length === 1) return 0;
+	let low = 0, high = length;
+	while (low < high) {
+		const mid = (low + high) >> 1;
+		if (times[mid] < time) low = mid + 1;
+		else high = mid;
+	}
+	if (times[low] === time) return low;
+	const right = Math.min(Math.max(low, 1), length - 1);
+	return right - 1 + (time - times[right - 1]) / (times[right] - times[right - 1]);
+}
@@ -35,6 +35,10 @@ export class HorizontalLine extends Drawing {
         return [this._point];
     }
 
+    public bounds() {
+        return { minLogical: -Infinity, maxLogical: Infinity, minPrice: this._point.price, maxPrice: this._point.price };
+    }
+
     public updatePoints(...points: (Point | null)[]) {
         for (const p of points) if (p) this._point.price = p.price;
         this.requestUpdate();
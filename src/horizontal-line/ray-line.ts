@@ -14,6 +14,11 @@ export class RayLine extends HorizontalLine {
         this._point.time = point.time;
     }
 
+    public bounds() {
+        if (this._point.logical == null) return null;
+        return { ...super.bounds(), minLogical: this._point.logical as number };
+    }
+
     public updatePoints(...points: (Point | null)[]) {
         for (const p of points) if (p) this._point = p;
         this.requestUpdate();
@@ -7,3 +7,7 @@ export * from './vertical-line/vertical-line';
 export * from './ohlc-series/ohlc-series';
 export * from './tooltip/tooltip';
 export * from './fill-area/fill-area'
+export * from './drawing-layer/drawing-layer';
+export * from './span-layer/span-layer';
+export * from './drawing/time-index';
+export * from './drawing/drawing-index';
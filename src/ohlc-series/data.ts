@@ -12,11 +12,11 @@ export interface ohlcSeriesData extends CandlestickData {
     low: number;      // Lowest price
     close: number;    // Closing price
 
-    // Optional customization properties
-    color?: string;         // Optional fill color for the candle body
-    borderColor?: string;   // Optional color for the candle border
-    wickColor?: string;     // Optional color for the candle wicks
-    shape?: string;         // Optional shape (e.g., 'Rectangle', 'Rounded', 'Ellipse', 'Arrow', '3d', 'Polygon')
+    // Optional customization properties, either given directly or as an index into the series palettes
+    color?: string | number;         // Optional fill color for the candle body
+    borderColor?: string | number;   // Optional color for the candle border
+    wickColor?: string | number;     // Optional color for the candle wicks
+    shape?: string | number;         // Optional shape (e.g., 'Rectangle', 'Rounded', 'Ellipse', 'Arrow', '3d', 'Polygon')
     lineStyle?: number;     // Optional line style (e.g., solid, dashed)
     lineWidth?: number;     // Optional line width for the border or wick
 }
@@ -25,6 +25,7 @@ export interface ohlcSeriesOptions
 	barSpacing: number;
 	lineStyle: LineStyle;
 	lineWidth: LineWidth;
+	palettes: Record<string, (string | null)[]>; // Values of the dictionary-encoded style fields
 		}
 	//upperUpColor: string|undefined
 	//upperDownColor: string|undefined
@@ -47,7 +48,8 @@ export const ohlcdefaultOptions: ohlcSeriesOptions = {
 	chandelierSize: 1,
 	barSpacing: 0.8,
 	lineStyle: 0 as LineStyle,
-	lineWidth: 2 as  LineWidth
+	lineWidth: 2 as  LineWidth,
+	palettes: {},
 
 } as const;
 	//upperUpColor: undefined,
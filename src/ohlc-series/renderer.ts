@@ -166,18 +166,20 @@ export class BarDataAggregator {
 		// Determine if the aggregated bar represents an upward movement.
 		const isUp = closePrice > openPrice;
 
-		// Explicitly map colors based on `isUp` status.
-		const color = isUp
-			? (this._options?.upColor || 'rgba(0,255,0,0.333)')
-			: (this._options?.downColor || 'rgba(255,0,0,0.333)');
+		// Per-bar colors of the last bar take precedence, otherwise map colors based on `isUp` status,
+		// falling back to the series' own color, borderColor and wickColor.
+		const lastBar = bucket[bucket.length - 1];
+		const color = lastBar.color || (isUp
+			? (this._options?.upColor || this._options?.color || 'rgba(0,255,0,0.333)')
+			: (this._options?.downColor || this._options?.color || 'rgba(255,0,0,0.333)'));
 
-		const borderColor = isUp
-			? (this._options?.borderUpColor || setOpacity(color, 1))
-			: (this._options?.borderDownColor || setOpacity(color, 1));
+		const borderColor = lastBar.borderColor || (isUp
+			? (this._options?.borderUpColor || this._options?.borderColor || setOpacity(color, 1))
+			: (this._options?.borderDownColor || this._options?.borderColor || setOpacity(color, 1)));
 
-		const wickColor = isUp
-			? (this._options?.wickUpColor || borderColor)
-			: (this._options?.wickDownColor || borderColor);
+		const wickColor = lastBar.wickColor || (isUp
+			? (this._options?.wickUpColor || this._options?.wickColor || borderColor)
+			: (this._options?.wickDownColor || this._options?.wickColor || borderColor));
 
 
 		// Aggregate lineStyle similarly to other properties.
@@ -305,6 +307,11 @@ export class ohlcSeriesRenderer<
 			return;
 		}
 
+		// Style fields may be dictionary-encoded, in which case they hold an index into the series palettes.
+		const palettes = this._options.palettes ?? {};
+		const style = (key: string, value: string | number | undefined): string | undefined =>
+			typeof value === 'number' ? palettes[key]?.[value] ?? undefined : value;
+
 		// Transform raw data into BarItem objects with initial styling.
 		const bars: BarItem[] = this._data.bars.map((bar, index) => ({
 			open: bar.originalData?.open ?? 0,
@@ -313,7 +320,7 @@ export class ohlcSeriesRenderer<
 			close: bar.originalData?.close ?? 0,
 			x: bar.x,
 			shape:
-				(bar.originalData?.shape ??
+				(style('shape', bar.originalData?.shape) ??
 					this._options?.shape ??
 					'Rectangle') as CandleShape,
 			lineStyle:
@@ -327,9 +334,9 @@ export class ohlcSeriesRenderer<
 			isUp:
 				(bar.originalData?.close ?? 0) >=
 				(bar.originalData?.open ?? 0),
-			color: this._options?.color ?? 'rgba(0,0,0,0)',
-			borderColor: this._options?.borderColor ?? 'rgba(0,0,0,0)',
-			wickColor: this._options?.wickColor ?? 'rgba(0,0,0,0)',
+			color: style('color', bar.originalData?.color) ?? '',
+			borderColor: style('borderColor', bar.originalData?.borderColor) ?? '',
+			wickColor: style('wickColor', bar.originalData?.wickColor) ?? '',
 			startIndex: index,
 			endIndex: index,
 		}));
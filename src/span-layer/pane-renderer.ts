@@ -0,0 +1,28 @@
+import { CanvasRenderingTarget2D } from "fancy-canvas";
+import { ISeriesPrimitivePaneRenderer } from "lightweight-charts";
+
+export class SpanLayerPaneRenderer implements ISeriesPrimitivePaneRenderer {
+    _fills: Map<string, number[]>;
+
+    constructor(fills: Map<string, number[]>) {
+        this._fills = fills;
+    }
+
+    draw() {}
+
+    drawBackground(target: CanvasRenderingTarget2D) {
+        target.useBitmapCoordinateSpace(scope => {
+            const ctx = scope.context;
+            ctx.scale(scope.horizontalPixelRatio, scope.verticalPixelRatio);
+            const height = scope.mediaSize.height;
+            for (const [color, rects] of this._fills) {
+                ctx.fillStyle = color;
+                ctx.beginPath();
+                for (let i = 0; i < rects.length; i += 2) {
+                    ctx.rect(rects[i], 0, rects[i + 1], height);
+                }
+                ctx.fill();
+            }
+        });
+    }
+}
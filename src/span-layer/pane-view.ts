@@ -0,0 +1,39 @@
+import { ISeriesPrimitivePaneView } from "lightweight-charts";
+import { SpanLayer } from "./span-layer";
+import { SpanLayerPaneRenderer } from "./pane-renderer";
+
+export class SpanLayerPaneView implements ISeriesPrimitivePaneView {
+    _source: SpanLayer;
+    // color -> x, width for each visible span
+    _fills: Map<string, number[]> = new Map();
+
+    constructor(source: SpanLayer) {
+        this._source = source;
+    }
+
+    update() {
+        this._fills = new Map();
+        const timeScale = this._source.chart.timeScale();
+        const range = timeScale.getVisibleLogicalRange();
+        if (!range) return;
+        const origin = timeScale.logicalToCoordinate(0 as any) ?? 0;
+        const halfSpacing = ((timeScale.logicalToCoordinate(1 as any) ?? origin) - origin) / 2;
+
+        // Each span covers its first and last bars in full.
+        for (const span of this._source.visible(range.from - 1, range.to + 1)) {
+            const left = timeScale.logicalToCoordinate(span.logical as any);
+            const right = timeScale.logicalToCoordinate(span.endLogical as any);
+            if (left === null || right === null) continue;
+            let rects = this._fills.get(span.color);
+            if (!rects) {
+                rects = [];
+                this._fills.set(span.color, rects);
+            }
+            rects.push(left - halfSpacing, right - left + 2 * halfSpacing);
+        }
+    }
+
+    renderer() {
+        return new SpanLayerPaneRenderer(this._fills);
+    }
+}
@@ -0,0 +1,118 @@
+import { LogicalLayer } from "../drawing-layer/logical-layer";
+import { SpanLayerPaneView } from "./pane-view";
+
+export interface Span {
+    id: string;
+    start: number;
+    end: number;
+    color: string;
+    // Whether the span is snapped onto the nearest bars rather than placed between them.
+    round: boolean;
+    logical: number | null;
+    endLogical: number | null;
+}
+
+/**
+ * Shades any number of time spans across the full height of the pane.
+ * Spans are kept sorted by their start, so those within the visible range are found by binary search.
+ */
+export class SpanLayer extends LogicalLayer {
+    public spans: Span[] = [];
+    // The running maximum of the spans' end indexes, to find the first span which reaches a given index.
+    private _reach: number[] = [];
+    _paneViews: SpanLayerPaneView[];
+
+    constructor() {
+        super();
+        this._paneViews = [new SpanLayerPaneView(this)];
+    }
+
+    updateAllViews() {
+        this._paneViews.forEach((view) => view.update());
+    }
+
+    paneViews() {
+        return this._paneViews;
+    }
+
+    private _resolve(span: Span) {
+        span.logical = this._snap(span, this.logical(span.start));
+        span.endLogical = this._snap(span, this.logical(span.end));
+    }
+
+    private _snap(span: Span, logical: number | null): number | null {
+        return span.round && logical !== null ? Math.round(logical) : logical;
+    }
+
+    private _updateReach() {
+        let reach = -Infinity;
+        this._reach = this.spans.map((span) => (reach = Math.max(reach, span.endLogical ?? -Infinity)));
+    }
+
+    protected resolve(after: number) {
+        this.spans.forEach((span) => {
+            if (span.end > after) this._resolve(span);
+        });
+        this._updateReach();
+    }
+
+    /**
+     * Returns the spans which overlap the given logical range.
+     */
+    public visible(from: number, to: number): Span[] {
+        let low = 0, high = this.spans.length;
+        while (low < high) {
+            const mid = (low + high) >> 1;
+            if ((this.spans[mid].logical ?? Infinity) <= to) low = mid + 1;
+            else high = mid;
+        }
+        const end = low;
+        low = 0;
+        while (low < high) {
+            const mid = (low + high) >> 1;
+            if (this._reach[mid] < from) low = mid + 1;
+            else high = mid;
+        }
+        const visible = [];
+        for (let i = low; i < end; i++) {
+            if ((this.spans[i].endLogical ?? -Infinity) >= from) visible.push(this.spans[i]);
+        }
+        return visible;
+    }
+
+    /**
+     * Adds spans by column. The color is either an array with a color per span or a single color.
+     * Rounded spans start and end on the bars nearest to their times.
+     */
+    public add(columns: { id: string[], start: number[], end: number[], color: string | string[], round?: boolean }) {
+        columns.id.forEach((id, i) => {
+            const span: Span = {
+                id,
+                start: columns.start[i],
+                end: columns.end[i],
+                color: Array.isArray(columns.color) ? columns.color[i] : columns.color,
+                round: !!columns.round,
+                logical: null,
+                endLogical: null,
+            };
+            this._resolve(span);
+            this.spans.push(span);
+        });
+        this.spans.sort((a, b) => a.start - b.start);
+        this._updateReach();
+        this.requestUpdate();
+    }
+
+    public remove(ids: string[]) {
+        const removed = new Set(ids);
+        this.spans = this.spans.filter((span) => !removed.has(span.id));
+        this._updateReach();
+        this.requestUpdate();
+    }
+
+    public clear() {
+        this.spans = [];
+        this._reach = [];
+        this.requestUpdate();
+    }
+}
@@ -39,6 +39,12 @@ export class VerticalLine extends Drawing {
         return this._timeAxisViews;
     }
 
+    public bounds() {
+        const logical = this._point.logical as number | null;
+        if (logical == null) return null;
+        return { minLogical: logical, maxLogical: logical, minPrice: -Infinity, maxPrice: Infinity };
+    }
+
     public updatePoints(...points: (Point | null)[]) {
         for (const p of points) {
             if (!p) continue;
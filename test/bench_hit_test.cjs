@@ -0,0 +1,88 @@
+/*
+Measures how long finding the drawings under the mouse takes with the drawing index,
+against checking every drawing as the drawing tool did before. The bundle is loaded
+without a chart, so the drawings only have bounds.
+
+    node bench_hit_test.cjs [n]
+*/
+const fs = require('fs');
+const path = require('path');
+
+function stub() {
+    const f = function () { return stub(); };
+    return new Proxy(f, {
+        get: (t, k) => (k === Symbol.toPrimitive ? () => 0 : k in t ? t[k] : (t[k] = stub())),
+        apply: () => stub(),
+        construct: () => stub(),
+    });
+}
+global.window = global;
+global.document = stub();
+const src = fs.readFileSync(path.join(__dirname, '../lightweight_charts_esistjosh/js/bundle.js'), 'utf8');
+const Lib = new Function('LightweightCharts', src + '\nreturn Lib;')(stub());
+
+const BARS = 5000;
+const n = Number(process.argv[2] || 10000);
+
+function random(min, max) {
+    return min + Math.random() * (max - min);
+}
+
+function drawing(bounds) {
+    return { bounds: () => bounds };
+}
+
+const drawings = [];
+for (let i = 0; i < n; i++) {
+    const logical = random(0, BARS), price = random(90, 110);
+    switch (i % 4) {
+        case 0:
+            drawings.push(drawing({ minLogical: -Infinity, maxLogical: Infinity, minPrice: price, maxPrice: price }));
+            break;
+        case 1:
+            drawings.push(drawing({ minLogical: logical, maxLogical: logical, minPrice: -Infinity, maxPrice: Infinity }));
+            break;
+        default:
+            drawings.push(drawing({
+                minLogical: logical, maxLogical: logical + random(0, 50),
+                minPrice: price, maxPrice: price + random(0, 2),
+            }));
+    }
+}
+
+// The area within 12px of the mouse, on a chart showing 100 bars across 20 points of price.
+const queries = Array.from({ length: 1000 }, () => {
+    const logical = random(0, BARS), price = random(90, 110);
+    return { minLogical: logical - 1.5, maxLogical: logical + 1.5, minPrice: price - 0.3, maxPrice: price + 0.3 };
+});
+
+function overlaps(a, b) {
+    return a.minLogical <= b.maxLogical && b.minLogical <= a.maxLogical &&
+        a.minPrice <= b.maxPrice && b.minPrice <= a.maxPrice;
+}
+
+// Each drawing given the mouse move is hit tested, which is stood in for by a bounds check.
+function bench(name, func) {
+    const start = process.hrtime.bigint();
+    let visited = 0;
+    for (const query of queries) {
+        const tested = func(query);
+        for (const d of tested) overlaps(d.bounds(), query);
+        visited += tested.length ?? tested.size;
+    }
+    const elapsed = Number(process.hrtime.bigint() - start) / 1e6 / queries.length;
+    console.log(`${name.padEnd(24)}${elapsed.toFixed(4).padStart(10)} ms/move${(visited / queries.length).toFixed(0).padStart(10)} drawings`);
+}
+
+const index = new Lib.DrawingIndex();
+const start = process.hrtime.bigint();
+drawings.forEach((d) => index.update(d));
+console.log(`indexed ${n} drawings in ${(Number(process.hrtime.bigint() - start) / 1e6).toFixed(1)} ms`);
+
+for (const query of queries) {
+    const found = index.query(query);
+    if (drawings.some((d) => overlaps(d.bounds(), query) && !found.has(d))) throw new Error('the index missed a drawing');
+}
+
+bench('every drawing', () => drawings);
+bench('index', (query) => index.query(query));
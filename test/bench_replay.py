@@ -0,0 +1,63 @@
+"""
+Replays a synthetic tick log through the Polygon.io feed into charts, measuring the whole path
+from websocket message to chart update with no network.
+The charts are never shown, so the scripts are only collected rather than sent to a webview.
+
+    python bench_replay.py [messages] [speed]
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from lightweight_charts import Chart, polygon
+
+
+TICKERS = ['AAPL', 'MSFT', 'NVDA', 'TSLA', 'AMZN']
+
+
+def write_log(path, messages, quotes=20):
+    rng = np.random.default_rng(0)
+    start = int(pd.Timestamp('2024-01-02 14:30').value // 10**6)
+    recorder = polygon.TickRecorder(path)
+    for i in range(messages):
+        frame = [
+            {'ev': 'Q', 'sym': TICKERS[j % len(TICKERS)], 'bp': 100 + rng.normal(), 'ap': 100.01 + rng.normal(),
+             't': start + i * 50 + j}
+            for j in range(quotes)
+        ]
+        recorder.write('stocks', json.dumps(frame))
+    recorder.close()
+
+
+async def replay(path, speed):
+    charts = []
+    polygon.PolygonAPI.replay(path, speed)
+    for ticker in TICKERS:
+        chart = Chart()
+        chart.set(pd.DataFrame({'time': [pd.Timestamp('2024-01-02 14:29')], 'open': [100.], 'high': [100.],
+                                'low': [100.], 'close': [100.], 'volume': [0.]}))
+        await polygon.subscribe(ticker, 'stocks', chart.update_from_ticks, (True,))
+        charts.append(chart)
+    stats = await polygon._connections['stocks']
+    for chart in charts:
+        chart.exit()
+    return stats
+
+
+if __name__ == '__main__':
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    speed = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'ticks.log')
+        write_log(path, messages)
+        print(f'log size {os.path.getsize(path) / messages:,.0f} bytes/message')
+        stats = asyncio.run(replay(path, speed))
+    lags = stats['lags'] * 1000
+    print(f'{stats["messages"] / stats["seconds"]:>12,.0f} messages/s')
+    print(f'{stats["messages"] * 20 / stats["seconds"]:>12,.0f} quotes/s')
+    print(f'lag p50 {np.percentile(lags, 50):.2f}ms  p99 {np.percentile(lags, 99):.2f}ms  max {lags.max():.2f}ms')
@@ -0,0 +1,47 @@
+"""
+Measures how many updates per second the Python side of a chart can format and queue.
+The chart is never shown, so the scripts are only collected rather than sent to a webview.
+
+    python bench_update.py [n]
+"""
+import sys
+import time
+
+import pandas as pd
+
+from lightweight_charts import Chart
+from util import BARS
+
+
+COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
+
+
+def bench(name, func, rows):
+    chart = Chart()
+    chart.set(BARS[COLUMNS])
+    start = time.perf_counter()
+    for row in rows:
+        func(chart, row)
+    elapsed = time.perf_counter() - start
+    count = sum(len(row) for row in rows) if isinstance(rows[0], pd.DataFrame) else len(rows)
+    print(f'{name:<24}{count / elapsed:>12,.0f} updates/s')
+    chart.exit()
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    last = pd.to_datetime(BARS['date'].iloc[-1])
+    times = [last + pd.Timedelta(days=i // 10) for i in range(n)]
+    bars = [pd.Series({'time': t, 'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5, 'volume': 100.0}) for t in times]
+    ticks = [pd.Series({'time': t, 'price': 1.0 + i % 7, 'volume': 10.0}) for i, t in enumerate(times)]
+
+    bench('update(Series)', lambda chart, row: chart.update(row), bars)
+    bench('update_from_tick(Series)', lambda chart, row: chart.update_from_tick(row), ticks)
+    # Ticks arriving in frames of 100, as they are delivered from the Polygon.io websocket.
+    frames = [pd.DataFrame(ticks[i:i + 100]) for i in range(0, n, 100)]
+    bench('update_from_ticks(100)', lambda chart, frame: chart.update_from_ticks(frame), frames)
+    try:
+        bench('update(dict)', lambda chart, row: chart.update(row), [row.to_dict() for row in bars])
+        bench('update(tuple)', lambda chart, row: chart.update(row), [tuple(row) for row in bars])
+    except Exception as e:
+        print(f'Rows other than Series are not supported: {e!r}')
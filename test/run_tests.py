@@ -5,6 +5,9 @@ from test_table import TestTable
 from test_toolbox import TestToolBox
 from test_topbar import TestTopBar
 from test_chart import TestChart
+from test_lifecycle import TestLifecycle
+from test_polygon import TestPolygon
+from test_providers import TestProviders
 
 
 TEST_CASES = [
@@ -13,6 +16,9 @@ TEST_CASES = [
     TestToolBox,
     TestTopBar,
     TestChart,
+    TestLifecycle,
+    TestPolygon,
+    TestProviders,
 ]
 
 if __name__ == '__main__':
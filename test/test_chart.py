@@ -1,3 +1,6 @@
+import asyncio
+import json
+import threading
 import unittest
 import pandas as pd
 from util import BARS, Tester
@@ -16,6 +19,284 @@ class TestChart(Tester):
         self.assertEqual(result0, self.chart.lines()[0])
         self.assertEqual(result1, self.chart.lines()[1])
 
+    def test_set_sends_changed_tail(self):
+        self.chart.set(BARS)
+        changed = BARS.copy()
+        changed.loc[changed.index[-1], 'close'] += 1
+        scripts = len(self.chart.win.scripts)
+        self.chart.set(changed)
+        sent = self.chart.win.scripts[scripts:]
+        self.assertTrue(sent[0].startswith(f'{self.chart.id}.dataset.set({len(BARS) - 1},'))
+        self.assertNotIn('clearDrawings', ''.join(sent))
+
+    def test_set_resends_changed_history(self):
+        self.chart.set(BARS)
+        changed = BARS.copy()
+        changed.loc[changed.index[0], 'close'] += 1
+        scripts = len(self.chart.win.scripts)
+        self.chart.set(changed)
+        self.assertTrue(self.chart.win.scripts[scripts].startswith(f'{self.chart.id}.dataset.set(0,'))
+
+    def test_set_resends_updated_bars(self):
+        self.chart.set(BARS)
+        last = BARS.iloc[-1]
+        self.chart.update(pd.Series({'time': last['date'], 'open': last['open'], 'high': 999, 'low': last['low'],
+                                     'close': 999, 'volume': last['volume']}))
+        self.assertEqual(self.chart.candle_data['close'].iloc[-1], 999)
+        scripts = len(self.chart.win.scripts)
+        self.chart.set(BARS)
+        self.assertTrue(self.chart.win.scripts[scripts].startswith(f'{self.chart.id}.dataset.set({len(BARS) - 1},'))
+        self.assertIn(f'"close": [{float(last["close"])}]', self.chart.win.scripts[scripts])
+        self.assertEqual(self.chart.candle_data['close'].iloc[-1], last['close'])
+
+    def test_prepare_leaves_the_interval(self):
+        def bars(freq):
+            times = pd.date_range('2024-01-02 09:30', periods=20, freq=freq)
+            return pd.DataFrame({'time': times, 'open': 1., 'high': 2., 'low': 0., 'close': 1., 'volume': 1.})
+
+        minutes = self.chart.prepare(bars('1min'))
+        self.chart.prepare(bars('5min'))
+        self.chart.set(minutes)
+        self.assertEqual(self.chart._interval, 60)
+        self.chart.prepare(bars('5min'))
+        self.assertEqual(self.chart._interval, 60)
+
+    def test_drawings_are_handled_without_volume(self):
+        bars = BARS.drop(columns='volume')
+        self.chart.set(bars)
+        self.assertIn('clearDrawings', self.chart.win.scripts[-1])
+        changed = bars.copy()
+        changed.loc[changed.index[-1], 'close'] += 1
+        self.chart.set(changed)
+        self.assertIn('repositionOnTime', self.chart.win.scripts[-1])
+
+    def test_set_ships_line_columns_once(self):
+        line = self.chart.create_line('sma')
+        self.chart.set(BARS.assign(sma=BARS['close'].rolling(5).mean()))
+        script = next(s for s in self.chart.win.scripts if '.dataset.set(' in s)
+        self.assertEqual(script.count('"time": {"start"'), 1)
+        self.assertIn(f'[{line.id}.series, {{"time": "time", "value": "sma"}}]', script)
+        self.assertEqual(len(line.data), len(BARS))
+
+    def test_set_encodes_style_columns(self):
+        colors = BARS.assign(color=['red' if i % 2 else 'blue' for i in range(len(BARS))])
+        self.chart.set(colors)
+        script = next(s for s in self.chart.win.scripts if '.dataset.set(' in s)
+        self.assertIn('"color": {"palette": ["blue", "red", null], "codes": "', script)
+        self.assertNotIn('volume_color', script)
+        self.assertIn('{"upColor": "rgba(83,141,131,0.8)", "downColor": "rgba(200,127,130,0.8)"}', script)
+
+    def test_set_sends_regular_time_axis(self):
+        bars = BARS.head(10).assign(date=pd.date_range('2024-01-01', periods=10, freq='min', unit='ns'))
+        bars = bars.drop(index=4).reset_index(drop=True)
+        self.chart.set(bars)
+        script = next(s for s in self.chart.win.scripts if '.dataset.set(' in s)
+        self.assertNotIn('"time": [', script)
+        self.assertIn('"length": 9, "gaps": [[4, ', script)
+
+    def test_update_accepts_rows(self):
+        bars = BARS[['date', 'open', 'high', 'low', 'close']]
+        self.chart.set(bars)
+        last = pd.Timestamp(bars['date'].iloc[-1])
+        self.chart.update({'date': last + pd.Timedelta(days=1), 'open': 1, 'high': 2, 'low': 0.5, 'close': 1.5})
+        self.chart.update((last + pd.Timedelta(days=1), 1, 3, 0.5, 2.5))
+        self.chart.update(pd.Series({'time': last + pd.Timedelta(days=2), 'open': 2, 'high': 2, 'low': 2, 'close': 2}))
+        self.assertEqual(len(self.chart.candle_data), len(bars) + 2)
+        self.assertEqual(self.chart.candle_data['high'].iloc[-2], 3)
+        self.assertTrue(self.chart.win.scripts[-1].endswith('.updateBar({"time": %s, "open": 2.0, "high": 2.0, "low": 2.0, "close": 2.0})'
+                                                           % self.chart._last_bar['time']))
+
+    def test_data_is_kept_between_updates(self):
+        self.chart.set(BARS)
+        data = self.chart.candle_data
+        self.assertIs(self.chart.candle_data, data)
+        last = pd.Timestamp(BARS['date'].iloc[-1])
+        bar = {'open': 1, 'high': 2, 'low': 1, 'close': 1, 'volume': 1}
+        self.chart.update(pd.Series({'time': last + pd.Timedelta(days=1), **bar}))
+        self.assertEqual(len(self.chart.candle_data), len(BARS) + 1)
+        self.chart.update(pd.Series({'time': last + pd.Timedelta(days=1), **bar, 'high': 9}))
+        self.chart.update(pd.Series({'time': last + pd.Timedelta(days=2), **bar}))
+        data = self.chart.candle_data
+        self.assertIs(self.chart.candle_data, data)
+        self.assertEqual(len(data), len(BARS) + 2)
+        self.assertEqual(data['high'].iloc[-2], 9)
+        self.assertEqual(data['time'].dtype, 'int64')
+
+    def test_ticks_are_coalesced(self):
+        bars = BARS[['date', 'open', 'high', 'low', 'close', 'volume']]
+        self.chart.set(bars)
+        sent = []
+        self.chart.win.loaded, self.chart.win.script_func = True, sent.append
+        self.chart.win.coalesce(60)
+        last = pd.Timestamp(bars['date'].iloc[-1]) + pd.Timedelta(days=1)
+        for price in (1, 3, 2):
+            self.chart.update_from_tick(pd.Series({'time': last, 'price': price, 'volume': 10}))
+        self.assertEqual(sent, [])
+        self.chart.update_from_tick(pd.Series({'time': last + pd.Timedelta(days=1), 'price': 4, 'volume': 1}))
+        self.assertEqual(len(sent), 1)
+        self.assertIn('"high": 3.0, "low": 1.0, "close": 2.0, "volume": 10.0}', sent[0])
+        self.chart.win.coalesce(None)
+        self.assertEqual(len(sent), 2)
+        self.assertTrue(sent[1].startswith(f'{self.chart.id}.updateBar({{"time": '))
+
+    def test_frames_are_sent_from_the_loop(self):
+        bars = BARS[['date', 'open', 'high', 'low', 'close', 'volume']]
+        self.chart.set(bars)
+        sent = []
+        self.chart.win.loaded = True
+        self.chart.win.script_func = lambda script: sent.append((threading.get_ident(), script))
+        self.chart.win.coalesce(0.01)
+        last = pd.Timestamp(bars['date'].iloc[-1])
+
+        async def run():
+            self.chart.update_from_tick(pd.Series({'time': last, 'price': 1, 'volume': 1}))
+            await asyncio.sleep(0.05)
+            worker = threading.Thread(target=self.chart.update_from_tick,
+                                      args=(pd.Series({'time': last, 'price': 2, 'volume': 1}),))
+            worker.start()
+            worker.join()
+            await asyncio.sleep(0.05)
+            self.chart.update_from_tick(pd.Series({'time': last, 'price': 3, 'volume': 1}))
+            self.chart.run_script('direct()')
+
+        asyncio.run(run())
+        self.chart.win.coalesce(None)
+        self.assertEqual({thread for thread, _ in sent}, {threading.get_ident()})
+        scripts = [script for _, script in sent]
+        self.assertEqual(len(scripts), 4)
+        self.assertIn('"close": 2.0', scripts[1])
+        # A pending frame goes out before a script sent after it.
+        self.assertIn('"close": 3.0', scripts[2])
+        self.assertEqual(scripts[3], 'direct()')
+
+    def test_frame_timer_started_from_a_thread_can_be_flushed(self):
+        bars = BARS[['date', 'open', 'high', 'low', 'close', 'volume']]
+        self.chart.set(bars)
+        sent = []
+        self.chart.win.loaded = True
+        self.chart.win.script_func = sent.append
+        self.chart.win.coalesce(0.05)
+        last = pd.Timestamp(bars['date'].iloc[-1])
+
+        async def run():
+            self.chart.update_from_tick(pd.Series({'time': last, 'price': 1, 'volume': 1}))
+            self.chart.win.flush()
+            worker = threading.Thread(target=self.chart.update_from_tick,
+                                      args=(pd.Series({'time': last, 'price': 2, 'volume': 1}),))
+            worker.start()
+            worker.join()
+            await asyncio.sleep(0)
+            timer = self.chart.win._frame_timer
+            self.assertIsInstance(timer, asyncio.TimerHandle)
+            self.chart.win.flush()
+            return timer
+
+        timer = asyncio.run(run())
+        self.chart.win.coalesce(None)
+        self.assertTrue(timer.cancelled())
+        self.assertEqual(len(sent), 2)
+        self.assertIn('"close": 2.0', sent[1])
+
+    def test_ticks_are_rolled_up_together(self):
+        bars = BARS[['date', 'open', 'high', 'low', 'close', 'volume']]
+        self.chart.set(bars)
+        day = pd.Timestamp(bars['date'].iloc[-1]) + pd.Timedelta(days=1)
+        ticks = pd.DataFrame({
+            'time': [day, day, day + pd.Timedelta(days=1), day + pd.Timedelta(days=1)],
+            'price': [1, 3, 4, 2], 'volume': [1, 2, 3, 4],
+        })
+        scripts = len(self.chart.win.scripts)
+        self.chart.update_from_ticks(ticks, cumulative_volume=True)
+        self.assertEqual(len(self.chart.win.scripts) - scripts, 2)
+        self.chart.update_from_ticks(ticks.iloc[-1:].assign(price=5, volume=1), cumulative_volume=True)
+        data = self.chart.candle_data[['open', 'high', 'low', 'close', 'volume']]
+        self.assertEqual(data.iloc[-2].tolist(), [1, 3, 1, 3, 3])
+        self.assertEqual(data.iloc[-1].tolist(), [4, 5, 2, 5, 8])
+        with self.assertRaises(ValueError):
+            self.chart.update_from_ticks(ticks)
+
+    def test_markers_are_sent_as_deltas(self):
+        self.chart.set(BARS)
+        times = pd.to_datetime(BARS['date'])
+        first = self.chart.marker(times.iloc[0], text='first')
+        ids = self.chart.marker_list(pd.DataFrame({
+            'time': times.iloc[1:4], 'position': 'above', 'shape': 'circle', 'color': 'red', 'text': [None, 'b', 'c'],
+        }))
+        self.assertEqual(len(self.chart.markers), 4)
+        self.assertNotIn('text', self.chart.markers[ids[0]])
+        self.chart.remove_marker(first)
+        self.assertTrue(self.chart.win.scripts[-1].endswith(f'.series).remove(["{first}"])'))
+        self.chart.remove_markers(times.iloc[2], times.iloc[3])
+        self.assertEqual(list(self.chart.markers), ids[:1])
+        self.assertTrue(self.chart.win.scripts[-1].endswith(f'.series).remove({json.dumps(ids[1:])})'))
+        self.assertNotIn('setMarkers', ''.join(self.chart.win.scripts))
+
+        plain = self.chart.marker_list(pd.DataFrame({'time': times.iloc[4:6]}))
+        self.assertEqual(self.chart.markers[plain[0]]['shape'], 'arrowUp')
+        self.assertEqual(self.chart.markers[plain[1]]['color'], '#2196F3')
+        self.chart.set(BARS.iloc[:-1])
+        self.assertIn(f'.series).reanchor({len(BARS) - 1})', ''.join(self.chart.win.scripts[-4:]))
+
+    def test_ids_are_handles(self):
+        lines = [self.chart.create_line() for _ in range(3)]
+        ids = [self.chart.id, *(line.id for line in lines)]
+        self.assertTrue(all(id.startswith('Lib.handles.h') for id in ids))
+        self.assertEqual(len(set(ids)), len(ids))
+        lines[0].delete()
+        self.assertEqual(self.chart.win.scripts[-1], f'delete {lines[0].id}')
+
+    def test_drawing_layer_sends_batches(self):
+        self.chart.set(BARS)
+        layer = self.chart.drawing_layer()
+        scripts = len(self.chart.win.scripts)
+        lines = layer.horizontal_lines(BARS['close'], color='red')
+        boxes = layer.boxes(BARS['date'][:2], [1, 2], BARS['date'][2:4], [3, 4], style=['solid', 'dashed'])
+        layer.update(lines[:10], price=0, color=['blue'] * 10)
+        layer.remove(boxes)
+        sent = self.chart.win.scripts[scripts:]
+        self.assertEqual(len(sent), 4)
+        self.assertEqual(len(lines), len(BARS))
+        self.assertTrue(sent[0].startswith(f'{layer.id}.add("horizontal", {{"id": '))
+        self.assertIn('"color": "red"', sent[0])
+        self.assertIn('"style": [0, 2]', sent[1])
+        self.assertEqual(self.chart.win.leak_report()['objects'].get('DrawingLayer'), 1)
+        layer.delete()
+        self.assertNotIn(layer.id, self.chart.win._live)
+        self.assertNotIn('DrawingLayer', self.chart.win.leak_report()['objects'])
+
+    def test_vertical_spans_share_a_layer(self):
+        self.chart.set(BARS)
+        times = pd.to_datetime(BARS['date'])
+        single = self.chart.vertical_span(times.iloc[0])
+        spans = self.chart.vertical_span(pd.DataFrame({
+            'start': times.iloc[:100:2].values, 'end': times.iloc[1:100:2].values, 'color': 'red',
+        }))
+        scripts = ''.join(self.chart.win.scripts)
+        self.assertEqual(scripts.count('new Lib.SpanLayer()'), 1)
+        self.assertNotIn('addHistogramSeries', scripts)
+        self.assertEqual(len(spans.ids), 50)
+        self.assertEqual(single.id, self.chart._spans.id)
+        rounded = self.chart.vertical_span(times.iloc[3], times.iloc[4], round=True)
+        self.assertIn('"round": true', self.chart.win.scripts[-1])
+        self.assertNotIn('round', self.chart.win.scripts[-2])
+        rounded.delete()
+        single.delete()
+        self.assertEqual(self.chart.win.scripts[-1], f'{self.chart._spans.id}.remove({json.dumps(single.ids)})')
+
+    def test_drawings_are_updated_together(self):
+        self.chart.set(BARS)
+        times = pd.to_datetime(BARS['date'])
+        line = self.chart.horizontal_line(100)
+        box = self.chart.box(times.iloc[0], 1, times.iloc[5], 2)
+        self.assertIn(f'Lib.TimeIndex.of({self.chart.id}.series).points([', self.chart.win.scripts[-1])
+        scripts = len(self.chart.win.scripts)
+        self.chart.update_drawings([line, box], [105, (times.iloc[1], 3, times.iloc[6], 4)])
+        sent = self.chart.win.scripts[scripts:]
+        self.assertEqual(len(sent), 1)
+        self.assertIn(f'.updateDrawings([{line.id}, {box.id}], [[null], [', sent[0])
+        self.assertTrue(sent[0].endswith(', [[105.0], [3.0, 4.0]])'))
+        self.assertEqual(line.price, 105)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
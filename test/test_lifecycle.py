@@ -0,0 +1,63 @@
+import gc
+import tracemalloc
+import unittest
+
+from util import BARS, Tester
+
+
+class TestLifecycle(Tester):
+    def setUp(self):
+        super().setUp()
+        # Scripts are dropped rather than queued, as they would be sent to a shown chart.
+        self.chart.win.loaded, self.chart.win.script_func = True, lambda script: None
+        self.chart.set(BARS)
+
+    def overlay_cycle(self):
+        bars = BARS.tail(50)
+        line = self.chart.create_line('sma')
+        line.set(bars.assign(sma=bars['close'].rolling(5).mean())[['date', 'sma']])
+        line.marker(text='x')
+        histogram = self.chart.create_histogram('hist')
+        histogram.set(bars.rename(columns={'volume': 'hist'})[['date', 'hist']])
+        self.chart.horizontal_line(BARS['close'].iloc[-1], func=lambda *_: None).delete()
+        self.chart.events.range_change += lambda *_: None
+        line.delete()
+        histogram.delete()
+
+    def test_delete_releases_objects(self):
+        before = self.chart.win.leak_report()
+        line = self.chart.create_line('sma')
+        self.chart.horizontal_line(1, func=lambda *_: None)
+        self.chart.create_table(100, 100, ('a', 'b'), func=lambda *_: None).new_row(1, 2)
+        self.assertEqual(self.chart.win.leak_report()['objects'].get('Line'), 1)
+        self.assertEqual(self.chart.win.leak_report()['objects'].get('Table'), 1)
+        line.delete()
+        self.assertNotIn('Line', self.chart.win.leak_report()['objects'])
+        self.assertEqual(line.data.shape, (0, 0))
+        self.chart.delete()
+        self.assertEqual(self.chart.win.leak_report()['objects'], {})
+        self.assertEqual(self.chart.win.leak_report()['handlers'], before['handlers'])
+
+    def test_soak_memory_stays_flat(self):
+        for _ in range(20):
+            self.overlay_cycle()
+        gc.collect()
+        report = self.chart.win.leak_report()
+        tracemalloc.start()
+        try:
+            for _ in range(20):
+                self.overlay_cycle()
+            gc.collect()
+            start, _ = tracemalloc.get_traced_memory()
+            for _ in range(100):
+                self.overlay_cycle()
+            gc.collect()
+            end, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(self.chart.win.leak_report(), report)
+        self.assertLess(end - start, 256 * 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,420 @@
+import asyncio
+import json
+import tempfile
+import threading
+import time
+import unittest
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from lightweight_charts import Chart, polygon
+from lightweight_charts.polygon import websockets
+from lightweight_charts.util import PreparedCache, Ticks, resample_bars
+
+
+DAY = 86_400_000
+
+
+class StubPolygon(BaseHTTPRequestHandler):
+    """
+    Serves a bar for each day of the requested range, two to a page, and rate limits the first request.
+    Pages listed in `failing` by their path and cursor are not found.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.clients.add(self.client_address)
+            limited = len(server.requests) == 1
+        if limited:
+            return self.respond(429, {'error': 'rate limited'})
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        if query.get('apiKey') != ['key']:
+            return self.respond(401, {'error': 'bad key'})
+        *_, start, end = url.path.split('/')
+        times = range(int(pd.Timestamp(start).value // 1e6), int(pd.Timestamp(end).value // 1e6) + 1, DAY)
+        offset = int(query.get('cursor', [0])[0])
+        if (url.path, offset) in server.failing:
+            return self.respond(404, {'error': 'not found'})
+        page = {'results': [{'t': t, 'o': 1, 'h': 2, 'l': 0, 'c': 1, 'v': 10} for t in times[offset:offset + 2]]}
+        if offset + 2 < len(times):
+            page['next_url'] = f'http://{self.headers["Host"]}{url.path}?cursor={offset + 2}'
+        self.respond(200, page)
+
+    def respond(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPolygon(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubPolygon)
+        self.server.lock, self.server.requests, self.server.clients = threading.Lock(), [], set()
+        self.server.failing = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = polygon._client
+        polygon._client = polygon._Client(f'http://127.0.0.1:{self.server.server_port}', concurrency=2, backoff=0.01)
+        polygon.PolygonAPI.api_key('key')
+
+    def tearDown(self):
+        polygon._client.close()
+        polygon._client = self.client
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_pages_are_followed(self):
+        df = polygon.get_bar_data('AAPL', 'D', '2024-01-01', '2024-01-05')
+        self.assertEqual(list(df['time']), list(pd.date_range('2024-01-01', '2024-01-05')))
+        self.assertEqual(list(df.columns), ['open', 'high', 'low', 'close', 'time', 'volume'])
+        # The rate limited request is retried, and each page reuses the same connection.
+        self.assertEqual(len(self.server.requests), 4)
+        self.assertEqual(len(self.server.clients), 1)
+
+    def test_ranges_are_sliced(self):
+        df = asyncio.run(polygon.async_get_bar_data('AAPL', '1min', '2024-01-01', '2024-03-15'))
+        self.assertEqual(len(df), 75)
+        self.assertTrue(df['time'].is_monotonic_increasing)
+        slices = {urllib.parse.urlsplit(path).path for path in self.server.requests}
+        self.assertEqual(len(slices), 3)
+        self.assertLessEqual(len(self.server.clients), 2)
+
+    def test_cached_dates_are_not_requested(self):
+        with tempfile.TemporaryDirectory() as directory:
+            polygon.PolygonAPI.cache(directory)
+            try:
+                polygon.get_bar_data('AAPL', 'D', '2024-01-01', '2024-01-05')
+                requests = len(self.server.requests)
+                df = polygon.get_bar_data('AAPL', 'D', '2024-01-03', '2024-01-08')
+                paths = {urllib.parse.urlsplit(path).path for path in self.server.requests[requests:]}
+                self.assertEqual(paths, {'/v2/aggs/ticker/AAPL/range/1/day/2024-01-06/2024-01-08'})
+                self.assertEqual(list(df['time']), list(pd.date_range('2024-01-03', '2024-01-08')))
+
+                requests = len(self.server.requests)
+                cached = polygon._BarRequest('AAPL', 'D', '2024-01-02', '2024-01-07', 5_000)
+                self.assertEqual(cached.urls, [])
+                self.assertEqual(len(cached.cached_bars()), 6)
+                self.assertEqual(len(self.server.requests), requests)
+
+                # Cached minute bars are rolled up where they overlap, leaving only the dates before them.
+                polygon.get_bar_data('AAPL', '1min', '2024-01-03', '2024-01-05')
+                rolled = polygon._BarRequest('AAPL', '30min', '2024-01-01', '2024-01-05', 5_000)
+                self.assertEqual([url.split('?')[0] for url in rolled.urls],
+                                 ['/v2/aggs/ticker/AAPL/range/30/minute/2024-01-01/2024-01-02'])
+                self.assertEqual(len(rolled.cached_bars()), 3)
+            finally:
+                polygon.PolygonAPI.cache(None)
+
+    def test_failed_slices_are_not_covered(self):
+        self.server.failing.add(('/v2/aggs/ticker/AAPL/range/1/minute/2024-01-31/2024-02-29', 2))
+        with tempfile.TemporaryDirectory() as directory:
+            polygon.PolygonAPI.cache(directory)
+            try:
+                request = polygon._BarRequest('AAPL', '1min', '2024-01-01', '2024-03-15', 5_000)
+                df = request.finish(list(polygon._client.executor.map(polygon._client.get_all, request.urls)))
+                # The slices fetched in full are kept, while the one whose second page failed is requested again.
+                self.assertEqual(len(df), 45)
+                again = ['/v2/aggs/ticker/AAPL/range/1/minute/2024-01-31/2024-02-29']
+                self.assertEqual([url.split('?')[0] for url in request.urls], again)
+                cached = polygon._BarRequest('AAPL', '1min', '2024-01-01', '2024-03-15', 5_000)
+                self.assertEqual([url.split('?')[0] for url in cached.urls], again)
+
+                polygon.PolygonAPI.cache(None)
+                rolled = polygon._BarRequest('AAPL', '30min', '2024-01-01', '2024-03-15', 5_000)
+                rolled.adopt(request, df)
+                self.assertEqual([url.split('?')[0] for url in rolled.urls],
+                                 ['/v2/aggs/ticker/AAPL/range/30/minute/2024-01-31/2024-02-29'])
+            finally:
+                polygon.PolygonAPI.cache(None)
+
+    def test_bars_are_rolled_up(self):
+        times = pd.date_range('2024-01-01 09:30', periods=500, freq='min').delete([7, 8, 9, 200])
+        prices = np.random.default_rng(0).normal(100, 1, (len(times), 4))
+        bars = pd.DataFrame({
+            'time': times, 'open': prices[:, 0], 'high': prices.max(axis=1), 'low': prices.min(axis=1),
+            'close': prices[:, 3], 'volume': np.arange(len(times)),
+        })
+        expected = bars.set_index('time').resample('30min').agg(
+            {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+        ).dropna().reset_index()
+        pd.testing.assert_frame_equal(resample_bars(bars, pd.Timedelta('30min')), expected, check_dtype=False)
+
+    def test_longer_timeframes_are_not_requested(self):
+        chart = polygon.PolygonChart('key', cache=None)
+        chart.run_script = lambda *args, **kwargs: None
+
+        def dates(path):
+            *_, start, end = urllib.parse.urlsplit(path).path.split('/')
+            return pd.Timestamp(start), pd.Timestamp(end)
+
+        async def show(timeframe):
+            chart.topbar['timeframe'].value = timeframe
+            requests = len(self.server.requests)
+            await chart._polygon('AAPL')
+            for task in asyncio.all_tasks() - {asyncio.current_task()}:
+                await task
+            return sorted({dates(path) for path in self.server.requests[requests:]})
+
+        async def run():
+            await show('1min')
+            # The longer timeframe starts earlier, so only the dates before the shorter one and today are requested.
+            return await show('30min'), len(chart.candle_data)
+
+        try:
+            requested, bars = asyncio.run(run())
+        finally:
+            chart.exit()
+        today = pd.Timestamp.now().normalize()
+        minute_start, half_hour_start = (pd.Timestamp(chart._start_date(timeframe)) for timeframe in ('1min', '30min'))
+        self.assertLess(half_hour_start, minute_start)
+        self.assertEqual(requested, [(half_hour_start, minute_start - pd.Timedelta(days=1)), (today, today)])
+        # A bar for each day from the start of the longer timeframe until today.
+        self.assertEqual(bars, len(pd.date_range(half_hour_start, today)))
+
+    def test_prefetched_tickers_are_restored(self):
+        threads = []
+
+        class Request(polygon._BarRequest):
+            def __init__(self, *args):
+                # Loading the cache reads from disk, so requests are made off the event loop.
+                threads.append(threading.get_ident())
+                super().__init__(*args)
+
+        chart, bar_request = Chart(), polygon._BarRequest
+        polygon._BarRequest = Request
+        try:
+            api = polygon.PolygonAPI(chart)
+            asyncio.run(api.prefetch(['AAPL', 'MSFT'], 'D', '2024-01-01', '2024-01-05'))
+            requests, scripts = len(self.server.requests), len(chart.win.scripts)
+            asyncio.run(api.async_set('stocks', 'MSFT', 'D', '2024-01-01', '2024-01-05', 5_000, False))
+            self.assertEqual(len(self.server.requests), requests)
+            self.assertEqual(len(chart.candle_data), 5)
+            self.assertTrue(any('.dataset.set(0, ' in script for script in chart.win.scripts[scripts:]))
+            self.assertEqual(len(threads), 3)
+            self.assertNotIn(threading.get_ident(), threads)
+        finally:
+            polygon._BarRequest = bar_request
+            chart.exit()
+
+    def test_least_recent_states_are_evicted(self):
+        chart = Chart()
+        try:
+            states = PreparedCache()
+            df = pd.DataFrame({'time': pd.date_range('2024-01-01', periods=5), 'open': 1., 'high': 2., 'low': 0., 'close': 1.})
+            prepared = chart.prepare(df)
+            states.max_bytes = prepared.nbytes * 2
+            for key in 'AB':
+                states.put(key, prepared)
+            states.get('A')
+            states.put('C', prepared)
+            self.assertEqual([key in states for key in 'ABC'], [True, False, True])
+        finally:
+            chart.exit()
+
+    def test_ticks_are_delivered_once_per_frame(self):
+        batches = []
+
+        def broken(ticks):
+            raise ValueError('subscriber failed')
+
+        polygon._lasts.update({
+            ticker: {'price': 0, 'volume': 0, 'precision': 2, 'ticker': ticker, 'sec_type': 'stocks',
+                     'funcs': [(broken, (), None), (lambda *args: batches.append(args), arguments, None)]}
+            for ticker, arguments in (('AAPL', (True,)), ('MSFT', ()))
+        })
+        try:
+            with self.assertLogs('polygon', 'ERROR') as logs:
+                polygon._handle_frame('stocks', [
+                    {'ev': 'status', 'message': 'authenticated'},
+                    {'ev': 'Q', 'sym': 'AAPL', 'bp': 1, 'ap': 3, 't': 1000},
+                    {'ev': 'Q', 'sym': 'MSFT', 'bp': 5, 'ap': 5, 't': 1000},
+                    {'ev': 'Q', 'sym': 'AAPL', 'bp': 2, 'ap': 2.001, 't': 2000},
+                    {'ev': 'A', 'sym': 'AAPL', 'v': 7},
+                    {'ev': 'Q', 'sym': 'AAPL', 'bp': 3, 'ap': 3, 't': 3000},
+                    {'ev': 'Q', 'sym': 'TSLA', 'bp': 3, 'ap': 3, 't': 3000},
+                ])
+        finally:
+            del polygon._lasts['AAPL'], polygon._lasts['MSFT']
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(len(batches), 2)
+        (aapl, *args), (msft, *_) = batches
+        self.assertEqual(args, [True])
+        self.assertEqual(aapl.symbol, 'AAPL')
+        self.assertEqual(aapl.price.tolist(), [2, 2, 3])
+        self.assertEqual(aapl.volume.tolist(), [0, 7, 0])
+        self.assertEqual(list(aapl.frame['time']), list(pd.to_datetime([1000, 1000, 3000], unit='ms')))
+        self.assertEqual(msft.price.tolist(), [5])
+
+    def test_charts_share_subscriptions(self):
+        sent = []
+
+        class Socket:
+            async def send(self, message):
+                sent.append(json.loads(message))
+
+        async def run():
+            polygon._connections['stocks'] = asyncio.get_running_loop().create_future()
+            polygon._ws['stocks'] = Socket()
+            charts = [Chart() for _ in range(3)]
+            for chart in charts:
+                chart.set(pd.DataFrame({'time': pd.to_datetime(['2024-01-02 14:28', '2024-01-02 14:29']),
+                                        'open': 1., 'high': 1., 'low': 1., 'close': 1., 'volume': 0.}))
+                await polygon.subscribe('AAPL', 'stocks', chart.update_from_ticks, (True,))
+            self.assertEqual(sent, [{'action': 'subscribe', 'params': 'Q.AAPL'}, {'action': 'subscribe', 'params': 'A.AAPL'}])
+            received = []
+            await polygon.subscribe('AAPL', 'stocks', received.append, ())
+
+            start = int(pd.Timestamp('2024-01-02 14:30').value // 10**6)
+            polygon._handle_frame('stocks', [{'ev': 'Q', 'sym': 'AAPL', 'bp': 2, 'ap': 2, 't': start},
+                                             {'ev': 'Q', 'sym': 'AAPL', 'bp': 3, 'ap': 3, 't': start + 1000}])
+            ticks, = received
+            with self.assertRaises(ValueError):
+                ticks.price[0] = 0
+            # The charts share a timeframe, so the ticks are only rolled up once between them.
+            self.assertEqual(len(ticks._bars), 1)
+            for chart in charts:
+                self.assertEqual(chart.candle_data['close'].tolist(), [1, 1, 3])
+
+            sent.clear()
+            for chart in charts:
+                chart.exit()
+            await asyncio.sleep(0)
+            # The last subscriber left unsubscribes upstream.
+            self.assertEqual(sent, [])
+            await polygon.unsubscribe(received.append)
+            self.assertEqual(sent, [{'action': 'unsubscribe', 'params': 'Q.AAPL'}, {'action': 'unsubscribe', 'params': 'A.AAPL'}])
+            self.assertEqual(polygon._lasts['AAPL']['funcs'], [])
+
+        try:
+            asyncio.run(run())
+        finally:
+            polygon._connections.pop('stocks', None)
+            polygon._ws['stocks'] = None
+            polygon._lasts.pop('AAPL', None)
+
+    def test_ticks_are_conflated(self):
+        now = [0.0]
+        ticks = Ticks(pd.to_datetime(range(6), unit='s'), [2, 5, 3, 1, 4, 3], [1, 1, 1, 1, 1, 1])
+        for mode, prices, volumes in (('ohlc', [5, 1, 3], [1, 2, 2]), ('last', [3], [5])):
+            batches = []
+            conflation = polygon.Conflation(10, mode, clock=lambda: now[0])
+            conflation._deliver = batches.append
+            conflation.push(Ticks(ticks.time[:1], ticks.price[:1], ticks.volume[:1]))
+            conflation.push(Ticks(ticks.time[1:3], ticks.price[1:3], ticks.volume[1:3]))
+            conflation.push(Ticks(ticks.time[3:], ticks.price[3:], ticks.volume[3:]))
+            self.assertEqual(len(batches), 1)
+            self.assertEqual((conflation.received, conflation.emitted, conflation.dropped), (6, 1, 0))
+            now[0] += 0.1
+            conflation.flush()
+            self.assertEqual(batches[1].price.tolist(), prices)
+            self.assertEqual(batches[1].volume.tolist(), volumes)
+            self.assertEqual(conflation.dropped, 5 - len(prices))
+
+    @unittest.skipIf(websockets is None, 'websockets is not installed')
+    def test_websocket_reconnects_and_backfills(self):
+        # Midday, so the backfilled daily bars never straddle the tick times whatever the wall clock.
+        now = int((pd.Timestamp.now().normalize() + pd.Timedelta(hours=12)).value // 10**6)
+        connections, batches = [], []
+
+        async def handler(ws):
+            received = [json.loads(await ws.recv()), json.loads(await ws.recv())]
+            connections.append(received)
+            if len(connections) == 1:
+                # The first connection fails on a malformed message right after its first tick.
+                await ws.send(json.dumps([{'ev': 'Q', 'sym': 'AAPL', 'bp': 1, 'ap': 1, 't': now - 2 * DAY}]))
+                await ws.send('{')
+                await ws.wait_closed()
+                return
+            await ws.send(json.dumps([{'ev': 'Q', 'sym': 'AAPL', 'bp': 9, 'ap': 9, 't': now}]))
+            await ws.wait_closed()
+
+        async def run():
+            async with websockets.serve(handler, '127.0.0.1', 0) as server:
+                polygon.SOCKET_URL = f'ws://127.0.0.1:{server.sockets[0].getsockname()[1]}'
+                await polygon.subscribe('AAPL', 'stocks', lambda ticks: batches.append(ticks), ())
+                for _ in range(200):
+                    if batches and batches[-1].price[-1] == 9:
+                        break
+                    await asyncio.sleep(0.02)
+                connection = polygon._connections.pop('stocks')
+                connection.cancel()
+                await asyncio.gather(connection, return_exceptions=True)
+                self.assertIsNone(polygon._ws['stocks'])
+
+        url, backoff = polygon.SOCKET_URL, polygon.RECONNECT_BACKOFF
+        polygon.RECONNECT_BACKOFF = 0.01
+        try:
+            with self.assertLogs('polygon', 'ERROR'):
+                asyncio.run(run())
+        finally:
+            polygon.SOCKET_URL, polygon.RECONNECT_BACKOFF = url, backoff
+            polygon._ws['stocks'] = None
+            del polygon._lasts['AAPL']
+        self.assertEqual(len(connections), 2)
+        self.assertEqual(connections[1], [{'action': 'auth', 'params': 'key'}, {'action': 'subscribe', 'params': 'Q.AAPL,A.AAPL'}])
+        live, backfill, reconnected = batches
+        self.assertEqual(live.price.tolist(), [1])
+        # A bar for each day since the drop, at its open, high, low and close.
+        self.assertEqual(backfill.price.tolist(), [1, 2, 0, 1] * 2)
+        self.assertTrue((backfill.time > live.time[0]).all())
+        self.assertEqual(reconnected.price.tolist(), [9])
+
+    def test_recorded_ticks_are_replayed(self):
+        frames = [
+            [{'ev': 'Q', 'sym': 'AAPL', 'bp': i, 'ap': i, 't': i * 1000}, {'ev': 'Q', 'sym': 'MSFT', 'bp': i, 'ap': i, 't': i * 1000}]
+            for i in range(1, 4)
+        ]
+        batches = []
+
+        async def replay(speed):
+            batches.clear()
+            polygon.PolygonAPI.replay(path, speed)
+            await polygon.subscribe('AAPL', 'stocks', lambda ticks: batches.append(ticks), ())
+            return await polygon._connections.pop('stocks')
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = f'{directory}/ticks.log'
+            recorder = polygon.TickRecorder(path)
+            for frame in frames:
+                recorder.write('stocks', json.dumps(frame))
+                time.sleep(0.05)
+            recorder.write('crypto', '[]')
+            recorder.close()
+            # A record cut short is skipped.
+            with open(path, 'ab') as file:
+                file.write(b'\x00' * 5)
+            try:
+                fast = asyncio.run(replay(None))
+                self.assertEqual([ticks.price.tolist() for ticks in batches], [[1], [2], [3]])
+                del polygon._lasts['AAPL']
+                timed = asyncio.run(replay(2))
+            finally:
+                polygon.PolygonAPI.replay(None)
+                polygon._lasts.pop('AAPL', None)
+        self.assertEqual(fast['messages'], 3)
+        self.assertEqual(len(batches), 3)
+        self.assertGreaterEqual(timed['seconds'], 0.05)
+        self.assertLess(fast['seconds'], timed['seconds'])
+
+    def test_requests_are_rate_limited(self):
+        bucket = polygon._TokenBucket(rate=50, burst=2)
+        start = polygon.time.monotonic()
+        for _ in range(7):
+            bucket.acquire()
+        self.assertGreaterEqual(polygon.time.monotonic() - start, 0.09)
+
+
+if __name__ == '__main__':
+    unittest.main()
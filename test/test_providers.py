@@ -0,0 +1,100 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from lightweight_charts import ProviderChart, providers
+
+
+def minute_bars(days=('2024-01-02', '2024-01-03', '2024-01-04')):
+    times = pd.DatetimeIndex(np.concatenate([pd.date_range(f'{day} 09:30', periods=390, freq='min') for day in days]))
+    periods = len(times)
+    close = 100 + np.random.default_rng(0).normal(size=periods).cumsum()
+    return pd.DataFrame({
+        'time': times,
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close, 'volume': np.arange(periods, dtype=float),
+    })
+
+
+class TestProviders(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.bars = minute_bars()
+        self.bars.to_csv(os.path.join(self.directory.name, 'AAPL.csv'), index=False)
+        self.bars.iloc[:10].to_csv(os.path.join(self.directory.name, 'AMZN.csv'), index=False)
+        self.sqlite = providers.SQLiteProvider(os.path.join(self.directory.name, 'bars.db'), page_size=100)
+        self.sqlite.write('AAPL', self.bars)
+        self.csv = providers.CSVProvider(self.directory.name, chunksize=100)
+
+    def tearDown(self):
+        self.csv.close()
+        self.sqlite.close()
+        self.directory.cleanup()
+
+    def test_sources_serve_the_same_bars(self):
+        for provider in (self.csv, self.sqlite):
+            df = provider.bars('AAPL', start='2024-01-03', end='2024-01-03')
+            expected = self.bars[self.bars['time'].dt.date == pd.Timestamp('2024-01-03').date()]
+            self.assertEqual(len(df), len(expected))
+            np.testing.assert_allclose(df['close'], expected['close'])
+            self.assertEqual(df['time'].iloc[0], expected['time'].iloc[0])
+
+            df = provider.bars('AAPL', '30min', end='2024-01-05', count=5)
+            self.assertEqual(len(df), 5)
+            self.assertEqual(df['time'].iloc[-1], self.bars['time'].iloc[-1].floor('30min'))
+            last = self.bars[self.bars['time'] >= df['time'].iloc[-1]]
+            self.assertEqual(df['volume'].iloc[-1], last['volume'].sum())
+            self.assertEqual(df['high'].iloc[-1], last['high'].max())
+
+            self.assertEqual(len(provider.bars('AAPL', 'D')), 3)
+            self.assertIsNone(provider.bars('MSFT'))
+        self.assertEqual(self.csv.search_symbols('a'), ['AAPL', 'AMZN'])
+        self.assertEqual(self.sqlite.search_symbols('AP'), ['AAPL'])
+        self.assertEqual(self.sqlite.search_symbols('%'), [])
+
+    def test_bars_are_read_once(self):
+        reads = []
+        get_bars = self.sqlite.get_bars
+        self.sqlite.get_bars = lambda *args: reads.append(args) or get_bars(*args)
+        self.sqlite.bars('AAPL', start='2024-01-02', end='2024-01-04')
+        self.sqlite.bars('AAPL', '5min', start='2024-01-03', end='2024-01-03')
+        asyncio.run(self.sqlite.prefetch(['AAPL'], 'D', start='2024-01-02', end='2024-01-04'))
+        self.assertEqual(len(reads), 1)
+
+        self.sqlite.bars('AAPL', start='2024-01-01', end='2024-01-04')
+        self.assertEqual(len(reads), 2)
+        self.sqlite.write('AAPL', self.bars.iloc[-1:])
+        self.sqlite.bars('AAPL', start='2024-01-02', end='2024-01-04')
+        self.assertEqual(len(reads), 3)
+
+        # Daily bars hold far fewer minutes than a day, so the span is only widened by the bars rolled up.
+        reads.clear()
+        daily = self.sqlite.bars('AAPL', 'D', end='2024-01-04', count=2)
+        self.assertEqual(len(reads), 1)
+        self.assertEqual(list(daily['time']), list(pd.to_datetime(['2024-01-03', '2024-01-04'])))
+
+    def test_chart_runs_from_any_provider(self):
+        class Ticks(providers.CSVProvider):
+            async def stream_ticks(self, symbol):
+                yield pd.DataFrame({'time': [pd.Timestamp('2024-01-04 16:00:30')], 'price': [50.0], 'volume': [7.0]})
+
+        async def main():
+            chart = ProviderChart(Ticks(self.directory.name), live=True, num_bars=50, end_date='2024-01-04')
+            chart.topbar['timeframe'].value = '1min'
+            await chart.on_search(chart, 'aap')
+            self.assertEqual(chart.topbar['symbol'].value, 'AAPL')
+            self.assertEqual(len(chart.data), 50)
+            await chart._stream
+            self.assertEqual(chart._last_bar['close'], 50.0)
+            await chart.on_search(chart, 'MSFT')
+            self.assertEqual(chart.topbar['symbol'].value, '')
+            chart.exit()
+
+        asyncio.run(main())
+
+
+if __name__ == '__main__':
+    unittest.main()
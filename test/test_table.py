@@ -1,12 +1,122 @@
+import asyncio
+import json
 import unittest
+
 import pandas as pd
 
-from lightweight_charts import Chart
+from util import Tester
+
+
+def in_loop(test):
+    """
+    Runs a test within an asyncio loop, which table frames are timed on.
+    """
+    def run(self):
+        async def body():
+            test(self)
+        asyncio.run(body())
+    return run
+
+
+class TestTable(Tester):
+    def setUp(self):
+        super().setUp()
+        self.sent = []
+        self.chart.win.loaded, self.chart.win.script_func = True, self.sent.append
+        self.table = self.chart.create_table(1, 1, ('Symbol', 'Price', 'PL'))
+
+    @in_loop
+    def test_changes_are_sent_together(self):
+        rows = [self.table.new_row(f'S{i}', i, 0, id=i + 1) for i in range(3)]
+        self.table.win.flush()
+        self.sent.clear()
+        for row in rows:
+            row['Price', 'PL'] = row['Price'] + 1, 0
+            row.text_color('PL', 'green')
+        rows[0].background_color('Symbol', 'red')
+        self.assertEqual(self.sent, [])
+        self.table.win.flush()
+        self.assertEqual(len(self.sent), 1)
+        values, styles = json.loads(f'[{self.sent[0].split("updateCells(", 1)[1][:-1]}]')
+        self.assertEqual(values, {'1': {'Price': '1'}, '2': {'Price': '2'}, '3': {'Price': '3'}})
+        self.assertEqual(styles['1'], {'PL': {'color': 'green'}, 'Symbol': {'backgroundColor': 'red'}})
+
+    @in_loop
+    def test_unchanged_cells_are_skipped(self):
+        row = self.table.new_row('AAPL', 1, 0)
+        row.text_color('PL', 'green')
+        self.table.win.flush()
+        self.sent.clear()
+        row['Symbol', 'Price'] = 'AAPL', 1
+        row.text_color('PL', 'green')
+        self.table.win.flush()
+        self.assertEqual(self.sent, [])
+
+    @in_loop
+    def test_rows_are_created_before_their_cells(self):
+        self.table.new_row('AAPL', 1, 0, id=1)
+        self.table.new_row('MSFT', 2, 0, id=2)
+        self.assertTrue(self.sent[-1].endswith('.newRow("2", false)'))
+        self.assertIn('.updateCells({"1": {"Symbol": "AAPL"', self.sent[-2])
+        self.table.format('PL', f'$ {self.table.VALUE}')
+        self.assertTrue(self.sent[-1].endswith('.formats["PL"] = ["$ ", ""]'))
+
+    def test_cells_are_sent_before_later_scripts(self):
+        row = self.table.new_row('AAPL', 1, 0, id=1)
+        self.sent.clear()
+        row['Price'] = 2
+        # Without a loop to time frames on, cells are sent at once.
+        self.assertIn('"Price": "2"', self.sent[-1])
+
+        async def queued():
+            row['Price'] = 3
+            self.assertNotIn('"Price": "3"', self.sent[-1])
+            self.table.run_script('direct()')
+
+        asyncio.run(queued())
+        self.assertIn('"Price": "3"', self.sent[-2])
+        self.assertEqual(self.sent[-1], 'direct()')
+
+    @in_loop
+    def test_bound_rows_are_diffed(self):
+        df = pd.DataFrame({'Symbol': ['AAPL', 'MSFT', 'TSLA'], 'Price': [1.0, 2.0, 3.0], 'PL': [0, None, 0]})
+        self.table.bind(df, key='Symbol')
+        self.table.win.flush()
+        data = json.loads(self.sent[-1].split('.bindData(', 1)[1].rsplit(', ', 1)[0])
+        self.assertEqual(data['keys'], ['AAPL', 'MSFT', 'TSLA'])
+        self.assertEqual(data['columns']['PL'], ['0.0', '', '0.0'])
+
+        changed = pd.DataFrame({'Symbol': ['NVDA', 'TSLA', 'AAPL'], 'Price': [4.0, 3.0, 1.5], 'PL': [0.0, 0.0, 0.0]})
+        self.table.bind(df.assign(Price=9.0), key='Symbol')
+        self.table.bind(changed, key='Symbol')
+        self.table.win.flush()
+        patch = json.loads(self.sent[-1].split('.patchData(', 1)[1][:-1])
+        self.assertEqual(patch['delete'], ['MSFT'])
+        self.assertEqual(patch['insert'], {'keys': ['NVDA'], 'columns': {'Symbol': ['NVDA'], 'Price': ['4.0'], 'PL': ['0.0']}})
+        self.assertEqual(patch['update'], {'Price': [['AAPL'], ['1.5']]})
+        self.assertEqual(patch['order'], ['NVDA', 'TSLA', 'AAPL'])
+
+        self.table.bind(changed.iloc[::-1], key='Symbol')
+        self.table.win.flush()
+        patch = json.loads(self.sent[-1].split('.patchData(', 1)[1][:-1])
+        self.assertEqual(patch['order'], ['AAPL', 'TSLA', 'NVDA'])
+        self.assertEqual(patch['insert']['keys'] + patch['delete'], [])
 
+        scripts = len(self.sent)
+        self.table.bind(changed.iloc[::-1].assign(Price=9.0).iloc[:2], key='Symbol')
+        self.table.win.flush()
+        self.assertNotIn('order', json.loads(self.sent[-1].split('.patchData(', 1)[1][:-1]))
+        self.table.bind(changed.iloc[::-1].assign(Price=9.0).iloc[:2], key='Symbol')
+        self.table.win.flush()
+        self.assertEqual(len(self.sent), scripts + 1)
 
-class TestTable(unittest.TestCase):
-    ...
+        self.table.clear()
+        self.table.bind(df, key='Symbol')
+        self.table.win.flush()
+        self.assertIn('.bindData(', self.sent[-1])
+        with self.assertRaises(ValueError):
+            self.table.bind(pd.concat([df, df]), key='Symbol')
 
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()